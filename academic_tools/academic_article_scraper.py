@@ -6,18 +6,85 @@ A flexible tool to retrieve academic articles from PubMed with various search pa
 Supports multiple journals, institutions, authors, and date ranges
 """
 
-import requests
 import xml.etree.ElementTree as ET
-import time
 import csv
 import json
 import argparse
 import logging
-from typing import List, Dict, Optional, Union
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count, islice
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 import re
+import sqlite3
 from datetime import datetime, timedelta
 import os
 import sys
+import time
+
+import requests
+
+from pubmed_batch import (
+    QueryRouter,
+    load_query_manifest,
+    run_query_batch,
+    safe_filename,
+    save_membership_index,
+    union_pmids,
+)
+from pubmed_batch_size import INITIAL_BATCH_SIZE, AdaptiveBatchSizer
+from pubmed_cache import RecordCache
+from pubmed_categories import DEFAULT_CATEGORY_RULES, MeshCategoryMatcher
+from pubmed_checkpoint import HarvestCheckpoint
+from pubmed_client import (
+    DEFAULT_SHARED_RATE_LIMIT_PATH,
+    NCBI_RATE_LIMIT,
+    NCBI_RATE_LIMIT_WITH_KEY,
+    PubMedClient,
+    RateLimiter,
+    SharedRateLimiter,
+    rate_limit_bucket,
+)
+from pubmed_index import ArticleSearchIndex
+from pubmed_metrics import METRIC_FORMATS, MetricsRegistry, MetricsReporter
+from pubmed_parser import (
+    AFFILIATION_LIMIT,
+    ARTICLE_FIELDS,
+    DECODER_VERSION,
+    MESH_TERM_LIMIT,
+    PubmedArticleDecoder,
+    decode_esummary_document,
+    init_parse_worker,
+    iter_pubmed_articles,
+    normalize_fields,
+    parse_efetch_payload,
+    project_record,
+)
+from pubmed_replay import REPLAY_MODES, ResponseRecorder
+from pubmed_sqlite import ArticleDatabase
+from pubmed_stats import ArticleStatistics
+from pubmed_store import ArticleStore
+from pubmed_sync import SyncState, open_datasets, read_dataset_pmids
+from pubmed_writers import (
+    ArticleSink,
+    CSVSink,
+    JSONLinesSink,
+    make_sink,
+    read_json_lines,
+)
+
+# esearch cannot page beyond this many results for a single query
+ESEARCH_MAX_RESULTS = 9999
+
+# End of open date ranges when sharding, so that articles dated ahead of
+# print (publication date in the future) are still covered
+SHARD_OPEN_DATE_TO = "3000/12/31"
+
+# ID lists longer than this are sent in a POST body rather than the URL
+EUTILS_POST_MIN_IDS = 200
+
+# NCBI E-utilities endpoint
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 
 
 class AcademicArticleScraper:
@@ -25,22 +92,174 @@ class AcademicArticleScraper:
     A comprehensive academic article scraper using PubMed API
     """
 
-    def __init__(self, log_level: str = "INFO"):
+    # Compiled once and shared; replaced per instance by custom category rules
+    category_matcher = MeshCategoryMatcher(DEFAULT_CATEGORY_RULES)
+
+    # Tool name sent to NCBI, and list lengths kept in the records; presets
+    # built on this scraper override them
+    tool = "academic_article_scraper"
+    mesh_term_limit = MESH_TERM_LIMIT
+    affiliation_limit = AFFILIATION_LIMIT
+
+    # Log file, and whether log lines are also printed to stdout
+    log_file = "academic_scraper.log"
+    log_to_console = True
+
+    def __init__(
+        self,
+        log_level: str = "INFO",
+        api_key: str = None,
+        email: str = None,
+        max_concurrency: int = 3,
+        timeout: float = 60.0,
+        max_retries: int = 5,
+        stream_parse: bool = False,
+        cache_path: str = None,
+        cache_ttl_hours: float = 168.0,
+        refresh_cache: bool = False,
+        fields: List[str] = None,
+        keep_articles: bool = True,
+        category_rules: str = None,
+        parse_workers: int = 0,
+        http_cache_path: str = None,
+        http_cache_mode: str = "record",
+        base_url: str = EUTILS_BASE_URL,
+        shared_rate_limit_path: str = None,
+        batch_size: int = None,
+    ):
         """
         Initialize the scraper
 
         Args:
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
+            api_key: NCBI API key (raises the rate limit from 3 to 10 requests/second)
+            email: Contact email sent to NCBI with every request
+            max_concurrency: Maximum number of efetch requests in flight at once
+            timeout: Read timeout in seconds for each HTTP request
+            max_retries: Retries for transient HTTP failures (429, 5xx, timeouts)
+            stream_parse: Parse efetch responses incrementally while they download
+            cache_path: SQLite file caching parsed records by PMID (None disables it)
+            cache_ttl_hours: Age after which cached records are fetched again
+            refresh_cache: Refetch every record and overwrite the cached copies
+            fields: Record fields to extract and save (None for all, see ARTICLE_FIELDS)
+            keep_articles: Keep fetched records in self.articles; disable when
+                they are only written to sinks, to keep memory use flat
+            category_rules: JSON or YAML file of category -> MeSH keywords rules
+                (default: DEFAULT_CATEGORY_RULES)
+            parse_workers: Number of processes parsing efetch responses while
+                the next requests are in flight (0 parses in the fetching
+                threads; overrides stream_parse)
+            http_cache_path: SQLite file of recorded raw HTTP responses
+                (None disables recording and replay)
+            http_cache_mode: "record" (replay recorded responses, record the
+                others), "replay" (recorded responses only, fully offline) or
+                "passthrough" (ignore the recordings)
+            base_url: E-utilities endpoint, e.g. a local stand-in server
+            shared_rate_limit_path: SQLite file of a rate limit shared with
+                the other scraper processes on the host (None limits this
+                scraper on its own)
+            batch_size: Records per efetch request (None adapts the size to
+                the response times and sizes, see AdaptiveBatchSizer; jobs
+                with a checkpoint then keep batches of INITIAL_BATCH_SIZE)
         """
-        self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+        self.base_url = base_url.rstrip("/") + "/"
         self.esearch_url = f"{self.base_url}esearch.fcgi"
         self.efetch_url = f"{self.base_url}efetch.fcgi"
         self.esummary_url = f"{self.base_url}esummary.fcgi"
-        self.articles = []
+        self.articles = ArticleStore()
+        self.statistics = ArticleStatistics()
+        self.keep_articles = keep_articles
+        self.record_count = 0
+        self.failed_pmids = []
+        self.failed_windows = []
+        # Stage timers, histograms and counters of the whole scraper lifetime
+        self.metrics = MetricsRegistry()
+        # Whether the last search returned every matching ID without errors
+        self.search_complete = True
+        self.stream_parse = stream_parse
+        self.batch_size = batch_size or INITIAL_BATCH_SIZE
+        self.batch_sizer = AdaptiveBatchSizer() if batch_size is None else None
+        if category_rules:
+            self.category_matcher = MeshCategoryMatcher.from_file(category_rules)
+        self.fields = normalize_fields(fields)
+        # Field list passed to the record cache (None when nothing is left out)
+        self.cache_fields = (
+            self.fields if len(self.fields) < len(ARTICLE_FIELDS) else None
+        )
+        # Decoder settings shaping the records, so cached records decoded
+        # with other list limits or category rules are fetched again
+        self.cache_profile = (
+            f"decoder={DECODER_VERSION};"
+            f"mesh_terms={self.mesh_term_limit};"
+            f"affiliations={self.affiliation_limit};"
+            f"categories={self.category_matcher.digest()}"
+        )
+        self.decoder = PubmedArticleDecoder(
+            self._infer_category_from_mesh,
+            self.fields,
+            self.mesh_term_limit,
+            self.affiliation_limit,
+        )
+        self.parse_pool = None
+        if parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=parse_workers,
+                initializer=init_parse_worker,
+                initargs=(
+                    self.category_matcher,
+                    self.fields,
+                    self.mesh_term_limit,
+                    self.affiliation_limit,
+                ),
+            )
+        self.record_cache = (
+            RecordCache(cache_path, cache_ttl_hours) if cache_path else None
+        )
+        self.refresh_cache = refresh_cache
+
+        # NCBI identification and rate limiting
+        self.api_key = api_key or os.environ.get("NCBI_API_KEY")
+        self.email = email or os.environ.get("NCBI_EMAIL")
+        self.max_concurrency = max(1, max_concurrency)
 
         # Setup logging
         self.setup_logging(log_level)
 
+        rate = NCBI_RATE_LIMIT_WITH_KEY if self.api_key else NCBI_RATE_LIMIT
+        self.rate_limiter = None
+        if shared_rate_limit_path:
+            try:
+                self.rate_limiter = SharedRateLimiter(
+                    rate, shared_rate_limit_path, rate_limit_bucket(self.api_key)
+                )
+            except sqlite3.Error as e:
+                self.logger.warning(
+                    f"Cannot share the rate limit through {shared_rate_limit_path} "
+                    f"({e}), limiting this process on its own"
+                )
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimiter(rate)
+
+        # Raw responses recorded for offline, deterministic reruns
+        self.http_cache = (
+            ResponseRecorder(http_cache_path, http_cache_mode)
+            if http_cache_path
+            else None
+        )
+
+        # Shared HTTP client: one pooled keep-alive session for all requests
+        self.client = PubMedClient(
+            self.rate_limiter,
+            params={"tool": self.tool, "email": self.email, "api_key": self.api_key},
+            timeout=(10, timeout),
+            max_retries=max_retries,
+            pool_size=self.max_concurrency,
+            logger=self.logger,
+            recorder=self.http_cache,
+            metrics=self.metrics,
+        )
+        self.metrics.add_collector(self._collect_metrics)
+
         # Common journal mappings
         self.journal_mappings = {
             "pnas": "Proc Natl Acad Sci U S A",
@@ -71,17 +290,17 @@ class AcademicArticleScraper:
 
     def setup_logging(self, log_level: str):
         """Setup logging configuration"""
+        handlers = [logging.FileHandler(self.log_file)]
+        if self.log_to_console:
+            handlers.insert(0, logging.StreamHandler(sys.stdout))
         logging.basicConfig(
             level=getattr(logging, log_level.upper()),
             format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.StreamHandler(sys.stdout),
-                logging.FileHandler("academic_scraper.log"),
-            ],
+            handlers=handlers,
         )
         self.logger = logging.getLogger(__name__)
 
-    def search_articles(
+    def build_search_query(
         self,
         affiliations: Union[str, List[str]] = None,
         journals: Union[str, List[str]] = None,
@@ -89,11 +308,9 @@ class AcademicArticleScraper:
         keywords: Union[str, List[str]] = None,
         date_from: str = None,
         date_to: str = None,
-        max_results: int = 1000,
-        sort_by: str = "date",
-    ) -> List[str]:
+    ) -> str:
         """
-        Search for articles with flexible parameters
+        Build a PubMed query string from search parameters
 
         Args:
             affiliations: Institution name(s) to search for
@@ -102,11 +319,12 @@ class AcademicArticleScraper:
             keywords: Keywords to search for
             date_from: Start date (YYYY/MM/DD format)
             date_to: End date (YYYY/MM/DD format)
-            max_results: Maximum number of results
-            sort_by: Sort order (date, relevance, author, journal)
 
         Returns:
-            List of article IDs
+            PubMed query string
+
+        Raises:
+            ValueError: If no search parameter is given
         """
         search_terms = []
 
@@ -156,84 +374,955 @@ class AcademicArticleScraper:
             raise ValueError("At least one search parameter must be provided")
 
         # Combine all search terms
-        search_query = " AND ".join(search_terms)
+        return " AND ".join(search_terms)
+
+    def search_articles(
+        self,
+        affiliations: Union[str, List[str]] = None,
+        journals: Union[str, List[str]] = None,
+        authors: Union[str, List[str]] = None,
+        keywords: Union[str, List[str]] = None,
+        date_from: str = None,
+        date_to: str = None,
+        max_results: int = 1000,
+        sort_by: str = "date",
+        entry_date_from: str = None,
+        entry_date_to: str = None,
+    ) -> List[str]:
+        """
+        Search for articles with flexible parameters
+
+        Sets search_complete to whether every matching ID was returned.
+
+        Args:
+            affiliations: Institution name(s) to search for
+            journals: Journal name(s) to search in
+            authors: Author name(s) to search for
+            keywords: Keywords to search for
+            date_from: Start date (YYYY/MM/DD format)
+            date_to: End date (YYYY/MM/DD format)
+            max_results: Maximum number of results
+            sort_by: Sort order (date, relevance, author, journal)
+            entry_date_from: Only articles added to PubMed on or after this
+                Entrez date (YYYY/MM/DD format)
+            entry_date_to: Only articles added to PubMed on or before this
+                Entrez date (YYYY/MM/DD format)
+
+        Returns:
+            List of article IDs
+        """
+        search_query = self.build_search_query(
+            affiliations, journals, authors, keywords, date_from, date_to
+        )
+        date_params = self._entry_date_params(entry_date_from, entry_date_to)
 
         self.logger.info(f"Search query: {search_query}")
+        if date_params:
+            self.logger.info(
+                f"Entry date window: {date_params['mindate']} - {date_params['maxdate']}"
+            )
+        self.search_complete = False
+
+        try:
+            id_list, total_count = self._esearch_ids(
+                search_query, max_results, sort_by, date_params
+            )
+            self.search_complete = total_count <= len(id_list)
 
+            self.logger.info(
+                f"Found {total_count} articles, retrieving details for the first {len(id_list)} articles"
+            )
+            if total_count > len(id_list) and len(id_list) >= ESEARCH_MAX_RESULTS:
+                self.logger.warning(
+                    f"esearch returns at most {ESEARCH_MAX_RESULTS} IDs per query; "
+                    f"use date sharding to retrieve all {total_count} results"
+                )
+
+            return id_list
+
+        except requests.RequestException as e:
+            self.logger.error(f"Search request error: {e}")
+            return []
+        except ET.ParseError as e:
+            self.logger.error(f"XML parsing error: {e}")
+            return []
+
+    @staticmethod
+    def _entry_date_params(
+        entry_date_from: str = None, entry_date_to: str = None
+    ) -> Dict[str, str]:
+        """esearch parameters restricting a search to an Entrez date (EDAT) range"""
+        if not (entry_date_from or entry_date_to):
+            return {}
+        return {
+            "datetype": "edat",
+            "mindate": entry_date_from or "1900/01/01",
+            "maxdate": entry_date_to or datetime.now().strftime("%Y/%m/%d"),
+        }
+
+    def _esearch_ids(
+        self,
+        search_query: str,
+        max_results: int,
+        sort_by: str = "date",
+        date_params: Dict[str, str] = None,
+    ) -> Tuple[List[str], int]:
+        """
+        Run one esearch request
+
+        Returns:
+            Tuple of (article IDs, total number of matching articles)
+        """
         params = {
             "db": "pubmed",
             "term": search_query,
             "retmax": max_results,
             "retmode": "xml",
             "sort": sort_by,
+            **(date_params or {}),
         }
 
-        try:
-            response = requests.get(self.esearch_url, params=params)
-            response.raise_for_status()
+        with self.metrics.time("search"):
+            response = self.client.get(self.esearch_url, params=params)
 
             # Parse XML response
             root = ET.fromstring(response.content)
 
-            # Get article ID list
+        # Get article ID list
+        id_list = []
+        for id_elem in root.findall(".//Id"):
+            id_list.append(id_elem.text)
+
+        count = root.find(".//Count")
+        total_count = int(count.text) if count is not None else 0
+
+        return id_list, total_count
+
+    def count_results(
+        self, search_query: str, date_params: Dict[str, str] = None
+    ) -> int:
+        """Return the number of articles matching a query (esearch rettype=count)"""
+        params = {
+            "db": "pubmed",
+            "term": search_query,
+            "rettype": "count",
+            "retmode": "xml",
+            **(date_params or {}),
+        }
+        with self.metrics.time("search"):
+            response = self.client.get(self.esearch_url, params=params)
+            return int(ET.fromstring(response.content).findtext("Count") or 0)
+
+    def search_history(
+        self,
+        affiliations: Union[str, List[str]] = None,
+        journals: Union[str, List[str]] = None,
+        authors: Union[str, List[str]] = None,
+        keywords: Union[str, List[str]] = None,
+        date_from: str = None,
+        date_to: str = None,
+        sort_by: str = "date",
+    ) -> Optional[Dict]:
+        """
+        Run a search once and keep its results on the E-utilities history server
+
+        No ID list is transferred; the returned WebEnv/query_key pair lets
+        fetch_history_details page through any number of results.
+
+        Args:
+            affiliations: Institution name(s) to search for
+            journals: Journal name(s) to search in
+            authors: Author name(s) to search for
+            keywords: Keywords to search for
+            date_from: Start date (YYYY/MM/DD format)
+            date_to: End date (YYYY/MM/DD format)
+            sort_by: Sort order (date, relevance, author, journal)
+
+        Returns:
+            Dict with webenv, query_key, count and query, or None on error
+        """
+        search_query = self.build_search_query(
+            affiliations, journals, authors, keywords, date_from, date_to
+        )
+
+        self.logger.info(f"Search query (history server): {search_query}")
+
+        params = {
+            "db": "pubmed",
+            "term": search_query,
+            "retmax": 0,
+            "retmode": "xml",
+            "sort": sort_by,
+            "usehistory": "y",
+        }
+
+        try:
+            with self.metrics.time("search"):
+                response = self.client.get(self.esearch_url, params=params)
+                root = ET.fromstring(response.content)
+
+            webenv = root.findtext("WebEnv")
+            query_key = root.findtext("QueryKey")
+            if not webenv or not query_key:
+                self.logger.error("Search response did not include a WebEnv/QueryKey")
+                return None
+
+            history = {
+                "webenv": webenv,
+                "query_key": query_key,
+                "count": int(root.findtext("Count") or 0),
+                "query": search_query,
+            }
+            self.logger.info(
+                f"Found {history['count']} articles, stored on the history server"
+            )
+            return history
+
+        except requests.RequestException as e:
+            self.logger.error(f"Search request error: {e}")
+            return None
+        except ET.ParseError as e:
+            self.logger.error(f"XML parsing error: {e}")
+            return None
+
+    def plan_date_shards(
+        self,
+        affiliations: Union[str, List[str]] = None,
+        journals: Union[str, List[str]] = None,
+        authors: Union[str, List[str]] = None,
+        keywords: Union[str, List[str]] = None,
+        date_from: str = None,
+        date_to: str = None,
+        entry_date_from: str = None,
+        entry_date_to: str = None,
+    ) -> List[Tuple[str, str, int]]:
+        """
+        Split a publication date range until every shard fits in one esearch
+
+        Each range is probed with a count-only esearch; ranges holding more
+        than ESEARCH_MAX_RESULTS articles are halved and probed again. The
+        probes of one level run concurrently under the shared rate limit.
+
+        Args:
+            affiliations: Institution name(s) to search for
+            journals: Journal name(s) to search in
+            authors: Author name(s) to search for
+            keywords: Keywords to search for
+            date_from: Start date (YYYY/MM/DD format, default 1900/01/01)
+            date_to: End date (YYYY/MM/DD format, default SHARD_OPEN_DATE_TO)
+            entry_date_from: Earliest Entrez date (YYYY/MM/DD format)
+            entry_date_to: Latest Entrez date (YYYY/MM/DD format)
+
+        Returns:
+            Chronological list of (date_from, date_to, count) shards
+        """
+        date_params = self._entry_date_params(entry_date_from, entry_date_to)
+        start = datetime.strptime(date_from or "1900/01/01", "%Y/%m/%d")
+        end = datetime.strptime(date_to or SHARD_OPEN_DATE_TO, "%Y/%m/%d")
+
+        def count_range(date_range):
+            low, high = date_range
+            return self.count_results(
+                self.build_search_query(
+                    affiliations,
+                    journals,
+                    authors,
+                    keywords,
+                    low.strftime("%Y/%m/%d"),
+                    high.strftime("%Y/%m/%d"),
+                ),
+                date_params,
+            )
+
+        shards = []
+        frontier = [(start, end)]
+        while frontier:
+            next_frontier = []
+            for (low, high), count in self._map_in_order(count_range, frontier):
+                if not count:
+                    continue
+                if count <= ESEARCH_MAX_RESULTS or low >= high:
+                    if count > ESEARCH_MAX_RESULTS:
+                        self.logger.warning(
+                            f"{count} articles on {low:%Y/%m/%d} exceed a single "
+                            f"esearch; only {ESEARCH_MAX_RESULTS} will be retrieved"
+                        )
+                    shards.append((low, high, count))
+                else:
+                    middle = low + (high - low) / 2
+                    middle = middle.replace(hour=0, minute=0, second=0, microsecond=0)
+                    next_frontier.append((low, middle))
+                    next_frontier.append((middle + timedelta(days=1), high))
+            frontier = next_frontier
+
+        shards.sort()
+        return [
+            (low.strftime("%Y/%m/%d"), high.strftime("%Y/%m/%d"), count)
+            for low, high, count in shards
+        ]
+
+    def search_articles_sharded(
+        self,
+        affiliations: Union[str, List[str]] = None,
+        journals: Union[str, List[str]] = None,
+        authors: Union[str, List[str]] = None,
+        keywords: Union[str, List[str]] = None,
+        date_from: str = None,
+        date_to: str = None,
+        max_results: int = None,
+        sort_by: str = "date",
+        entry_date_from: str = None,
+        entry_date_to: str = None,
+    ) -> List[str]:
+        """
+        Search a large result set by splitting it into publication date shards
+
+        Shards are planned with plan_date_shards, searched in parallel under
+        the shared rate limit, and merged with duplicate PMIDs removed. Sets
+        search_complete to whether every matching ID was returned.
+
+        Args:
+            affiliations: Institution name(s) to search for
+            journals: Journal name(s) to search in
+            authors: Author name(s) to search for
+            keywords: Keywords to search for
+            date_from: Start date (YYYY/MM/DD format)
+            date_to: End date (YYYY/MM/DD format)
+            max_results: Maximum number of results (None for all)
+            sort_by: Sort order within each shard
+            entry_date_from: Earliest Entrez date (YYYY/MM/DD format)
+            entry_date_to: Latest Entrez date (YYYY/MM/DD format)
+
+        Returns:
+            List of unique article IDs
+        """
+        date_params = self._entry_date_params(entry_date_from, entry_date_to)
+        query_params = {
+            "affiliations": affiliations,
+            "journals": journals,
+            "authors": authors,
+            "keywords": keywords,
+        }
+        self.logger.info(
+            f"Search query (sharded): {self.build_search_query(**query_params)}"
+        )
+        if date_params:
+            self.logger.info(
+                f"Entry date window: {date_params['mindate']} - {date_params['maxdate']}"
+            )
+        self.search_complete = False
+
+        try:
+            shards = self.plan_date_shards(
+                **query_params,
+                date_from=date_from,
+                date_to=date_to,
+                entry_date_from=entry_date_from,
+                entry_date_to=entry_date_to,
+            )
+            self.logger.info(
+                f"Planned {len(shards)} date shards covering "
+                f"{sum(count for _, _, count in shards)} articles"
+            )
+
+            # Newest shards first when results are sorted by date
+            if sort_by == "date":
+                shards.reverse()
+
+            def search_shard(shard):
+                low, high, count = shard
+                search_query = self.build_search_query(
+                    **query_params, date_from=low, date_to=high
+                )
+                id_list, _ = self._esearch_ids(
+                    search_query, min(count, ESEARCH_MAX_RESULTS), sort_by, date_params
+                )
+                return id_list
+
             id_list = []
-            for id_elem in root.findall(".//Id"):
-                id_list.append(id_elem.text)
+            seen = set()
+            for _, shard_ids in self._map_in_order(search_shard, shards):
+                for pmid in shard_ids:
+                    if pmid not in seen:
+                        seen.add(pmid)
+                        id_list.append(pmid)
+
+            self.search_complete = all(
+                count <= ESEARCH_MAX_RESULTS for _, _, count in shards
+            )
+            if max_results and len(id_list) > max_results:
+                id_list = id_list[:max_results]
+                self.search_complete = False
+
+            self.logger.info(
+                f"Found {len(seen)} unique articles in {len(shards)} shards, "
+                f"retrieving details for {len(id_list)} articles"
+            )
+            return id_list
+
+        except requests.RequestException as e:
+            self.logger.error(f"Search request error: {e}")
+            return []
+        except ET.ParseError as e:
+            self.logger.error(f"XML parsing error: {e}")
+            return []
+
+    def fetch_article_details(
+        self,
+        pmid_list: List[str],
+        sinks: List[ArticleSink] = None,
+        checkpoint: HarvestCheckpoint = None,
+    ) -> ArticleStore:
+        """
+        Retrieve detailed information for articles
+
+        Args:
+            pmid_list: List of PubMed IDs
+            sinks: Outputs each batch is written to as soon as it arrives
+            checkpoint: Job manifest; completed batches are skipped and each
+                newly written batch is recorded in it
+
+        Returns:
+            Store of detailed article information
+        """
+        if not pmid_list:
+            return ArticleStore()
+
+        self.logger.info(
+            f"Retrieving detailed information for {len(pmid_list)} articles..."
+        )
+
+        if checkpoint is None and self.batch_sizer is not None:
+            return self._collect_batches(
+                self._fetch_batches_concurrently(
+                    self._adaptive_slices(len(pmid_list), pmid_list.__getitem__)
+                ),
+                None,
+                sinks=sinks,
+            )
+
+        # Batch boundaries must stay the same for a checkpoint to be resumed
+        batch_size = self.batch_size
+        batches = [
+            pmid_list[i : i + batch_size] for i in range(0, len(pmid_list), batch_size)
+        ]
+
+        pending = self._pending_batches(checkpoint, len(batches))
+        return self._collect_batches(
+            self._fetch_batches_concurrently(batches[i] for i in pending),
+            len(batches),
+            sinks=sinks,
+            checkpoint=checkpoint,
+            batch_indices=pending,
+            batch_failed=lambda i: self._pmids_failed(batches[i]),
+        )
+
+    def fetch_history_details(
+        self,
+        history: Dict,
+        max_results: int = None,
+        sinks: List[ArticleSink] = None,
+        checkpoint: HarvestCheckpoint = None,
+    ) -> ArticleStore:
+        """
+        Retrieve detailed information for a search kept on the history server
+
+        Records are paged with retstart/retmax windows of constant size
+        directly from the WebEnv/query_key, so no PMID list is sent.
+
+        Args:
+            history: Result of search_history
+            max_results: Maximum number of records to retrieve (None for all)
+            sinks: Outputs each batch is written to as soon as it arrives
+            checkpoint: Job manifest; completed windows are skipped and each
+                newly written window is recorded in it
+
+        Returns:
+            Store of detailed article information
+        """
+        total = history["count"]
+        if max_results:
+            total = min(total, max_results)
+        if not total:
+            return ArticleStore()
+
+        self.logger.info(
+            f"Retrieving detailed information for {total} articles from the history server..."
+        )
+
+        if checkpoint is None and self.batch_sizer is not None:
+            return self._collect_batches(
+                self._fetch_windows_concurrently(
+                    self._adaptive_slices(
+                        total,
+                        lambda window: (
+                            history,
+                            window.start,
+                            window.stop - window.start,
+                        ),
+                    )
+                ),
+                None,
+                sinks=sinks,
+            )
+
+        batch_size = self.batch_size
+        windows = [
+            (history, retstart, min(batch_size, total - retstart))
+            for retstart in range(0, total, batch_size)
+        ]
+
+        pending = self._pending_batches(checkpoint, len(windows))
+        return self._collect_batches(
+            self._fetch_windows_concurrently(windows[i] for i in pending),
+            len(windows),
+            sinks=sinks,
+            checkpoint=checkpoint,
+            batch_indices=pending,
+            batch_failed=lambda i: windows[i][1:] in self.failed_windows,
+        )
+
+    def fetch_article_summaries(
+        self,
+        pmid_list: List[str],
+        sinks: List[ArticleSink] = None,
+        checkpoint: HarvestCheckpoint = None,
+    ) -> ArticleStore:
+        """
+        Retrieve lightweight article information via esummary
+
+        Much smaller than efetch abstracts: title, journal, date, authors,
+        DOI and publication types are filled in, while abstract, MeSH terms,
+        category and affiliations are left empty. The record cache is not
+        used, since it holds full records.
+
+        Args:
+            pmid_list: List of PubMed IDs
+            sinks: Outputs each batch is written to as soon as it arrives
+            checkpoint: Job manifest; completed batches are skipped and each
+                newly written batch is recorded in it
+
+        Returns:
+            Store of article summaries
+        """
+        if not pmid_list:
+            return ArticleStore()
+
+        self.logger.info(f"Retrieving summaries for {len(pmid_list)} articles...")
+
+        # esummary accepts far larger batches than efetch abstracts
+        batch_size = 500
+        batches = [
+            pmid_list[i : i + batch_size] for i in range(0, len(pmid_list), batch_size)
+        ]
+        pending = self._pending_batches(checkpoint, len(batches))
+        batch_results = (
+            summaries
+            for _, summaries in self._map_in_order(
+                self._fetch_batch_summaries, (batches[i] for i in pending)
+            )
+        )
+
+        return self._collect_batches(
+            batch_results,
+            len(batches),
+            "esummary",
+            sinks=sinks,
+            checkpoint=checkpoint,
+            batch_indices=pending,
+            batch_failed=lambda i: self._pmids_failed(batches[i]),
+        )
+
+    def _adaptive_slices(self, total: int, take: Callable[[slice], Any]) -> Iterator:
+        """
+        Split a job into batches sized by the adaptive batch sizer
+
+        Batches are planned lazily, as the fetching loop draws them, so each
+        one uses the size learnt from the responses received until then.
+
+        Args:
+            total: Number of records in the job
+            take: Returns the batch for a slice of the records
+
+        Yields:
+            Batches in order
+        """
+        start = 0
+        while start < total:
+            stop = min(total, start + self.batch_sizer.size)
+            yield take(slice(start, stop))
+            start = stop
+
+    def _eutils_request(
+        self, url: str, params: Dict, stream: bool = False
+    ) -> requests.Response:
+        """Send a GET request, or a POST one when the ID list is long"""
+        ids = params.get("id")
+        if ids and ids.count(",") + 1 > EUTILS_POST_MIN_IDS:
+            return self.client.request("POST", url, data=params, stream=stream)
+        return self.client.get(url, params=params, stream=stream)
+
+    def _observe_batch(self, requested: int, response: requests.Response, nbytes: int):
+        """
+        Report a fully received efetch response to the metrics and the batch sizer
+
+        The response time is counted from when the request was sent, so that
+        rate limit waits and retry delays do not shrink the batches.
+        """
+        self.metrics.observe("efetch_batch_size", requested)
+        # Replayed responses say nothing about the server
+        if self.batch_sizer is not None and not getattr(response, "replayed", False):
+            seconds = time.perf_counter() - response.sent_at
+            self.batch_sizer.observe(requested, seconds, nbytes)
+
+    def _fetch_batch_summaries(self, pmid_list: List[str]) -> List[Dict]:
+        """Retrieve esummary documents for a batch of articles"""
+        params = {
+            "db": "pubmed",
+            "id": ",".join(pmid_list),
+            "retmode": "json",
+            "version": "2.0",
+        }
+
+        try:
+            response = self._eutils_request(self.esummary_url, params)
+            with self.metrics.time("parse"):
+                result = response.json().get("result", {})
+
+                summaries = []
+                for pmid in result.get("uids", []):
+                    doc = result.get(pmid)
+                    if doc and "error" not in doc:
+                        summaries.append(
+                            project_record(decode_esummary_document(doc), self.fields)
+                        )
+
+            # Keep the records in the order the PMIDs were requested
+            order = {pmid: i for i, pmid in enumerate(pmid_list)}
+            summaries.sort(key=lambda a: order.get(a.get("pmid"), len(order)))
+            return summaries
+
+        except Exception as e:
+            self.logger.error(
+                f"Error retrieving summaries for {len(pmid_list)} articles: {e}"
+            )
+            self.failed_pmids.extend(pmid_list)
+            return []
+
+    def fetch_job(
+        self,
+        job: Dict,
+        sinks: List[ArticleSink] = None,
+        checkpoint: HarvestCheckpoint = None,
+    ) -> ArticleStore:
+        """
+        Retrieve the records of a job description
+
+        Args:
+            job: Job as stored in a checkpoint manifest: "source" is "pmids"
+                (with a "pmids" list) or "history" (with the search_history
+                result and "max_results"); "mode" is "efetch" or "esummary"
+            sinks: Outputs each batch is written to as soon as it arrives
+            checkpoint: Job manifest recording the completed batches
+
+        Returns:
+            Store of article information
+        """
+        if job["source"] == "history":
+            return self.fetch_history_details(
+                job["history"],
+                max_results=job.get("max_results"),
+                sinks=sinks,
+                checkpoint=checkpoint,
+            )
+        if job["mode"] == "esummary":
+            return self.fetch_article_summaries(
+                job["pmids"], sinks=sinks, checkpoint=checkpoint
+            )
+        return self.fetch_article_details(
+            job["pmids"], sinks=sinks, checkpoint=checkpoint
+        )
+
+    def compare_fetch_modes(self, pmid_list: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch the same articles via efetch and esummary and compare the cost
+
+        The record cache is bypassed so that both modes hit the network.
+
+        Args:
+            pmid_list: Sample of PubMed IDs
+
+        Returns:
+            Dict mapping mode name to records, bytes and seconds
+        """
+        results = {}
+        for mode, fetch, batch_size in (
+            ("efetch", self._fetch_batch_abstracts, 100),
+            ("esummary", self._fetch_batch_summaries, 500),
+        ):
+            batches = [
+                pmid_list[i : i + batch_size]
+                for i in range(0, len(pmid_list), batch_size)
+            ]
+            bytes_before = self.client.stats["bytes_received"]
+            start = time.perf_counter()
+            records = sum(
+                len(self._resolve_parsed(batch, "comparison batch") or [])
+                for _, batch in self._map_in_order(fetch, batches)
+            )
+            results[mode] = {
+                "records": records,
+                "bytes": self.client.stats["bytes_received"] - bytes_before,
+                "seconds": time.perf_counter() - start,
+            }
+
+        return results
+
+    def _collect_batches(
+        self,
+        batch_results: Iterable[List[Dict]],
+        total_batches: Optional[int],
+        mode: str = "efetch",
+        sinks: List[ArticleSink] = None,
+        checkpoint: HarvestCheckpoint = None,
+        batch_indices: List[int] = None,
+        batch_failed: Callable[[int], bool] = None,
+    ) -> ArticleStore:
+        """
+        Gather fetched batches into self.articles and report on the run
+
+        Each batch is handed to the sinks as soon as it arrives; the records
+        are only kept in memory when keep_articles is set. With a checkpoint,
+        every batch that was retrieved without failures is recorded in it
+        once written, so that a resumed run skips it; a batch with failures
+        is not written at all, as the resumed run writes it in full.
+
+        Args:
+            batch_results: Parsed articles of each batch, in order
+            total_batches: Number of batches in the whole job (None when
+                they are planned while fetching; no checkpoint then)
+            mode: Fetch mode name for the log
+            sinks: Outputs each batch is written to
+            checkpoint: Job manifest recording the completed batches
+            batch_indices: Job batch index of each result (default: 0, 1, ...)
+            batch_failed: Tells whether a batch index had retrieval failures
+        """
+        self.failed_pmids = []
+        self.failed_windows = []
+        self.record_count = 0
+        self.statistics = ArticleStatistics()
+        all_articles = ArticleStore()
+        bytes_before = self.client.stats["bytes_received"]
+        start = time.perf_counter()
+
+        if total_batches is None:
+            batch_indices = count()
+        elif batch_indices is None:
+            batch_indices = range(total_batches)
+        elif len(batch_indices) < total_batches:
+            self.logger.info(
+                f"Resuming: {total_batches - len(batch_indices)} of "
+                f"{total_batches} batches already completed"
+            )
+
+        for batch_index, batch_articles in zip(batch_indices, batch_results):
+            if (
+                checkpoint is not None
+                and batch_failed is not None
+                and batch_failed(batch_index)
+            ):
+                # A resumed run fetches the whole batch again, cached records
+                # included, so none of it is written now
+                self.logger.warning(
+                    f"Batch {batch_index + 1}/{total_batches} was not fully "
+                    f"retrieved; it is left for --resume"
+                )
+                continue
+            of_total = f"/{total_batches}" if total_batches is not None else ""
+            self.logger.info(
+                f"Processed batch {batch_index + 1}{of_total}, "
+                f"containing {len(batch_articles)} articles"
+            )
+            with self.metrics.time("write"):
+                for sink in sinks or ():
+                    sink.write_batch(batch_articles)
+            self.metrics.observe("batch_size", len(batch_articles))
+            self.metrics.increment("records_total", len(batch_articles))
+            if checkpoint is not None:
+                checkpoint.batch_done(batch_index, sinks or [])
+            self.record_count += len(batch_articles)
+            self.statistics.update(batch_articles)
+            if self.keep_articles:
+                all_articles.extend(batch_articles)
+
+        elapsed = time.perf_counter() - start
+        transferred = self.client.stats["bytes_received"] - bytes_before
+        self.logger.info(
+            f"{mode}: {self.record_count} records, {transferred / 1024:.1f} KiB "
+            f"in {elapsed:.1f}s ({transferred / max(1, self.record_count):.0f} bytes/record)"
+        )
+
+        failed = len(self.failed_pmids) + sum(n for _, n in self.failed_windows)
+        if failed:
+            self.logger.warning(f"Failed to retrieve {failed} articles after retries")
+        if self.record_cache is not None:
+            self.logger.info(f"Record cache: {self.record_cache.summary()}")
+        if self.keep_articles:
+            self.logger.info(f"Article store: {all_articles.summary()}")
+        if self.batch_sizer is not None and self.batch_sizer.stats["observed"]:
+            self.logger.info(f"Adaptive batch size: {self.batch_sizer.summary()}")
+        self.logger.info(f"HTTP traffic: {self.client.summary()}")
+
+        if checkpoint is not None:
+            checkpoint.finish()
+
+        self.articles = all_articles
+        return all_articles
+
+    def _pending_batches(
+        self, checkpoint: Optional[HarvestCheckpoint], total_batches: int
+    ) -> List[int]:
+        """Indices of the batches a job still has to fetch"""
+        if checkpoint is None:
+            return list(range(total_batches))
+        return checkpoint.begin(total_batches)
+
+    def _pmids_failed(self, pmid_list: List[str]) -> bool:
+        """Tell whether any of the PMIDs could not be retrieved in this run"""
+        return bool(self.failed_pmids) and not set(self.failed_pmids).isdisjoint(
+            pmid_list
+        )
+
+    def _map_in_order(self, func: Callable, items: Iterable) -> Iterator[Tuple]:
+        """
+        Run func over items on the worker pool, several requests at a time
+
+        Items are drawn lazily in the calling thread and only a bounded window
+        of them is in flight; the shared rate limiter paces the requests.
+
+        Args:
+            func: Function applied to each item in a worker thread
+            items: Iterable of work items
+
+        Yields:
+            (item, result) pairs in the same order as the items
+        """
+        item_iter = iter(items)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = deque(
+                (item, executor.submit(func, item))
+                for item in islice(item_iter, self.max_concurrency * 2)
+            )
+            while pending:
+                item, future = pending.popleft()
+                result = future.result()
+                for next_item in islice(item_iter, 1):
+                    pending.append((next_item, executor.submit(func, next_item)))
+                yield item, result
+
+    def _fetch_batches_concurrently(
+        self, batches: Iterable[List[str]]
+    ) -> Iterator[List[Dict]]:
+        """
+        Fetch batches with several efetch requests in flight at once
+
+        Records found fresh in the record cache are served from it; only the
+        missing or stale PMIDs of a batch are sent to efetch.
 
-            count = root.find(".//Count")
-            total_count = int(count.text) if count is not None else 0
+        Args:
+            batches: Iterable of PMID lists, one per efetch request
 
-            self.logger.info(
-                f"Found {total_count} articles, retrieving details for the first {len(id_list)} articles"
+        Yields:
+            Parsed articles of each batch, in PMID order
+        """
+        # Cache lookups run here, in the calling thread
+        prepared = ((batch, *self._lookup_cached_records(batch)) for batch in batches)
+
+        def fetch_missing(item):
+            batch, _, missing = item
+            if not missing:
+                return []
+            return self._fetch_batch_abstracts(
+                [pmid for pmid in batch if pmid in missing]
             )
 
-            return id_list
+        for (batch, cached, missing), fetched in self._map_in_order(
+            fetch_missing, prepared
+        ):
+            fetched = self._resolve_parsed(fetched, f"{len(missing)} articles")
+            if fetched is None:
+                self.failed_pmids.extend(pmid for pmid in batch if pmid in missing)
+                fetched = []
+            if fetched and self.record_cache is not None:
+                self.record_cache.store(fetched, self.cache_fields, self.cache_profile)
+
+            # Keep the records in the order the PMIDs were requested
+            records = {
+                pmid: project_record(record, self.fields)
+                for pmid, record in cached.items()
+            }
+            records.update((article.get("pmid"), article) for article in fetched)
+            yield [records[pmid] for pmid in batch if pmid in records]
+
+    def _fetch_windows_concurrently(
+        self, windows: Iterable[Tuple]
+    ) -> Iterator[List[Dict]]:
+        """
+        Fetch history server windows with several requests in flight at once
 
-        except requests.RequestException as e:
-            self.logger.error(f"Search request error: {e}")
-            return []
-        except ET.ParseError as e:
-            self.logger.error(f"XML parsing error: {e}")
-            return []
+        Args:
+            windows: Iterable of (history, retstart, retmax) tuples
 
-    def fetch_article_details(self, pmid_list: List[str]) -> List[Dict]:
+        Yields:
+            Parsed articles of each window, in result order
         """
-        Retrieve detailed information for articles
+        for window, fetched in self._map_in_order(self._fetch_history_window, windows):
+            _, retstart, retmax = window
+            fetched = self._resolve_parsed(
+                fetched, f"records {retstart + 1}-{retstart + retmax}"
+            )
+            if fetched is None:
+                self.failed_windows.append((retstart, retmax))
+                fetched = []
+            if fetched and self.record_cache is not None:
+                self.record_cache.store(fetched, self.cache_fields, self.cache_profile)
+            yield fetched
+
+    def _resolve_parsed(
+        self, fetched: Union[List[Dict], Future], description: str
+    ) -> Optional[List[Dict]]:
+        """
+        Wait for a response handed to the parser processes
 
         Args:
-            pmid_list: List of PubMed IDs
+            fetched: Parsed articles, or a parse_efetch_payload future
+            description: What was fetched, for error messages
 
         Returns:
-            List of detailed article information
+            Parsed articles, or None if the response could not be parsed
         """
-        if not pmid_list:
-            return []
-
-        self.logger.info(
-            f"Retrieving detailed information for {len(pmid_list)} articles..."
-        )
+        if not isinstance(fetched, Future):
+            return fetched
 
-        # PubMed API recommends retrieving at most 200 articles at once
-        batch_size = 100
-        all_articles = []
-
-        for i in range(0, len(pmid_list), batch_size):
-            batch_ids = pmid_list[i : i + batch_size]
-            self.logger.info(
-                f"Processing batch {i // batch_size + 1}, containing {len(batch_ids)} articles"
-            )
-
-            # Get abstract information
-            batch_articles = self._fetch_batch_abstracts(batch_ids)
-            all_articles.extend(batch_articles)
+        try:
+            articles, errors = fetched.result()
+        except Exception as e:
+            self.logger.error(f"Error parsing details for {description}: {e}")
+            return None
 
-            # Add delay to comply with NCBI usage restrictions
-            time.sleep(1)
+        for error in errors:
+            self.logger.error(error)
+        return articles
 
-        self.articles = all_articles
-        return all_articles
+    def _lookup_cached_records(self, pmid_list: List[str]):
+        """Split a batch into fresh cached records and PMIDs that must be fetched"""
+        if self.record_cache is None or self.refresh_cache:
+            return {}, set(pmid_list)
+        return self.record_cache.lookup(
+            pmid_list, self.cache_fields, self.cache_profile
+        )
 
-    def _fetch_batch_abstracts(self, pmid_list: List[str]) -> List[Dict]:
+    def _fetch_batch_abstracts(self, pmid_list: List[str]) -> Union[List[Dict], Future]:
         """Retrieve abstract information for a batch of articles"""
         params = {
             "db": "pubmed",
@@ -242,155 +1331,122 @@ class AcademicArticleScraper:
             "rettype": "abstract",
         }
 
+        articles = self._efetch_articles(
+            params, f"{len(pmid_list)} articles", len(pmid_list)
+        )
+        if articles is None:
+            self.failed_pmids.extend(pmid_list)
+            return []
+        return articles
+
+    def _fetch_history_window(self, window: Tuple) -> Union[List[Dict], Future]:
+        """Retrieve one retstart/retmax window of a history server search"""
+        history, retstart, retmax = window
+        params = {
+            "db": "pubmed",
+            "WebEnv": history["webenv"],
+            "query_key": history["query_key"],
+            "retstart": retstart,
+            "retmax": retmax,
+            "retmode": "xml",
+            "rettype": "abstract",
+        }
+
+        articles = self._efetch_articles(
+            params, f"records {retstart + 1}-{retstart + retmax}", retmax
+        )
+        if articles is None:
+            self.failed_windows.append((retstart, retmax))
+            return []
+        return articles
+
+    def _efetch_articles(
+        self, params: Dict, description: str, requested: int
+    ) -> Union[List[Dict], Future, None]:
+        """
+        Send one efetch request and parse the returned articles
+
+        With parser processes, the raw response is handed to the pool and a
+        future is returned at once, so that this thread can send the next
+        request while the response is parsed (see _resolve_parsed).
+
+        Args:
+            params: efetch parameters
+            description: What is being fetched, for error messages
+            requested: Number of records requested, for the batch sizer
+
+        Returns:
+            Parsed articles (or a future of them), or None if the request
+            failed after retries
+        """
         try:
-            response = requests.get(self.efetch_url, params=params)
-            response.raise_for_status()
+            if self.parse_pool is not None:
+                response = self._fetch_efetch_response(params, requested)
+                return self.parse_pool.submit(parse_efetch_payload, response.content)
 
-            # Parse XML
-            root = ET.fromstring(response.content)
+            if self.stream_parse:
+                return self._stream_batch_articles(params, requested)
+
+            response = self._fetch_efetch_response(params, requested)
+
+            with self.metrics.time("parse"):
+                # Parse XML
+                root = ET.fromstring(response.content)
 
-            articles = []
-            for article_elem in root.findall(".//PubmedArticle"):
-                article_info = self._parse_article_xml(article_elem)
-                if article_info:
-                    articles.append(article_info)
+                articles = []
+                for article_elem in root.findall(".//PubmedArticle"):
+                    article_info = self._parse_article_xml(article_elem)
+                    if article_info:
+                        articles.append(article_info)
 
             return articles
 
         except Exception as e:
-            self.logger.error(f"Error retrieving article details: {e}")
-            return []
+            self.logger.error(f"Error retrieving details for {description}: {e}")
+            if self.batch_sizer is not None:
+                self.batch_sizer.failure()
+            return None
 
-    def _parse_article_xml(self, article_elem) -> Optional[Dict]:
-        """Parse XML information for a single article"""
-        try:
-            article_info = {}
-
-            # Get PMID
-            pmid_elem = article_elem.find(".//PMID")
-            if pmid_elem is not None:
-                article_info["pmid"] = pmid_elem.text
-                article_info["url"] = (
-                    f"https://pubmed.ncbi.nlm.nih.gov/{pmid_elem.text}/"
-                )
+    def _fetch_efetch_response(self, params: Dict, requested: int) -> requests.Response:
+        """Send one efetch request and read its whole body"""
+        response = self._eutils_request(self.efetch_url, params)
+        self._observe_batch(requested, response, len(response.content))
+        return response
 
-            # Get title
-            title_elem = article_elem.find(".//ArticleTitle")
-            if title_elem is not None:
-                title = ET.tostring(title_elem, encoding="unicode", method="text")
-                article_info["title"] = title.strip()
-
-            # Get authors
-            authors = []
-            for author_elem in article_elem.findall(".//Author"):
-                lastname = author_elem.find(".//LastName")
-                forename = author_elem.find(".//ForeName")
-                if lastname is not None:
-                    name = lastname.text
-                    if forename is not None:
-                        name = f"{forename.text} {name}"
-                    authors.append(name)
-
-            if authors:
-                article_info["authors"] = "; ".join(authors)
-                article_info["first_author"] = authors[0] if authors else ""
-                article_info["last_author"] = authors[-1] if authors else ""
-                article_info["author_count"] = len(authors)
-
-            # Get journal information
-            journal_elem = article_elem.find(".//Journal/Title")
-            if journal_elem is not None:
-                article_info["journal"] = journal_elem.text
-
-            # Get journal abbreviation
-            journal_abbr_elem = article_elem.find(".//Journal/ISOAbbreviation")
-            if journal_abbr_elem is not None:
-                article_info["journal_abbr"] = journal_abbr_elem.text
-
-            # Get volume and issue
-            volume_elem = article_elem.find(".//Volume")
-            if volume_elem is not None:
-                article_info["volume"] = volume_elem.text
-
-            issue_elem = article_elem.find(".//Issue")
-            if issue_elem is not None:
-                article_info["issue"] = issue_elem.text
-
-            # Get pages
-            pages_elem = article_elem.find(".//Pagination/MedlinePgn")
-            if pages_elem is not None:
-                article_info["pages"] = pages_elem.text
-
-            # Get publication date
-            pub_date = article_elem.find(".//PubDate")
-            if pub_date is not None:
-                year = pub_date.find(".//Year")
-                month = pub_date.find(".//Month")
-                day = pub_date.find(".//Day")
-
-                date_parts = []
-                if year is not None:
-                    date_parts.append(year.text)
-                    article_info["year"] = int(year.text)
-                if month is not None:
-                    date_parts.append(month.text)
-                if day is not None:
-                    date_parts.append(day.text)
-
-                if date_parts:
-                    article_info["publication_date"] = " ".join(date_parts)
-
-            # Get abstract
-            abstract_elem = article_elem.find(".//AbstractText")
-            if abstract_elem is not None:
-                abstract = ET.tostring(abstract_elem, encoding="unicode", method="text")
-                article_info["abstract"] = abstract.strip()
-                article_info["abstract_length"] = len(abstract.strip())
-
-            # Get keywords/MeSH terms
-            mesh_terms = []
-            for descriptor_elem in article_elem.findall(
-                ".//MeshHeading/DescriptorName"
-            ):
-                if descriptor_elem.text:
-                    mesh_terms.append(descriptor_elem.text)
-
-            if mesh_terms:
-                article_info["mesh_terms"] = "; ".join(mesh_terms[:10])  # Take first 10
-                article_info["category"] = self._infer_category_from_mesh(mesh_terms)
-
-            # Get DOI
-            elocation_elem = article_elem.find('.//ELocationID[@EIdType="doi"]')
-            if elocation_elem is not None:
-                article_info["doi"] = elocation_elem.text
-
-            # Get PMC ID
-            pmc_elem = article_elem.find('.//ELocationID[@EIdType="pmc"]')
-            if pmc_elem is not None:
-                article_info["pmc"] = pmc_elem.text
-
-            # Get author affiliations
-            affiliations = []
-            for affiliation_elem in article_elem.findall(
-                ".//AffiliationInfo/Affiliation"
-            ):
-                if affiliation_elem.text:
-                    affiliations.append(affiliation_elem.text)
+    def _stream_batch_articles(self, params: Dict, requested: int) -> List[Dict]:
+        """
+        Fetch an efetch batch and parse each article as soon as it is received
 
-            if affiliations:
-                article_info["affiliations"] = "; ".join(set(affiliations[:5]))
-                article_info["affiliation_count"] = len(set(affiliations))
+        Neither the response body nor the full XML tree is kept in memory;
+        each PubmedArticle element is discarded right after it is parsed.
+        """
+        response = self._eutils_request(self.efetch_url, params, stream=True)
+        received = 0
 
-            # Get publication type
-            pub_types = []
-            for pub_type_elem in article_elem.findall(".//PublicationType"):
-                if pub_type_elem.text:
-                    pub_types.append(pub_type_elem.text)
+        def chunks():
+            nonlocal received
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                received += len(chunk)
+                yield chunk
 
-            if pub_types:
-                article_info["publication_types"] = "; ".join(pub_types)
+        try:
+            # The parse stage includes downloading the body as it is parsed
+            with self.metrics.time("parse"):
+                articles = []
+                for article_elem in iter_pubmed_articles(chunks()):
+                    article_info = self._parse_article_xml(article_elem)
+                    if article_info:
+                        articles.append(article_info)
+            self._observe_batch(requested, response, received)
+            return articles
+        finally:
+            self.client.count_bytes(response)
+            response.close()
 
-            return article_info
+    def _parse_article_xml(self, article_elem) -> Optional[Dict]:
+        """Parse XML information for a single article"""
+        try:
+            return self.decoder.decode(article_elem)
 
         except Exception as e:
             self.logger.error(f"Error parsing article XML: {e}")
@@ -398,138 +1454,39 @@ class AcademicArticleScraper:
 
     def _infer_category_from_mesh(self, mesh_terms: List[str]) -> str:
         """Infer article category from MeSH terms"""
-        category_keywords = {
-            "Cell Biology": [
-                "Cell",
-                "Cellular",
-                "Protein",
-                "Gene Expression",
-                "Signal Transduction",
-                "Cell Division",
-                "Cell Cycle",
-                "Apoptosis",
-                "Mitochondria",
-                "Cytoplasm",
-            ],
-            "Plant Biology": [
-                "Plant",
-                "Plants",
-                "Arabidopsis",
-                "Rice",
-                "Crop",
-                "Agriculture",
-                "Photosynthesis",
-                "Plant Development",
-                "Chloroplast",
-                "Stomata",
-            ],
-            "Genetics": [
-                "Gene",
-                "Genetic",
-                "DNA",
-                "RNA",
-                "Chromosome",
-                "Mutation",
-                "Genome",
-                "Genotype",
-                "Phenotype",
-                "Allele",
-                "Heredity",
-            ],
-            "Biochemistry": [
-                "Enzyme",
-                "Metabolism",
-                "Biochemical",
-                "Metabolic",
-                "Biosynthesis",
-                "Catalysis",
-                "Substrate",
-                "Kinetics",
-                "Pathway",
-            ],
-            "Microbiology": [
-                "Bacteria",
-                "Virus",
-                "Microorganism",
-                "Pathogen",
-                "Infection",
-                "Antibiotic",
-                "Microbe",
-                "Bacterial",
-                "Viral",
-            ],
-            "Neuroscience": [
-                "Brain",
-                "Neuron",
-                "Neural",
-                "Behavior",
-                "Memory",
-                "Synaptic",
-                "Cognitive",
-                "Nervous System",
-                "Neurotransmitter",
-            ],
-            "Immunology": [
-                "Immune",
-                "Immunity",
-                "Antibody",
-                "T Cell",
-                "B Cell",
-                "Vaccine",
-                "Inflammatory",
-                "Cytokine",
-                "Immunotherapy",
-            ],
-            "Environmental Science": [
-                "Environment",
-                "Climate",
-                "Ecology",
-                "Pollution",
-                "Soil",
-                "Ecosystem",
-                "Conservation",
-                "Biodiversity",
-            ],
-            "Medicine": [
-                "Patient",
-                "Treatment",
-                "Therapy",
-                "Disease",
-                "Clinical",
-                "Diagnosis",
-                "Drug",
-                "Pharmaceutical",
-                "Medical",
-            ],
-            "Cancer Research": [
-                "Cancer",
-                "Tumor",
-                "Oncology",
-                "Carcinoma",
-                "Metastasis",
-                "Chemotherapy",
-                "Radiation",
-                "Neoplasm",
-            ],
+        with self.metrics.time("categorise"):
+            return self.category_matcher(mesh_terms)
+
+    def _collect_metrics(self) -> Dict[str, float]:
+        """Counters kept by the HTTP client and the caches, for the metrics"""
+        stats = self.client.stats
+        counters = {
+            "http_requests_total": stats["requests"],
+            "http_retries_total": stats["retries"],
+            "http_failures_total": stats["failures"],
+            "http_new_connections_total": stats["new_connections"],
+            "bytes_received_total": stats["bytes_received"],
         }
-
-        mesh_text = " ".join(mesh_terms).lower()
-
-        # Score each category
-        category_scores = {}
-        for category, keywords in category_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword.lower() in mesh_text:
-                    score += 1
-            if score > 0:
-                category_scores[category] = score
-
-        if category_scores:
-            # Return the category with the highest score
-            return max(category_scores, key=category_scores.get)
-
-        return "Other"
+        if self.record_cache is not None:
+            for key in ("hits", "stale", "misses"):
+                counters[f"record_cache_{key}_total"] = self.record_cache.stats[key]
+        if self.http_cache is not None:
+            for key in ("replayed", "recorded", "misses"):
+                counters[f"http_cache_{key}_total"] = self.http_cache.stats[key]
+        return counters
+
+    def close(self):
+        """Stop the parser processes and close the HTTP session and caches"""
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+            self.parse_pool = None
+        self.client.close()
+        if isinstance(self.rate_limiter, SharedRateLimiter):
+            self.rate_limiter.close()
+        if self.record_cache is not None:
+            self.record_cache.close()
+        if self.http_cache is not None:
+            self.http_cache.close()
 
     def save_to_csv(self, filename: str = None):
         """Save results to CSV file"""
@@ -540,31 +1497,7 @@ class AcademicArticleScraper:
         if filename is None:
             filename = f"articles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
-        fieldnames = [
-            "pmid",
-            "title",
-            "first_author",
-            "last_author",
-            "author_count",
-            "authors",
-            "journal",
-            "journal_abbr",
-            "volume",
-            "issue",
-            "pages",
-            "year",
-            "publication_date",
-            "category",
-            "mesh_terms",
-            "abstract",
-            "abstract_length",
-            "doi",
-            "pmc",
-            "affiliations",
-            "affiliation_count",
-            "publication_types",
-            "url",
-        ]
+        fieldnames = self.fields
 
         with open(filename, "w", newline="", encoding="utf-8") as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -579,14 +1512,29 @@ class AcademicArticleScraper:
         if filename is None:
             filename = f"articles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
+        # Same layout as json.dump(..., indent=2) of the whole list, written
+        # one record at a time
         with open(filename, "w", encoding="utf-8") as jsonfile:
-            json.dump(self.articles, jsonfile, ensure_ascii=False, indent=2)
+            separator = "[\n"
+            for article in self.articles:
+                text = json.dumps(article, ensure_ascii=False, indent=2)
+                jsonfile.write(separator + "  " + text.replace("\n", "\n  "))
+                separator = ",\n"
+            jsonfile.write("\n]" if separator != "[\n" else "[]")
 
         self.logger.info(f"Saved {len(self.articles)} articles to {filename}")
 
+    def _current_statistics(self) -> ArticleStatistics:
+        """Statistics of the current results"""
+        # self.articles may have been replaced since the last fetch
+        if self.articles and len(self.articles) != self.statistics.total:
+            self.statistics = ArticleStatistics.from_records(self.articles)
+        return self.statistics
+
     def save_statistics(self, filename: str = None):
         """Save statistical summary to text file"""
-        if not self.articles:
+        stats = self._current_statistics()
+        if not stats.total:
             self.logger.warning("No article data to save statistics")
             return
 
@@ -597,73 +1545,44 @@ class AcademicArticleScraper:
             txtfile.write("=== Academic Articles - Statistical Summary ===\n")
             txtfile.write("=" * 60 + "\n\n")
 
-            txtfile.write(f"Total number of articles: {len(self.articles)}\n")
+            txtfile.write(f"Total number of articles: {stats.total}\n")
             txtfile.write(
                 f"Data retrieved on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
             )
 
             # Journal distribution
-            journals = {}
-            for article in self.articles:
-                journal = article.get("journal", "Unknown")
-                journals[journal] = journals.get(journal, 0) + 1
-
             txtfile.write("Distribution by Journal:\n")
             txtfile.write("-" * 40 + "\n")
-            for journal, count in sorted(
-                journals.items(), key=lambda x: x[1], reverse=True
-            )[:10]:
-                percentage = (count / len(self.articles)) * 100
+            for journal, count in stats.top_journals(10):
+                percentage = (count / stats.total) * 100
                 txtfile.write(f"  {journal}: {count} articles ({percentage:.1f}%)\n")
 
             # Category statistics
-            categories = {}
-            for article in self.articles:
-                category = article.get("category", "Uncategorized")
-                categories[category] = categories.get(category, 0) + 1
-
             txtfile.write(f"\nClassification by Subject Area:\n")
             txtfile.write("-" * 40 + "\n")
-            for category, count in sorted(
-                categories.items(), key=lambda x: x[1], reverse=True
-            ):
-                percentage = (count / len(self.articles)) * 100
+            for category, count in stats.top_categories():
+                percentage = (count / stats.total) * 100
                 txtfile.write(f"  {category}: {count} articles ({percentage:.1f}%)\n")
 
             # Year statistics
-            years = {}
-            for article in self.articles:
-                year = article.get("year", 0)
-                if year:
-                    years[year] = years.get(year, 0) + 1
-
-            if years:
+            if stats.years:
                 txtfile.write(f"\nPublication Distribution by Year:\n")
                 txtfile.write("-" * 40 + "\n")
-                for year, count in sorted(years.items(), reverse=True)[:10]:
+                for year, count in stats.latest_years(10):
                     txtfile.write(f"  {year}: {count} articles\n")
 
             # Author statistics
-            author_counts = [
-                article.get("author_count", 0)
-                for article in self.articles
-                if article.get("author_count")
-            ]
-            if author_counts:
-                avg_authors = sum(author_counts) / len(author_counts)
+            if stats.author_articles:
                 txtfile.write(f"\nAuthor Statistics:\n")
                 txtfile.write("-" * 40 + "\n")
-                txtfile.write(f"  Average number of authors: {avg_authors:.1f}\n")
-                txtfile.write(f"  Maximum authors: {max(author_counts)}\n")
-                txtfile.write(f"  Minimum authors: {min(author_counts)}\n")
+                txtfile.write(f"  Average number of authors: {stats.author_mean:.1f}\n")
+                txtfile.write(f"  Maximum authors: {stats.author_max}\n")
+                txtfile.write(f"  Minimum authors: {stats.author_min}\n")
 
             # Recent articles
             txtfile.write(f"\nMost Recent 10 Articles:\n")
             txtfile.write("-" * 40 + "\n")
-            recent_articles = sorted(
-                self.articles, key=lambda x: x.get("year", 0), reverse=True
-            )[:10]
-            for i, article in enumerate(recent_articles, 1):
+            for i, article in enumerate(stats.recent_articles(), 1):
                 txtfile.write(f"{i:2d}. {article.get('title', 'No title')}\n")
                 txtfile.write(f"    Journal: {article.get('journal', 'Unknown')}\n")
                 txtfile.write(f"    Year: {article.get('year', 'Unknown')}\n")
@@ -674,58 +1593,114 @@ class AcademicArticleScraper:
 
         self.logger.info(f"Saved statistical summary to {filename}")
 
+    def save_statistics_json(self, filename: str = None):
+        """Save machine-readable statistics to JSON file"""
+        stats = self._current_statistics()
+        if not stats.total:
+            self.logger.warning("No article data to save statistics")
+            return
+
+        if filename is None:
+            filename = f"statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+        data = {
+            "retrieved_on": datetime.now().isoformat(timespec="seconds"),
+            **stats.to_dict(),
+        }
+        with open(filename, "w", encoding="utf-8") as jsonfile:
+            json.dump(data, jsonfile, ensure_ascii=False, indent=2)
+
+        self.logger.info(f"Saved statistics to {filename}")
+
     def print_summary(self):
         """Print summary information"""
-        if not self.articles:
+        stats = self._current_statistics()
+        if not stats.total:
             print("No articles found")
             return
 
         print(f"\n=== Academic Articles Summary ===")
-        print(f"Total number of articles: {len(self.articles)}")
+        print(f"Total number of articles: {stats.total}")
 
         # Journal distribution
-        journals = {}
-        for article in self.articles:
-            journal = article.get("journal", "Unknown")
-            journals[journal] = journals.get(journal, 0) + 1
-
         print(f"\nTop 5 Journals:")
-        for journal, count in sorted(
-            journals.items(), key=lambda x: x[1], reverse=True
-        )[:5]:
+        for journal, count in stats.top_journals(5):
             print(f"  {journal}: {count} articles")
 
         # Category statistics
-        categories = {}
-        for article in self.articles:
-            category = article.get("category", "Uncategorized")
-            categories[category] = categories.get(category, 0) + 1
-
         print(f"\nClassification by subject area:")
-        for category, count in sorted(
-            categories.items(), key=lambda x: x[1], reverse=True
-        ):
+        for category, count in stats.top_categories():
             print(f"  {category}: {count} articles")
 
         # Year statistics
-        years = {}
-        for article in self.articles:
-            year = article.get("year", 0)
-            if year:
-                years[year] = years.get(year, 0) + 1
-
-        if years:
+        if stats.years:
             print(f"\nMost productive years:")
-            for year, count in sorted(years.items(), key=lambda x: x[1], reverse=True)[
-                :5
-            ]:
+            for year, count in stats.top_years(5):
                 print(f"  {year}: {count} articles")
 
 
+def search_main(argv: List[str]):
+    """Command line interface of the offline search subcommand"""
+    parser = argparse.ArgumentParser(
+        prog="academic_article_scraper.py search",
+        description="Search the full-text index of harvested articles offline",
+        epilog='Query syntax: terms are ANDed; "exact phrase", OR, NOT, prefix*, '
+        'and field filters such as title:rice or mesh_terms:"Oryza sativa"',
+    )
+    parser.add_argument("index", help="Index file built with --index")
+    parser.add_argument("query", help="Search query")
+    parser.add_argument(
+        "--limit",
+        "-n",
+        type=int,
+        default=20,
+        help="Maximum number of results (default: 20)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        parser.error(f"Index not found: {args.index}")
+
+    with ArticleSearchIndex(args.index) as index:
+        start = time.perf_counter()
+        try:
+            results = index.search(args.query, args.limit)
+            total = index.count(args.query)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(
+        f"{total} articles match {args.query!r} ({elapsed:.1f} ms), "
+        f"showing {len(results)}:"
+    )
+    for rank, result in enumerate(results, 1):
+        print(
+            f"\n{rank:>3}. [{result['score']:.2f}] {result['title']} "
+            f"({result['year'] or 'n.d.'})"
+        )
+        print(
+            f"     {result['first_author'] or 'Unknown'} - "
+            f"{result['journal'] or 'Unknown'} - {result['url']}"
+        )
+        if result["snippet"]:
+            print(f"     {result['snippet']}")
+
+
 def main():
     """Main function with command line interface"""
+    if sys.argv[1:2] == ["search"]:
+        return search_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
-        description="Academic Article Scraper via PubMed API"
+        description="Academic Article Scraper via PubMed API",
+        epilog="Search harvested articles offline with: "
+        "%(prog)s search INDEX QUERY (see %(prog)s search --help)",
     )
 
     # Search parameters
@@ -742,6 +1717,12 @@ def main():
         "--authors", "-au", nargs="+", help="Author names to search for"
     )
     parser.add_argument("--keywords", "-k", nargs="+", help="Keywords to search for")
+    parser.add_argument(
+        "--queries",
+        metavar="FILE",
+        help="Run every search in a YAML/JSON query manifest, fetch each unique "
+        "article once and write per-query outputs plus a membership index",
+    )
     parser.add_argument("--date-from", help="Start date (YYYY/MM/DD format)")
     parser.add_argument("--date-to", help="End date (YYYY/MM/DD format)")
     parser.add_argument(
@@ -751,6 +1732,29 @@ def main():
         default=500,
         help="Maximum number of results (default: 500)",
     )
+    parser.add_argument(
+        "--shard",
+        action="store_true",
+        help="Split the search into publication date shards to exceed the "
+        f"{ESEARCH_MAX_RESULTS}-result esearch limit (--max-results 0 retrieves all)",
+    )
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help="Fetch lightweight esummary records (no abstract, MeSH terms or affiliations)",
+    )
+    parser.add_argument(
+        "--compare-fetch-modes",
+        type=int,
+        metavar="N",
+        help="Fetch the first N results via efetch and esummary, report bytes and time, then exit",
+    )
+    parser.add_argument(
+        "--use-history",
+        action="store_true",
+        help="Keep results on the E-utilities history server and page through them "
+        "(--max-results 0 retrieves all)",
+    )
     parser.add_argument(
         "--sort-by",
         choices=["date", "relevance", "author", "journal"],
@@ -763,9 +1767,186 @@ def main():
         "--output-prefix", "-o", default="articles", help="Output filename prefix"
     )
     parser.add_argument("--no-csv", action="store_true", help="Don't save CSV file")
+    parser.add_argument(
+        "--no-jsonl", action="store_true", help="Don't save JSON Lines file"
+    )
     parser.add_argument("--no-json", action="store_true", help="Don't save JSON file")
     parser.add_argument(
-        "--no-stats", action="store_true", help="Don't save statistics file"
+        "--no-stats",
+        action="store_true",
+        help="Don't save statistics files (text and JSON)",
+    )
+    parser.add_argument(
+        "--fields",
+        nargs="+",
+        choices=ARTICLE_FIELDS,
+        metavar="FIELD",
+        help="Only extract and save these fields (pmid is always included); "
+        f"choices: {', '.join(ARTICLE_FIELDS)}",
+    )
+    parser.add_argument(
+        "--category-rules",
+        metavar="FILE",
+        help="JSON or YAML file mapping categories to MeSH keywords, "
+        "replacing the built-in rules",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="FILE",
+        help="Upsert the fetched articles into an indexed SQLite database "
+        "with author, affiliation and MeSH tables",
+    )
+    parser.add_argument(
+        "--index",
+        metavar="FILE",
+        help="Add the fetched articles to a full-text search index, updated "
+        "batch by batch (query it offline with the search subcommand)",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Gzip the CSV and JSON Lines outputs as they are written",
+    )
+
+    # NCBI access options
+    parser.add_argument(
+        "--api-key",
+        help="NCBI API key (default: $NCBI_API_KEY); raises the limit to 10 requests/second",
+    )
+    parser.add_argument(
+        "--email", help="Contact email sent to NCBI (default: $NCBI_EMAIL)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Maximum number of efetch requests in flight (default: 3)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        metavar="N",
+        help="Records per efetch request (default: adapted to the response "
+        "times and sizes; long ID lists are sent by POST)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="HTTP read timeout in seconds (default: 60)",
+    )
+    parser.add_argument(
+        "--stream-parse",
+        action="store_true",
+        help="Parse efetch responses incrementally to bound memory use",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Parse efetch responses in N worker processes while the next "
+        "requests are in flight (default: 0, parse in the fetching threads)",
+    )
+    parser.add_argument(
+        "--cache-db",
+        default="academic_scraper_cache.db",
+        help="SQLite file caching parsed records by PMID (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=168.0,
+        help="Hours before a cached record is fetched again (default: 168)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the record cache entirely"
+    )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Refetch all records and overwrite the cached copies",
+    )
+    parser.add_argument(
+        "--http-cache",
+        metavar="FILE",
+        help="SQLite file recording raw E-utilities responses for offline reruns",
+    )
+    parser.add_argument(
+        "--http-cache-mode",
+        choices=REPLAY_MODES,
+        default="record",
+        help="record: replay recorded responses and record the others; replay: "
+        "recorded responses only, failing on anything else; passthrough: "
+        "ignore the recordings (default: record)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="Record the job and its completed batches in FILE so that it can "
+        "be resumed with --resume",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the job recorded in --checkpoint FILE, appending to its "
+        "outputs (search and output options are taken from the checkpoint)",
+    )
+    parser.add_argument(
+        "--sync",
+        metavar="STATE_FILE",
+        help="Keep <prefix>.csv/.jsonl up to date: search only articles added to "
+        "PubMed since the last successful run of the same query (recorded in "
+        "STATE_FILE) and append the new ones; the JSON and statistics files "
+        "cover the new articles",
+    )
+    parser.add_argument(
+        "--prune-cache",
+        action="store_true",
+        help="Delete expired records from the cache (runs alone if no search is given)",
+    )
+    parser.add_argument(
+        "--rate-limit-db",
+        default=DEFAULT_SHARED_RATE_LIMIT_PATH,
+        metavar="FILE",
+        help="SQLite file through which all scraper processes on this host share "
+        "the NCBI request rate limit (default: %(default)s, or $PUBMED_RATE_LIMIT_DB)",
+    )
+    parser.add_argument(
+        "--no-shared-rate-limit",
+        action="store_true",
+        help="Limit the request rate of this process only",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="Write stage timings, request latency and batch size histograms "
+        "and traffic/cache counters to FILE at the end of the run",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=METRIC_FORMATS,
+        default="json",
+        help="Format of the --metrics file (default: json)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Also rewrite the --metrics file every SECONDS during the run "
+        "(default: 0, only at the end)",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=EUTILS_BASE_URL,
+        help="E-utilities endpoint (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries for transient HTTP errors such as 429/5xx (default: 5)",
     )
 
     # Other options
@@ -781,7 +1962,114 @@ def main():
 
     args = parser.parse_args()
 
-    scraper = AcademicArticleScraper(log_level=args.log_level)
+    if args.use_history and (args.summary_only or args.compare_fetch_modes):
+        parser.error(
+            "--summary-only and --compare-fetch-modes need PMIDs and cannot be "
+            "combined with --use-history"
+        )
+
+    if args.stream_parse and args.parse_workers:
+        parser.error("--stream-parse and --parse-workers cannot be combined")
+
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+
+    if args.metrics_interval < 0:
+        parser.error("--metrics-interval must not be negative")
+
+    queries = None
+    if args.queries:
+        if args.use_history or args.checkpoint or args.compare_fetch_modes:
+            parser.error(
+                "--queries cannot be combined with --use-history, --checkpoint "
+                "or --compare-fetch-modes"
+            )
+        try:
+            queries = load_query_manifest(args.queries)
+        except (OSError, ImportError, ValueError) as e:
+            parser.error(f"Cannot read {args.queries}: {e}")
+
+    # A synced query keeps the fields and dataset files of its first run
+    sync_state = None
+    sync_entry = None
+    sync_query = {
+        "affiliations": args.affiliations,
+        "journals": args.journals,
+        "authors": args.authors,
+        "keywords": args.keywords,
+        "date_from": args.date_from,
+        "date_to": args.date_to,
+    }
+    if args.sync:
+        if (
+            args.use_history
+            or args.queries
+            or args.checkpoint
+            or args.compare_fetch_modes
+        ):
+            parser.error(
+                "--sync cannot be combined with --use-history, --queries, "
+                "--checkpoint or --compare-fetch-modes"
+            )
+        if args.no_csv and args.no_jsonl:
+            parser.error("--sync needs a CSV or JSON Lines dataset to append to")
+        try:
+            sync_state = SyncState.load(args.sync)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read {args.sync}: {e}")
+        sync_entry = sync_state.get(sync_query)
+        sync_until = datetime.now().strftime("%Y/%m/%d")
+        if sync_entry is not None:
+            args.fields = sync_entry["fields"]
+
+    # A resumed job runs with the options it was started with
+    checkpoint = None
+    if args.resume:
+        if not args.checkpoint:
+            parser.error("--resume needs --checkpoint FILE")
+        try:
+            checkpoint = HarvestCheckpoint.load(args.checkpoint)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot resume from {args.checkpoint}: {e}")
+        if checkpoint.complete:
+            print(f"The job in {args.checkpoint} is already complete")
+            return
+        args.fields = checkpoint.job["fields"]
+        args.output_prefix = checkpoint.job["output_prefix"]
+        # Batch boundaries must match the checkpointed ones; jobs recorded
+        # before the batch size was stored used the size given on resume
+        resumed_batch_size = checkpoint.job.get("batch_size", args.batch_size)
+        if args.batch_size not in (None, resumed_batch_size):
+            print(
+                f"Ignoring --batch-size {args.batch_size}: the job in "
+                f"{args.checkpoint} uses batches of {resumed_batch_size}"
+            )
+        args.batch_size = resumed_batch_size
+
+    scraper = AcademicArticleScraper(
+        log_level=args.log_level,
+        api_key=args.api_key,
+        email=args.email,
+        max_concurrency=args.concurrency,
+        timeout=args.timeout,
+        max_retries=args.max_retries,
+        stream_parse=args.stream_parse,
+        cache_path=None if args.no_cache else args.cache_db,
+        cache_ttl_hours=args.cache_ttl,
+        refresh_cache=args.refresh_cache,
+        fields=args.fields,
+        category_rules=args.category_rules,
+        parse_workers=args.parse_workers,
+        http_cache_path=args.http_cache,
+        http_cache_mode=args.http_cache_mode,
+        base_url=args.base_url,
+        shared_rate_limit_path=(
+            None if args.no_shared_rate_limit else args.rate_limit_db
+        ),
+        batch_size=args.batch_size,
+        # Records only need to stay in memory for the JSON array file
+        keep_articles=not args.no_json,
+    )
 
     # List available journals
     if args.list_journals:
@@ -790,53 +2078,302 @@ def main():
             print(f"  {shortcut:<20} -> {full_name}")
         return
 
+    has_search = any(
+        [args.affiliations, args.journals, args.authors, args.keywords, queries]
+    )
+
+    # Prune expired cache entries
+    if args.prune_cache and scraper.record_cache is not None:
+        removed = scraper.record_cache.prune()
+        print(
+            f"Pruned {removed} expired records from {args.cache_db} "
+            f"({len(scraper.record_cache)} remaining)"
+        )
+        if not has_search:
+            return
+
     # Check if at least one search parameter is provided
-    if not any([args.affiliations, args.journals, args.authors, args.keywords]):
+    if not has_search and checkpoint is None:
         print("Error: At least one search parameter must be provided")
         print("Use --help for more information")
         return
 
-    try:
-        # Search for articles
-        pmid_list = scraper.search_articles(
-            affiliations=args.affiliations,
-            journals=args.journals,
-            authors=args.authors,
-            keywords=args.keywords,
-            date_from=args.date_from,
-            date_to=args.date_to,
-            max_results=args.max_results,
-            sort_by=args.sort_by,
+    # CSV and JSON Lines outputs are written batch by batch while fetching
+    if checkpoint is not None:
+        timestamp = checkpoint.job["timestamp"]
+        sinks = [
+            make_sink(
+                output["format"], output["path"], scraper.fields, output["compress"]
+            )
+            for output in checkpoint.outputs
+        ]
+        checkpoint.restore_sinks(sinks)
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        sinks = []
+    suffix = ".gz" if args.gzip else ""
+    if sync_state is not None:
+        if sync_entry is not None:
+            datasets = sync_entry["datasets"]
+        else:
+            datasets = [
+                {"format": fmt, "path": f"{args.output_prefix}.{fmt}{suffix}"}
+                for fmt, skip in (("csv", args.no_csv), ("jsonl", args.no_jsonl))
+                if not skip
+            ]
+            for dataset in datasets:
+                dataset["compress"] = args.gzip
+        sinks = open_datasets(datasets, scraper.fields)
+    elif checkpoint is None and not args.no_csv:
+        sinks.append(
+            CSVSink(
+                f"{args.output_prefix}_{timestamp}.csv{suffix}",
+                scraper.fields,
+                compress=args.gzip,
+            )
+        )
+    if sync_state is None and checkpoint is None and not args.no_jsonl:
+        sinks.append(
+            JSONLinesSink(
+                f"{args.output_prefix}_{timestamp}.jsonl{suffix}", compress=args.gzip
+            )
         )
 
-        if pmid_list:
-            # Retrieve detailed article information
-            articles = scraper.fetch_article_details(pmid_list)
+    router = None
+    index = ArticleSearchIndex(args.index) if args.index else None
+    database = ArticleDatabase(args.sqlite) if args.sqlite else None
+    reporter = None
+    if args.metrics:
+        reporter = MetricsReporter(
+            scraper.metrics, args.metrics, args.metrics_format, args.metrics_interval
+        ).start()
+    try:
+        search_params = {
+            "affiliations": args.affiliations,
+            "journals": args.journals,
+            "authors": args.authors,
+            "keywords": args.keywords,
+            "date_from": args.date_from,
+            "date_to": args.date_to,
+            "sort_by": args.sort_by,
+        }
+
+        job = {
+            "query": {k: v for k, v in search_params.items() if v},
+            "mode": "esummary" if args.summary_only else "efetch",
+            "fields": scraper.fields,
+            "output_prefix": args.output_prefix,
+            "batch_size": scraper.batch_size,
+            "timestamp": timestamp,
+        }
+
+        # Search for articles and retrieve detailed article information
+        if checkpoint is not None:
+            scraper.logger.info(f"Resuming the job recorded in {args.checkpoint}")
+            job = checkpoint.job
+        elif args.use_history:
+            history = scraper.search_history(**search_params)
+            if not history or not history["count"]:
+                print("No articles found with the specified criteria")
+                return
+            job.update(
+                source="history",
+                history=history,
+                max_results=args.max_results or None,
+            )
+        elif queries is not None:
+            membership = run_query_batch(scraper, queries, args.max_results)
+            pmid_list = union_pmids(membership)
+            if not pmid_list:
+                print("No articles found with the specified criteria")
+                return
+            scraper.logger.info(
+                f"{len(queries)} queries found "
+                f"{sum(len(p) for p in membership.values())} articles, "
+                f"{len(pmid_list)} unique"
+            )
 
-            if articles:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            save_membership_index(
+                f"{args.output_prefix}_membership_{timestamp}.json",
+                queries,
+                membership,
+            )
 
-                # Save results
+            # Each record is also written to the outputs of its queries
+            router = QueryRouter(membership)
+            for name in membership:
+                base = f"{args.output_prefix}_{safe_filename(name)}_{timestamp}"
                 if not args.no_csv:
-                    scraper.save_to_csv(f"{args.output_prefix}_{timestamp}.csv")
-                if not args.no_json:
-                    scraper.save_to_json(f"{args.output_prefix}_{timestamp}.json")
-                if not args.no_stats:
-                    scraper.save_statistics(
-                        f"{args.output_prefix}_stats_{timestamp}.txt"
+                    router.add_sink(
+                        name,
+                        CSVSink(f"{base}.csv{suffix}", scraper.fields, args.gzip),
+                    )
+                if not args.no_jsonl:
+                    router.add_sink(
+                        name, JSONLinesSink(f"{base}.jsonl{suffix}", args.gzip)
+                    )
+
+            job.update(source="pmids", pmids=pmid_list)
+        elif sync_state is not None:
+            # Entrez dates are days: the last day is searched again and the
+            # articles already in the dataset are skipped
+            entry_date_from = sync_entry["last_entry_date"] if sync_entry else None
+            window = {
+                "entry_date_from": entry_date_from,
+                "entry_date_to": sync_until,
+            }
+            if args.shard:
+                pmid_list = scraper.search_articles_sharded(**search_params, **window)
+            else:
+                pmid_list = scraper.search_articles(
+                    **search_params, max_results=ESEARCH_MAX_RESULTS, **window
+                )
+            if not scraper.search_complete:
+                print(
+                    "The search did not return every new article; "
+                    f"{args.sync} was not updated"
+                )
+                return
+
+            known = set()
+            for dataset in datasets:
+                known |= read_dataset_pmids(dataset)
+            pmid_list = [pmid for pmid in pmid_list if pmid not in known]
+            if not pmid_list:
+                sync_state.record_run(sync_query, sync_until, scraper.fields, sinks, 0)
+                print(
+                    "No new articles since "
+                    f"{entry_date_from or 'the start of PubMed'}"
+                )
+                return
+            scraper.logger.info(
+                f"{len(pmid_list)} new articles, {len(known)} already in the dataset"
+            )
+
+            job.update(source="pmids", pmids=pmid_list)
+        else:
+            if args.shard:
+                pmid_list = scraper.search_articles_sharded(
+                    **search_params, max_results=args.max_results or None
+                )
+            else:
+                pmid_list = scraper.search_articles(
+                    **search_params, max_results=args.max_results
+                )
+            if not pmid_list:
+                print("No articles found with the specified criteria")
+                return
+
+            if args.compare_fetch_modes:
+                sample = pmid_list[: args.compare_fetch_modes]
+                print(f"\nFetch mode comparison ({len(sample)} articles):")
+                for mode, result in scraper.compare_fetch_modes(sample).items():
+                    print(
+                        f"  {mode:<10} {result['records']:>6} records "
+                        f"{result['bytes'] / 1024:>10.1f} KiB "
+                        f"{result['seconds']:>8.2f}s"
                     )
+                return
+
+            job.update(source="pmids", pmids=pmid_list)
+
+        if args.checkpoint and checkpoint is None:
+            checkpoint = HarvestCheckpoint.create(args.checkpoint, job, sinks)
+        # The router, index and database are not part of the checkpointed
+        # outputs: rewriting a batch into them is harmless
+        extra_sinks = [sink for sink in (router, index, database) if sink is not None]
+        scraper.fetch_job(job, sinks=sinks + extra_sinks, checkpoint=checkpoint)
+        if index is not None:
+            scraper.logger.info(
+                f"Indexed {index.records_written} articles in {args.index} "
+                f"({len(index)} in total)"
+            )
+        if database is not None:
+            scraper.logger.info(f"SQLite export: {database.summary()}")
+
+        if router is not None:
+            router.close()
+            for query_sinks in router.sinks.values():
+                sinks.extend(query_sinks)
+        for sink in sinks:
+            sink.close()
+            if sink.records_written:
+                scraper.logger.info(
+                    f"Saved {sink.records_written} articles to {sink.path}"
+                )
+
+        if sync_state is not None:
+            if scraper.failed_pmids:
+                print(
+                    f"Some articles could not be retrieved; {args.sync} was not "
+                    "updated, so the next run retries them"
+                )
+            else:
+                sync_state.record_run(
+                    sync_query,
+                    sync_until,
+                    scraper.fields,
+                    sinks,
+                    scraper.record_count,
+                )
 
-                # Print summary
-                scraper.print_summary()
+        if checkpoint is not None and not checkpoint.complete:
+            print(
+                f"Some batches failed; rerun with --checkpoint {args.checkpoint} "
+                "--resume to retry them"
+            )
+
+        if args.resume:
+            # Records of earlier sessions are only on disk
+            jsonl = next(
+                (o for o in checkpoint.outputs if o["format"] == "jsonl"), None
+            )
+            if jsonl is not None:
+                records = read_json_lines(jsonl["path"], jsonl["compress"])
+                if scraper.keep_articles:
+                    scraper.articles = ArticleStore(records)
+                    records = scraper.articles
+                scraper.statistics = ArticleStatistics.from_records(records)
             else:
-                print("Failed to retrieve detailed article information")
+                scraper.logger.warning(
+                    "No JSON Lines output to reload: the JSON and statistics "
+                    "files only cover this session"
+                )
+
+        if scraper.statistics.total:
+            # Save results
+            if not args.no_json:
+                scraper.save_to_json(f"{args.output_prefix}_{timestamp}.json")
+            if not args.no_stats:
+                scraper.save_statistics(f"{args.output_prefix}_stats_{timestamp}.txt")
+                scraper.save_statistics_json(
+                    f"{args.output_prefix}_stats_{timestamp}.json"
+                )
+
+            # Print summary
+            scraper.print_summary()
         else:
-            print("No articles found with the specified criteria")
+            print("Failed to retrieve detailed article information")
 
     except Exception as e:
         print(f"Error: {e}")
         scraper.logger.error(f"Application error: {e}")
 
+    finally:
+        # Batches written before an error are kept
+        for sink in sinks:
+            sink.close()
+        if router is not None:
+            router.close()
+        if index is not None:
+            index.close()
+        if database is not None:
+            database.close()
+        if reporter is not None:
+            reporter.stop()
+            scraper.logger.info(f"Metrics written to {args.metrics}")
+        scraper.close()
+
 
 if __name__ == "__main__":
     main()
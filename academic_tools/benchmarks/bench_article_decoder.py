@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubmedArticle Decoder Benchmark
+Check that the single-pass PubmedArticleDecoder produces the same records as
+the previous XPath-based parser on recorded efetch fixtures, then compare
+their throughput in records/second, with and without a field projection
+"""
+
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from functools import partial
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from academic_article_scraper import AcademicArticleScraper
+from pubmed_parser import ARTICLE_FIELDS, PubmedArticleDecoder, public_record
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def xpath_parse_article_xml(article_elem, categorize: Callable) -> Dict:
+    """Reference implementation: the previous per-field ``.//`` search parser"""
+    article_info = {}
+
+    pmid_elem = article_elem.find(".//PMID")
+    if pmid_elem is not None:
+        article_info["pmid"] = pmid_elem.text
+        article_info["url"] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid_elem.text}/"
+
+    title_elem = article_elem.find(".//ArticleTitle")
+    if title_elem is not None:
+        title = ET.tostring(title_elem, encoding="unicode", method="text")
+        article_info["title"] = title.strip()
+
+    authors = []
+    for author_elem in article_elem.findall(".//Author"):
+        lastname = author_elem.find(".//LastName")
+        forename = author_elem.find(".//ForeName")
+        if lastname is not None:
+            name = lastname.text
+            if forename is not None:
+                name = f"{forename.text} {name}"
+            authors.append(name)
+
+    if authors:
+        article_info["authors"] = "; ".join(authors)
+        article_info["first_author"] = authors[0] if authors else ""
+        article_info["last_author"] = authors[-1] if authors else ""
+        article_info["author_count"] = len(authors)
+
+    journal_elem = article_elem.find(".//Journal/Title")
+    if journal_elem is not None:
+        article_info["journal"] = journal_elem.text
+
+    journal_abbr_elem = article_elem.find(".//Journal/ISOAbbreviation")
+    if journal_abbr_elem is not None:
+        article_info["journal_abbr"] = journal_abbr_elem.text
+
+    volume_elem = article_elem.find(".//Volume")
+    if volume_elem is not None:
+        article_info["volume"] = volume_elem.text
+
+    issue_elem = article_elem.find(".//Issue")
+    if issue_elem is not None:
+        article_info["issue"] = issue_elem.text
+
+    pages_elem = article_elem.find(".//Pagination/MedlinePgn")
+    if pages_elem is not None:
+        article_info["pages"] = pages_elem.text
+
+    pub_date = article_elem.find(".//PubDate")
+    if pub_date is not None:
+        year = pub_date.find(".//Year")
+        month = pub_date.find(".//Month")
+        day = pub_date.find(".//Day")
+
+        date_parts = []
+        if year is not None:
+            date_parts.append(year.text)
+            article_info["year"] = int(year.text)
+        if month is not None:
+            date_parts.append(month.text)
+        if day is not None:
+            date_parts.append(day.text)
+
+        if date_parts:
+            article_info["publication_date"] = " ".join(date_parts)
+
+    abstract_elem = article_elem.find(".//AbstractText")
+    if abstract_elem is not None:
+        abstract = ET.tostring(abstract_elem, encoding="unicode", method="text")
+        article_info["abstract"] = abstract.strip()
+        article_info["abstract_length"] = len(abstract.strip())
+
+    mesh_terms = []
+    for descriptor_elem in article_elem.findall(".//MeshHeading/DescriptorName"):
+        if descriptor_elem.text:
+            mesh_terms.append(descriptor_elem.text)
+
+    if mesh_terms:
+        article_info["mesh_terms"] = "; ".join(mesh_terms[:10])
+        article_info["category"] = categorize(mesh_terms)
+
+    elocation_elem = article_elem.find('.//ELocationID[@EIdType="doi"]')
+    if elocation_elem is not None:
+        article_info["doi"] = elocation_elem.text
+
+    pmc_elem = article_elem.find('.//ELocationID[@EIdType="pmc"]')
+    if pmc_elem is not None:
+        article_info["pmc"] = pmc_elem.text
+
+    affiliations = []
+    for affiliation_elem in article_elem.findall(".//AffiliationInfo/Affiliation"):
+        if affiliation_elem.text:
+            affiliations.append(affiliation_elem.text)
+
+    if affiliations:
+        article_info["affiliations"] = "; ".join(dict.fromkeys(affiliations[:5]))
+        article_info["affiliation_count"] = len(set(affiliations))
+
+    pub_types = []
+    for pub_type_elem in article_elem.findall(".//PublicationType"):
+        if pub_type_elem.text:
+            pub_types.append(pub_type_elem.text)
+
+    if pub_types:
+        article_info["publication_types"] = "; ".join(pub_types)
+
+    return article_info
+
+
+def load_fixture_articles(paths: List[str]) -> List[ET.Element]:
+    """Load all PubmedArticle elements from efetch XML fixtures"""
+    articles = []
+    for path in paths:
+        articles.extend(ET.parse(path).getroot().findall("PubmedArticle"))
+    return articles
+
+
+def time_parser(parse: Callable, articles: List[ET.Element], repeat: int) -> float:
+    """Return the records/second achieved by a parser function"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for article_elem in articles:
+            parse(article_elem)
+    elapsed = time.perf_counter() - start
+    return len(articles) * repeat / elapsed
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Compare the single-pass decoder with the XPath parser"
+    )
+    parser.add_argument(
+        "--fixtures",
+        nargs="+",
+        default=[os.path.join(FIXTURE_DIR, "efetch_sample.xml")],
+        help="efetch XML files to use (default: bundled sample)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=2000,
+        help="Number of passes over the fixture articles (default: 2000)",
+    )
+    parser.add_argument(
+        "--fields",
+        nargs="+",
+        choices=ARTICLE_FIELDS,
+        default=["pmid", "doi", "year"],
+        help="Field projection to time as well (default: pmid doi year)",
+    )
+    args = parser.parse_args()
+
+    articles = load_fixture_articles(args.fixtures)
+    categorize = AcademicArticleScraper.category_matcher
+    decoder = PubmedArticleDecoder(categorize)
+    xpath_parse = partial(xpath_parse_article_xml, categorize=categorize)
+
+    # Output must be identical, including field order (the full lists kept
+    # for the database outputs have no XPath counterpart)
+    mismatches = 0
+    for article_elem in articles:
+        expected = xpath_parse(article_elem)
+        actual = public_record(decoder.decode(article_elem))
+        if list(expected.items()) != list(actual.items()):
+            mismatches += 1
+            print(f"Mismatch for PMID {expected.get('pmid')}:")
+            print(f"  xpath:   {expected}")
+            print(f"  decoder: {actual}")
+
+    print(f"Checked {len(articles)} fixture articles: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    xpath_rate = time_parser(xpath_parse, articles, args.repeat)
+    decoder_rate = time_parser(decoder.decode, articles, args.repeat)
+    projected = PubmedArticleDecoder(categorize, args.fields)
+    projected_rate = time_parser(projected.decode, articles, args.repeat)
+
+    print(f"XPath parser:        {xpath_rate:12,.0f} records/second")
+    print(f"Single-pass decoder: {decoder_rate:12,.0f} records/second")
+    print(f"Speedup:             {decoder_rate / xpath_rate:12.2f}x")
+    print(f"Projected decoder:   {projected_rate:12,.0f} records/second")
+    print(f"  fields: {', '.join(projected.fields)}")
+    print(f"Projection speedup:  {projected_rate / decoder_rate:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Article Store Benchmark
+Check that the columnar ArticleStore hands back exactly the records it was
+given, then compare its memory per record with a plain list of dicts on a
+large set of records decoded from the efetch fixtures
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from academic_article_scraper import AcademicArticleScraper
+from pubmed_parser import PubmedArticleDecoder, public_record
+from pubmed_store import ArticleStore
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture_records(paths: List[str]) -> List[Dict]:
+    """Decode all PubmedArticle elements of efetch XML fixtures, as stored"""
+    decoder = PubmedArticleDecoder(AcademicArticleScraper.category_matcher)
+    records = []
+    for path in paths:
+        for article_elem in ET.parse(path).getroot().findall("PubmedArticle"):
+            records.append(public_record(decoder.decode(article_elem)))
+    return records
+
+
+def make_record_texts(templates: List[Dict], count: int) -> List[str]:
+    """
+    Serialize count records cycling through the templates
+
+    Each copy gets its own PMID, URL and title, like distinct articles of
+    the same journals and authors.
+    """
+    texts = []
+    for i in range(count):
+        record = dict(templates[i % len(templates)])
+        pmid = str(40000000 + i)
+        record["pmid"] = pmid
+        if "url" in record:
+            record["url"] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+        if "title" in record:
+            record["title"] = f"{record['title']} ({i})"
+        texts.append(json.dumps(record, ensure_ascii=False))
+    return texts
+
+
+def measure(build: Callable, texts: List[str]):
+    """Return (container, bytes allocated, seconds) for building a container"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build(json.loads(text) for text in texts)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return container, allocated, elapsed
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Compare the memory use of the article store and a list of dicts"
+    )
+    parser.add_argument(
+        "--fixtures",
+        nargs="+",
+        default=[os.path.join(FIXTURE_DIR, "efetch_sample.xml")],
+        help="efetch XML files to use (default: bundled sample)",
+    )
+    parser.add_argument(
+        "--records",
+        type=int,
+        default=100000,
+        help="Number of records to store (default: 100000)",
+    )
+    args = parser.parse_args()
+
+    texts = make_record_texts(load_fixture_records(args.fixtures), args.records)
+
+    records, list_bytes, list_seconds = measure(list, texts)
+    store, store_bytes, store_seconds = measure(ArticleStore, texts)
+
+    # Records must come back identical, including field order
+    mismatches = 0
+    for expected, actual in zip(records, store):
+        if list(expected.items()) != list(actual.items()):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"Mismatch for PMID {expected.get('pmid')}:")
+                print(f"  stored:   {expected}")
+                print(f"  returned: {actual}")
+
+    print(f"Checked {len(records):,} records: {mismatches} mismatches")
+    if mismatches or len(store) != len(records):
+        sys.exit(1)
+
+    start = time.perf_counter()
+    for _ in store:
+        pass
+    iterate_seconds = time.perf_counter() - start
+
+    count = len(records)
+    print(
+        f"List of dicts:  {list_bytes / count:8.0f} bytes/record "
+        f"(built in {list_seconds:.2f}s)"
+    )
+    print(
+        f"Article store:  {store_bytes / count:8.0f} bytes/record "
+        f"(built in {store_seconds:.2f}s)"
+    )
+    print(f"  estimate:     {store.nbytes() / count:8.0f} bytes/record")
+    print(f"Memory saving:  {list_bytes / store_bytes:8.2f}x")
+    print(f"Row iteration:  {count / iterate_seconds:8,.0f} records/second")
+
+
+if __name__ == "__main__":
+    main()
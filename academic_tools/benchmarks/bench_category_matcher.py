@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MeSH Category Matcher Benchmark
+Check that the compiled MeshCategoryMatcher assigns the same categories as
+the previous per-call keyword scan, then compare their cost per article on
+a large synthetic set of MeSH term lists
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pubmed_categories import DEFAULT_CATEGORY_RULES, MeshCategoryMatcher
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Common MeSH descriptors mixed with the fixture terms
+EXTRA_TERMS = [
+    "Adult",
+    "Aged",
+    "Animals",
+    "Apoptosis",
+    "Arabidopsis",
+    "Arabidopsis Proteins",
+    "Bacterial Proteins",
+    "Brain",
+    "Cell Line, Tumor",
+    "Cell Proliferation",
+    "Cohort Studies",
+    "Disease Models, Animal",
+    "Escherichia coli",
+    "Gene Knockout Techniques",
+    "Hippocampus",
+    "Immunity, Innate",
+    "Mice",
+    "Mice, Inbred C57BL",
+    "Middle Aged",
+    "Mitochondria",
+    "Models, Molecular",
+    "Mutation",
+    "Neurons",
+    "Phylogeny",
+    "Protein Binding",
+    "Retrospective Studies",
+    "Risk Factors",
+    "Sequence Analysis, DNA",
+    "Treatment Outcome",
+    "Virus Replication",
+]
+
+
+def legacy_infer_category(
+    mesh_terms: List[str], rules: Dict[str, List[str]] = DEFAULT_CATEGORY_RULES
+) -> str:
+    """Reference implementation: rebuild the rules and scan every keyword per call"""
+    category_keywords = {
+        category: list(keywords) for category, keywords in rules.items()
+    }
+
+    mesh_text = " ".join(mesh_terms).lower()
+
+    # Score each category
+    category_scores = {}
+    for category, keywords in category_keywords.items():
+        score = 0
+        for keyword in keywords:
+            if keyword.lower() in mesh_text:
+                score += 1
+        if score > 0:
+            category_scores[category] = score
+
+    if category_scores:
+        # Return the category with the highest score
+        return max(category_scores, key=category_scores.get)
+
+    return "Other"
+
+
+def load_fixture_terms(paths: List[str]) -> List[str]:
+    """Collect the distinct MeSH descriptor names of efetch XML fixtures"""
+    terms = set()
+    for path in paths:
+        for descriptor in ET.parse(path).getroot().iter("DescriptorName"):
+            if descriptor.text:
+                terms.add(descriptor.text)
+    return sorted(terms)
+
+
+def make_articles(vocabulary: List[str], count: int, seed: int) -> List[List[str]]:
+    """Generate MeSH term lists of realistic length (0-15 terms)"""
+    rng = random.Random(seed)
+    return [
+        rng.sample(vocabulary, rng.randint(0, min(15, len(vocabulary))))
+        for _ in range(count)
+    ]
+
+
+def time_categorizer(categorize: Callable, articles: List[List[str]]) -> float:
+    """Return the microseconds per article spent by a categorizer"""
+    start = time.perf_counter()
+    for mesh_terms in articles:
+        categorize(mesh_terms)
+    return (time.perf_counter() - start) / len(articles) * 1e6
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Compare the compiled MeSH category matcher with the keyword scan"
+    )
+    parser.add_argument(
+        "--records",
+        type=int,
+        default=100000,
+        help="Number of synthetic articles (default: 100000)",
+    )
+    parser.add_argument(
+        "--fixtures",
+        nargs="+",
+        default=[os.path.join(FIXTURE_DIR, "efetch_sample.xml")],
+        help="efetch XML files providing MeSH terms (default: bundled sample)",
+    )
+    parser.add_argument(
+        "--rules", help="JSON or YAML category rules file (default: built-in rules)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="Random seed (default: 42)"
+    )
+    args = parser.parse_args()
+
+    if args.rules:
+        matcher = MeshCategoryMatcher.from_file(args.rules)
+    else:
+        matcher = MeshCategoryMatcher(DEFAULT_CATEGORY_RULES)
+
+    def legacy(mesh_terms):
+        return legacy_infer_category(mesh_terms, matcher.rules)
+
+    vocabulary = sorted(set(load_fixture_terms(args.fixtures)) | set(EXTRA_TERMS))
+    articles = make_articles(vocabulary, args.records, args.seed)
+
+    # Categories must be identical for every article
+    mismatches = 0
+    for mesh_terms in articles:
+        expected = legacy(mesh_terms)
+        actual = matcher(mesh_terms)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"Mismatch for {mesh_terms}: scan {expected}, matcher {actual}")
+
+    print(f"Checked {len(articles):,} articles: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    legacy_cost = time_categorizer(legacy, articles)
+    matcher_cost = time_categorizer(MeshCategoryMatcher(matcher.rules), articles)
+
+    print(f"Keyword scan:     {legacy_cost:8.2f} us/article")
+    print(f"Compiled matcher: {matcher_cost:8.2f} us/article (including cache warm-up)")
+    print(f"Speedup:          {legacy_cost / matcher_cost:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-End Scraper Benchmark
+Run AcademicArticleScraper against the local fake E-utilities server in a
+few configurations and report records/second, requests/second, peak RSS and
+the time spent searching, fetching, parsing, categorising and writing.
+Results are appended to a JSON file so that runs can be compared over time
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_eutils import FakeEUtilsServer, SyntheticCorpus
+
+# Scraper options of each benchmark configuration
+SCENARIOS = {
+    "efetch": {},
+    "efetch-stream": {"stream_parse": True},
+    "efetch-pool": {"parse_workers": 2},
+    "history": {"use_history": True},
+    "esummary": {"summary_only": True},
+}
+
+# Pipeline stages timed in each run
+STAGES = ("search", "fetch", "parse", "categorise", "write")
+
+
+class StageTimer:
+    """
+    Thread-safe accumulator of the time spent in each stage
+
+    Stages running in several threads at once add up their thread time,
+    so the stage totals can exceed the wall-clock time.
+    """
+
+    def __init__(self):
+        self.seconds = {stage: 0.0 for stage in STAGES}
+        self._lock = threading.Lock()
+        # Per-thread stage totals, to take nested stages out of their caller
+        self._thread = threading.local()
+
+    def wrap(self, stage: str, func: Callable, exclude: str = None) -> Callable:
+        """
+        Time every call of a function as a stage
+
+        Args:
+            stage: Stage name
+            func: Function to time
+            exclude: Stage timed inside func, whose time is not counted twice
+        """
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            totals = self._totals()
+            nested_before = totals.get(exclude, 0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                totals[stage] = totals.get(stage, 0.0) + elapsed
+                elapsed -= totals.get(exclude, 0.0) - nested_before
+                with self._lock:
+                    self.seconds[stage] += elapsed
+
+        return timed
+
+    def _totals(self) -> Dict[str, float]:
+        totals = getattr(self._thread, "totals", None)
+        if totals is None:
+            totals = self._thread.totals = {}
+        return totals
+
+
+def run_scenario(name: str, base_url: str, args: argparse.Namespace, results):
+    """
+    Run one configuration in this (fresh) process and report its figures
+
+    Args:
+        name: Scenario name (key of SCENARIOS)
+        base_url: Fake server URL
+        args: Benchmark options
+        results: Queue receiving the result dict
+    """
+    import academic_article_scraper
+    from academic_article_scraper import AcademicArticleScraper
+    from pubmed_client import RateLimiter
+    from pubmed_writers import CSVSink, JSONLinesSink
+
+    options = dict(SCENARIOS[name])
+    use_history = options.pop("use_history", False)
+    summary_only = options.pop("summary_only", False)
+
+    timer = StageTimer()
+    scraper = AcademicArticleScraper(
+        log_level="WARNING",
+        max_concurrency=args.concurrency,
+        keep_articles=False,
+        base_url=base_url,
+        **options,
+    )
+    # Measure the pipeline, not the NCBI politeness limit
+    scraper.client.rate_limiter = RateLimiter(args.rate, burst=args.concurrency)
+    scraper.client.request = timer.wrap("fetch", scraper.client.request)
+    scraper.decoder.categorize = timer.wrap("categorise", scraper.decoder.categorize)
+    scraper.decoder.decode = timer.wrap(
+        "parse", scraper.decoder.decode, exclude="categorise"
+    )
+    academic_article_scraper.decode_esummary_document = timer.wrap(
+        "parse", academic_article_scraper.decode_esummary_document
+    )
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        sinks = [
+            CSVSink(os.path.join(output_dir, "out.csv"), scraper.fields),
+            JSONLinesSink(os.path.join(output_dir, "out.jsonl")),
+        ]
+        for sink in sinks:
+            sink.write_batch = timer.wrap("write", sink.write_batch)
+
+        start = time.perf_counter()
+        search_start = time.perf_counter()
+        if use_history:
+            history = scraper.search_history(journals=["pnas"])
+            job = {"source": "history", "history": history, "mode": "efetch"}
+        else:
+            pmid_list = scraper.search_articles_sharded(journals=["pnas"])
+            job = {
+                "source": "pmids",
+                "pmids": pmid_list,
+                "mode": "esummary" if summary_only else "efetch",
+            }
+        timer.seconds["search"] = time.perf_counter() - search_start
+        # The search requests are part of the search stage only
+        timer.seconds["fetch"] = 0.0
+
+        scraper.fetch_job(job, sinks=sinks)
+        for sink in sinks:
+            sink.close()
+        elapsed = time.perf_counter() - start
+
+    stats = scraper.client.stats
+    scraper.close()
+    if options.get("parse_workers"):
+        # Parsing happens in the worker processes, out of reach of the timer
+        timer.seconds["parse"] = timer.seconds["categorise"] = None
+
+    results.put(
+        {
+            "scenario": name,
+            "records": scraper.record_count,
+            "seconds": round(elapsed, 3),
+            "records_per_second": round(scraper.record_count / elapsed, 1),
+            "requests": stats["requests"],
+            "requests_per_second": round(stats["requests"] / elapsed, 1),
+            "bytes_received": stats["bytes_received"],
+            # ru_maxrss is in KiB on Linux
+            "peak_rss_mib": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+            ),
+            "stages": {
+                stage: None if seconds is None else round(seconds, 3)
+                for stage, seconds in timer.seconds.items()
+            },
+        }
+    )
+
+
+def append_results(path: str, run: Dict):
+    """Append a benchmark run to a JSON file holding a list of runs"""
+    runs = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            runs = json.load(f)
+    runs.append(run)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=2)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scraper end to end against a fake E-utilities server"
+    )
+    parser.add_argument(
+        "--articles",
+        type=int,
+        default=5000,
+        help="Number of articles served (default: 5000)",
+    )
+    parser.add_argument(
+        "--abstract-words",
+        type=int,
+        default=200,
+        help="Average abstract length in words (default: 200)",
+    )
+    parser.add_argument(
+        "--authors", type=int, default=8, help="Average number of authors (default: 8)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Seconds added to each response (default: 0.02)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with HTTP 429 (default: 0)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Requests in flight (default: 3)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1000.0,
+        help="Client request rate limit per second (default: 1000)",
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="Configurations to run (default: all)",
+    )
+    parser.add_argument(
+        "--output",
+        default="bench_scraper_results.json",
+        help="JSON file the results are appended to (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.articles, args.abstract_words, args.authors)
+    # Every scenario runs in a fresh process for a clean peak RSS
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with FakeEUtilsServer(
+        corpus, latency=args.latency, error_rate=args.error_rate
+    ) as server:
+        for name in args.scenarios:
+            queue = context.Queue()
+            process = context.Process(
+                target=run_scenario, args=(name, server.base_url, args, queue)
+            )
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+
+            stages = "  ".join(
+                f"{stage} {'-' if seconds is None else f'{seconds:.2f}s'}"
+                for stage, seconds in result["stages"].items()
+            )
+            print(
+                f"{name:<14} {result['records']:>7} records "
+                f"{result['records_per_second']:>9,.0f} rec/s "
+                f"{result['requests_per_second']:>7,.1f} req/s "
+                f"{result['peak_rss_mib']:>7.1f} MiB peak RSS"
+            )
+            print(f"{'':<14} {stages}")
+
+    append_results(
+        args.output,
+        {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "options": {
+                key: getattr(args, key)
+                for key in (
+                    "articles",
+                    "abstract_words",
+                    "authors",
+                    "latency",
+                    "error_rate",
+                    "concurrency",
+                    "rate",
+                )
+            },
+            "results": results,
+        },
+    )
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
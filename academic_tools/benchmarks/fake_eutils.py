@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fake E-utilities Server
+Local stand-in for the NCBI esearch, efetch and esummary endpoints serving
+deterministic synthetic PubMed records of configurable size, with optional
+latency and throttling errors, so that the scraper can be exercised and
+benchmarked without touching NCBI
+
+Run it standalone and point the scraper at it:
+
+    python fake_eutils.py --port 8765 --articles 5000
+    python ../academic_article_scraper.py --base-url http://127.0.0.1:8765/ -j pnas
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+# First synthetic PMID
+FIRST_PMID = 30000000
+
+# Vocabulary of the generated records
+MESH_TERMS = [
+    "Animals",
+    "Apoptosis",
+    "Arabidopsis",
+    "Brain",
+    "Cell Proliferation",
+    "Gene Expression Regulation, Plant",
+    "Humans",
+    "Immunity, Innate",
+    "Mice",
+    "Mutation",
+    "Neoplasms",
+    "Oryza",
+    "Photosynthesis",
+    "Plant Proteins",
+    "Signal Transduction",
+    "Soil Microbiology",
+    "Virus Replication",
+]
+JOURNALS = [
+    (
+        "Proceedings of the National Academy of Sciences of the United States of America",
+        "Proc Natl Acad Sci U S A",
+    ),
+    ("Nature", "Nature"),
+    ("The Plant cell", "Plant Cell"),
+    ("Nucleic acids research", "Nucleic Acids Res"),
+]
+WORDS = (
+    "rice gene expression protein signal stress response pathway cell growth "
+    "regulation genome analysis plant root leaf development mechanism model"
+).split()
+MONTHS = [
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+]
+
+
+class SyntheticCorpus:
+    """
+    Deterministic set of synthetic articles: the same PMID always yields
+    the same record
+    """
+
+    def __init__(
+        self,
+        articles: int = 10000,
+        abstract_words: int = 200,
+        authors: int = 8,
+        first_year: int = 2000,
+        last_year: int = 2024,
+    ):
+        """
+        Initialize the corpus
+
+        Args:
+            articles: Number of articles
+            abstract_words: Average number of words per abstract
+            authors: Average number of authors per article
+            first_year: Earliest publication year
+            last_year: Latest publication year
+        """
+        self.pmids = [str(FIRST_PMID + i) for i in range(articles)]
+        self.abstract_words = abstract_words
+        self.authors = authors
+        self.first_year = first_year
+        self.last_year = last_year
+
+    def year(self, pmid: str) -> int:
+        """Publication year of an article (also its Entrez year)"""
+        span = self.last_year - self.first_year + 1
+        return self.first_year + int(pmid) % span
+
+    def search(self, term: str, params: Dict[str, str]) -> List[str]:
+        """
+        PMIDs matching a query, most recent first
+
+        Only the publication date range of the query and an Entrez date
+        (datetype=edat) window are applied; every article matches the rest.
+        """
+        low, high = self.first_year, self.last_year
+        match = re.search(
+            r'"(\d{4})/\d\d/\d\d"\[Date - Publication\] : "(\d{4})/\d\d/\d\d"', term
+        )
+        if match:
+            low, high = max(low, int(match.group(1))), min(high, int(match.group(2)))
+        if params.get("datetype") == "edat":
+            low = max(low, int(params.get("mindate", "0")[:4] or 0))
+            high = min(high, int(params.get("maxdate", "9999")[:4] or 9999))
+
+        pmids = [pmid for pmid in self.pmids if low <= self.year(pmid) <= high]
+        pmids.sort(key=lambda pmid: (-self.year(pmid), pmid))
+        return pmids
+
+    def _authors(self, rng: random.Random) -> List[Tuple[str, str, str]]:
+        count = max(1, int(rng.gauss(self.authors, self.authors / 3)))
+        return [
+            (
+                f"Author{rng.randrange(5000)}",
+                f"F{rng.randrange(50)}",
+                f"Department {rng.randrange(20)}, University {rng.randrange(200)}",
+            )
+            for _ in range(count)
+        ]
+
+    def _abstract(self, rng: random.Random) -> str:
+        count = max(1, int(rng.gauss(self.abstract_words, self.abstract_words / 4)))
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    def article_xml(self, pmid: str) -> str:
+        """PubmedArticle element of an article"""
+        rng = random.Random(int(pmid))
+        year = self.year(pmid)
+        journal, abbr = JOURNALS[int(pmid) % len(JOURNALS)]
+        month = MONTHS[rng.randrange(12)]
+        authors = "".join(
+            f"<Author><LastName>{last}</LastName><ForeName>{fore}</ForeName>"
+            f"<AffiliationInfo><Affiliation>{escape(affiliation)}</Affiliation>"
+            "</AffiliationInfo></Author>"
+            for last, fore, affiliation in self._authors(rng)
+        )
+        mesh = "".join(
+            f"<MeshHeading><DescriptorName>{escape(term)}</DescriptorName></MeshHeading>"
+            for term in rng.sample(MESH_TERMS, rng.randint(3, 12))
+        )
+        return (
+            f'<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">{pmid}</PMID>'
+            f"<Article><Journal><JournalIssue><Volume>{year - 1900}</Volume>"
+            f"<Issue>{rng.randint(1, 52)}</Issue><PubDate><Year>{year}</Year>"
+            f"<Month>{month}</Month></PubDate></JournalIssue>"
+            f"<Title>{escape(journal)}</Title><ISOAbbreviation>{abbr}</ISOAbbreviation></Journal>"
+            f"<ArticleTitle>Synthetic study {pmid} of {' '.join(rng.sample(WORDS, 6))}</ArticleTitle>"
+            f"<Pagination><MedlinePgn>{rng.randint(1, 9000)}</MedlinePgn></Pagination>"
+            f"<Abstract><AbstractText>{self._abstract(rng)}</AbstractText></Abstract>"
+            f"<AuthorList>{authors}</AuthorList>"
+            "<PublicationTypeList><PublicationType>Journal Article</PublicationType>"
+            "</PublicationTypeList></Article>"
+            f"<MeshHeadingList>{mesh}</MeshHeadingList></MedlineCitation>"
+            "<PubmedData><ArticleIdList>"
+            f'<ArticleId IdType="pubmed">{pmid}</ArticleId>'
+            f'<ArticleId IdType="doi">10.5555/fake.{pmid}</ArticleId>'
+            "</ArticleIdList></PubmedData></PubmedArticle>"
+        )
+
+    def summary(self, pmid: str) -> Dict:
+        """esummary document of an article"""
+        rng = random.Random(int(pmid))
+        year = self.year(pmid)
+        journal, abbr = JOURNALS[int(pmid) % len(JOURNALS)]
+        month = MONTHS[rng.randrange(12)]
+        return {
+            "uid": pmid,
+            "pubdate": f"{year} {month}",
+            "source": abbr,
+            "fulljournalname": journal,
+            "title": f"Synthetic study {pmid} of {' '.join(rng.sample(WORDS, 6))}",
+            "volume": str(year - 1900),
+            "issue": str(rng.randint(1, 52)),
+            "pages": str(rng.randint(1, 9000)),
+            "authors": [
+                {"name": f"{last} {fore}", "authtype": "Author"}
+                for last, fore, _ in self._authors(rng)
+            ],
+            "pubtype": ["Journal Article"],
+            "articleids": [
+                {"idtype": "pubmed", "value": pmid},
+                {"idtype": "doi", "value": f"10.5555/fake.{pmid}"},
+            ],
+        }
+
+
+class FakeEUtilsServer:
+    """
+    Threaded HTTP server answering esearch, efetch and esummary requests
+    from a SyntheticCorpus
+    """
+
+    def __init__(
+        self,
+        corpus: SyntheticCorpus,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        error_endpoints: Iterable[str] = None,
+    ):
+        """
+        Initialize the server (see start)
+
+        Args:
+            corpus: Articles to serve
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            latency: Seconds added to every response
+            error_rate: Fraction of requests answered with HTTP 429
+            seed: Seed of the error draws
+            error_endpoints: Endpoints the errors apply to, e.g. ["efetch"]
+                (None for all)
+        """
+        self.corpus = corpus
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_endpoints = (
+            {f"{name}.fcgi" for name in error_endpoints} if error_endpoints else None
+        )
+        self.stats = {"requests": 0, "errors": 0, "bytes_sent": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._history = {}
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                server._handle(self, url.path, parse_qs(url.query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8")
+                params = parse_qs(urlparse(self.path).query)
+                params.update(parse_qs(body))
+                server._handle(self, urlparse(self.path).path, params)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        """E-utilities base URL to give the scraper"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakeEUtilsServer":
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handle(self, handler, path: str, query: Dict[str, List[str]]):
+        params = {key: values[0] for key, values in query.items()}
+        endpoint = path.rsplit("/", 1)[-1]
+        with self._lock:
+            self.stats["requests"] += 1
+            throttled = (
+                self.error_rate
+                and (self.error_endpoints is None or endpoint in self.error_endpoints)
+                and self._rng.random() < self.error_rate
+            )
+            if throttled:
+                self.stats["errors"] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            return self._send(handler, 429, "Too Many Requests", "text/plain")
+
+        try:
+            if endpoint == "esearch.fcgi":
+                return self._send(handler, 200, self._esearch(params))
+            if endpoint == "efetch.fcgi":
+                return self._send(handler, 200, self._efetch(params))
+            if endpoint == "esummary.fcgi":
+                return self._send(
+                    handler, 200, self._esummary(params), "application/json"
+                )
+        except (KeyError, ValueError) as e:
+            return self._send(handler, 400, f"Bad request: {e}", "text/plain")
+        return self._send(handler, 404, "Not found", "text/plain")
+
+    def _send(self, handler, status: int, body: str, content_type: str = "text/xml"):
+        data = body.encode("utf-8")
+        with self._lock:
+            self.stats["bytes_sent"] += len(data)
+        handler.send_response(status)
+        handler.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+        handler.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            handler.send_header("Retry-After", "0")
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _esearch(self, params: Dict[str, str]) -> str:
+        pmids = self.corpus.search(params.get("term", ""), params)
+        if params.get("rettype") == "count":
+            return f"<eSearchResult><Count>{len(pmids)}</Count></eSearchResult>"
+
+        history = ""
+        if params.get("usehistory") == "y":
+            with self._lock:
+                query_key = str(len(self._history) + 1)
+                self._history[query_key] = pmids
+            history = f"<QueryKey>{query_key}</QueryKey><WebEnv>FAKE_WEBENV</WebEnv>"
+
+        start = int(params.get("retstart", 0))
+        page = pmids[start : start + int(params.get("retmax", 20))]
+        ids = "".join(f"<Id>{pmid}</Id>" for pmid in page)
+        return (
+            f"<eSearchResult><Count>{len(pmids)}</Count><RetMax>{len(page)}</RetMax>"
+            f"<RetStart>{start}</RetStart>{history}<IdList>{ids}</IdList></eSearchResult>"
+        )
+
+    def _requested_ids(self, params: Dict[str, str]) -> List[str]:
+        if "WebEnv" in params:
+            pmids = self._history[params["query_key"]]
+            start = int(params.get("retstart", 0))
+            return pmids[start : start + int(params.get("retmax", 20))]
+        return [pmid for pmid in params["id"].split(",") if pmid]
+
+    def _efetch(self, params: Dict[str, str]) -> str:
+        articles = "".join(
+            self.corpus.article_xml(pmid) for pmid in self._requested_ids(params)
+        )
+        return (
+            f'<?xml version="1.0" ?>\n<PubmedArticleSet>{articles}</PubmedArticleSet>'
+        )
+
+    def _esummary(self, params: Dict[str, str]) -> str:
+        pmids = self._requested_ids(params)
+        result = {"uids": pmids}
+        for pmid in pmids:
+            result[pmid] = self.corpus.summary(pmid)
+        return json.dumps({"result": result})
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Serve fake E-utilities locally")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--articles",
+        type=int,
+        default=10000,
+        help="Number of articles (default: 10000)",
+    )
+    parser.add_argument(
+        "--abstract-words",
+        type=int,
+        default=200,
+        help="Average abstract length in words (default: 200)",
+    )
+    parser.add_argument(
+        "--authors", type=int, default=8, help="Average number of authors (default: 8)"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to each response"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with HTTP 429 (default: 0)",
+    )
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.articles, args.abstract_words, args.authors)
+    server = FakeEUtilsServer(
+        corpus, args.host, args.port, args.latency, args.error_rate
+    )
+    print(f"Serving {args.articles} fake articles at {server.base_url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Served {server.stats['requests']} requests")
+
+
+if __name__ == "__main__":
+    main()
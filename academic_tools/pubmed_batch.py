@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Batch Query Runner
+Run many searches from one manifest in a single process: all searches share
+one HTTP session, rate limiter and record cache, overlapping results are
+fetched only once, and each query gets its own output plus a membership index
+"""
+
+import json
+import os
+import re
+from typing import Dict, List
+
+from pubmed_writers import ArticleSink
+
+# Try to import PyYAML for YAML query manifests
+try:
+    import yaml
+
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# Keys a query entry may use, besides its name
+QUERY_KEYS = {
+    "affiliations",
+    "journals",
+    "authors",
+    "keywords",
+    "date_from",
+    "date_to",
+    "max_results",
+    "sort_by",
+    "shard",
+}
+
+
+def load_query_manifest(path: str) -> List[Dict]:
+    """
+    Load the queries of a batch manifest
+
+    The manifest (YAML, or JSON) holds a "queries" list of search parameter
+    mappings as accepted by search_articles, each with an optional unique
+    "name", and optional "defaults" applied to every query:
+
+        defaults:
+          journals: [pnas, nature]
+          date_from: 2020/01/01
+          max_results: 1000
+        queries:
+          - name: hzau_rice
+            affiliations: Huazhong Agricultural University
+            keywords: [rice]
+
+    Args:
+        path: Manifest file (.yaml, .yml or .json)
+
+    Returns:
+        Queries with the defaults applied and a name set
+
+    Raises:
+        ImportError: If a YAML file is given and PyYAML is not installed
+        ValueError: If the manifest is malformed, or two query names give
+            the same output file names (see safe_filename)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            if not YAML_AVAILABLE:
+                raise ImportError(
+                    "PyYAML is required for YAML query manifests: pip install pyyaml"
+                )
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("queries"), list):
+        raise ValueError(f"{path} must contain a list of queries")
+
+    defaults = manifest.get("defaults") or {}
+    queries = []
+    names = set()
+    # Output file name part -> query name; compared case-insensitively, as
+    # on case-insensitive filesystems the files would still collide
+    filenames = {}
+    for i, entry in enumerate(manifest["queries"], 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Query {i} in {path} is not a mapping")
+
+        query = {**defaults, **entry}
+        name = str(query.pop("name", f"query{i}"))
+        unknown = set(query) - QUERY_KEYS
+        if unknown:
+            raise ValueError(
+                f"Unknown keys in query {name}: {', '.join(sorted(unknown))}"
+            )
+        if name in names:
+            raise ValueError(f"Duplicate query name in {path}: {name}")
+        names.add(name)
+        filename = safe_filename(name).lower()
+        if filename in filenames:
+            raise ValueError(
+                f"Queries {filenames[filename]!r} and {name!r} in {path} would "
+                f"write to the same output files; rename one of them"
+            )
+        filenames[filename] = name
+
+        query["name"] = name
+        queries.append(query)
+
+    return queries
+
+
+def safe_filename(name: str) -> str:
+    """Make a query name usable as part of a filename"""
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "query"
+
+
+class QueryRouter:
+    """
+    Sink-like fan-out writing each record to the outputs of every query
+    that found it
+
+    Records reach the per-query outputs in fetch order, which is the order of
+    the union of all queries.
+    """
+
+    def __init__(self, membership: Dict[str, List[str]]):
+        """
+        Initialize the router
+
+        Args:
+            membership: Query name -> PMIDs found by the query
+        """
+        self.sinks = {name: [] for name in membership}
+        self._queries_of = {}
+        for name, pmid_list in membership.items():
+            for pmid in pmid_list:
+                self._queries_of.setdefault(pmid, []).append(name)
+
+    def add_sink(self, name: str, sink: ArticleSink):
+        """Add an output of a query"""
+        self.sinks[name].append(sink)
+
+    def write_batch(self, records: List[Dict]):
+        """Split a batch by query and write each part to its outputs"""
+        parts = {}
+        for record in records:
+            for name in self._queries_of.get(record.get("pmid"), ()):
+                parts.setdefault(name, []).append(record)
+
+        for name, part in parts.items():
+            for sink in self.sinks[name]:
+                sink.write_batch(part)
+
+    def close(self):
+        """Close every per-query output"""
+        for sinks in self.sinks.values():
+            for sink in sinks:
+                sink.close()
+
+
+def run_query_batch(
+    scraper, queries: List[Dict], default_max_results: int = 500
+) -> Dict[str, List[str]]:
+    """
+    Run the searches of a batch
+
+    Args:
+        scraper: AcademicArticleScraper shared by all searches
+        queries: Queries from load_query_manifest
+        default_max_results: max_results of queries that do not set it
+
+    Returns:
+        Query name -> PMIDs found, in manifest order
+    """
+    membership = {}
+    for query in queries:
+        params = {key: value for key, value in query.items() if key in QUERY_KEYS}
+        shard = params.pop("shard", False)
+        max_results = params.pop("max_results", default_max_results)
+
+        scraper.logger.info(f"Running query {query['name']}")
+        if shard:
+            pmid_list = scraper.search_articles_sharded(
+                **params, max_results=max_results or None
+            )
+        else:
+            pmid_list = scraper.search_articles(**params, max_results=max_results)
+        membership[query["name"]] = pmid_list
+
+    return membership
+
+
+def union_pmids(membership: Dict[str, List[str]]) -> List[str]:
+    """Unique PMIDs of all queries, in order of first appearance"""
+    return list(dict.fromkeys(pmid for pmids in membership.values() for pmid in pmids))
+
+
+def save_membership_index(
+    filename: str, queries: List[Dict], membership: Dict[str, List[str]]
+):
+    """
+    Save which queries found which PMIDs
+
+    Args:
+        filename: Output JSON file
+        queries: Queries from load_query_manifest
+        membership: Result of run_query_batch
+    """
+    pmid_queries = {}
+    for name, pmid_list in membership.items():
+        for pmid in pmid_list:
+            pmid_queries.setdefault(pmid, []).append(name)
+
+    index = {
+        "queries": {
+            query["name"]: {
+                "parameters": {k: v for k, v in query.items() if k != "name"},
+                "count": len(membership[query["name"]]),
+                "pmids": membership[query["name"]],
+            }
+            for query in queries
+        },
+        "unique_pmids": len(pmid_queries),
+        "pmids": pmid_queries,
+    }
+
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
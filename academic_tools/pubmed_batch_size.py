@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Adaptive Batch Size
+AIMD controller of the number of records per efetch request: the batch grows
+while responses come back quickly and small, and is halved as soon as one is
+slow, too large or fails, so small records need fewer round-trips and heavy
+records stay clear of the read timeout
+"""
+
+import threading
+
+# Batch size of the first requests (the previous fixed size)
+INITIAL_BATCH_SIZE = 100
+
+
+class AdaptiveBatchSizer:
+    """
+    Thread-safe additive-increase/multiplicative-decrease batch size
+
+    Observations of concurrent requests may arrive in any order; each one
+    adjusts the size used for the batches planned from then on.
+    """
+
+    def __init__(
+        self,
+        initial: int = INITIAL_BATCH_SIZE,
+        minimum: int = 10,
+        maximum: int = 1000,
+        target_seconds: float = 5.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        increase: int = 50,
+        decrease: float = 0.5,
+    ):
+        """
+        Initialize the controller
+
+        Args:
+            initial: Size of the first batches
+            minimum: Smallest batch size
+            maximum: Largest batch size
+            target_seconds: Response time above which the batch is shrunk;
+                it grows while responses take less than half of it
+            max_bytes: Response size above which the batch is shrunk; it
+                grows while responses stay under half of it
+            increase: Records added after a fast, small response
+            decrease: Factor applied after a slow, large or failed response
+        """
+        if not 0 < minimum <= maximum:
+            raise ValueError("Batch size bounds must satisfy 0 < minimum <= maximum")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.increase = increase
+        self.decrease = decrease
+        self.initial = self._bounded(initial)
+        self._size = self.initial
+        self.smallest = self.largest = self._size
+        self.stats = {"grown": 0, "shrunk": 0, "observed": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Batch size to use for the next batch"""
+        return self._size
+
+    def _bounded(self, size: float) -> int:
+        return max(self.minimum, min(self.maximum, int(size)))
+
+    def observe(self, requested: int, seconds: float, nbytes: int):
+        """
+        Adjust the size after a successful request
+
+        Args:
+            requested: Number of records requested
+            seconds: Time until the response was fully received
+            nbytes: Size of the response body
+        """
+        with self._lock:
+            self.stats["observed"] += 1
+            if seconds > self.target_seconds or nbytes > self.max_bytes:
+                self._resize(self._size * self.decrease)
+            elif (
+                seconds < self.target_seconds / 2
+                and nbytes < self.max_bytes / 2
+                # Only grow once batches of the current size are seen
+                and requested >= self._size
+            ):
+                self._resize(self._size + self.increase)
+
+    def failure(self):
+        """Shrink the size after a request that failed despite retries"""
+        with self._lock:
+            self._resize(self._size * self.decrease)
+
+    def _resize(self, size: float):
+        size = self._bounded(size)
+        if size > self._size:
+            self.stats["grown"] += 1
+        elif size < self._size:
+            self.stats["shrunk"] += 1
+        self._size = size
+        self.smallest = min(self.smallest, size)
+        self.largest = max(self.largest, size)
+
+    def summary(self) -> str:
+        """One-line description of the sizes chosen"""
+        return (
+            f"started at {self.initial}, now {self._size} (range "
+            f"{self.smallest}-{self.largest}), grown {self.stats['grown']} "
+            f"and shrunk {self.stats['shrunk']} times over "
+            f"{self.stats['observed']} responses"
+        )
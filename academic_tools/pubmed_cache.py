@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Record Cache
+Persistent SQLite cache of parsed article records keyed by PMID, so that
+repeated runs only fetch records that are missing or older than the TTL
+
+Records fetched with a field projection are cached together with their field
+list, and only count as hits for requests that need a subset of those fields.
+Each record also carries the profile of the decoder that built it (list
+limits, category rules); a record built under another profile is stale.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK_SIZE = 500
+
+# Field list stored for records holding every field
+_ALL_FIELDS = "*"
+
+
+class RecordCache:
+    """
+    PMID-keyed store of parsed article records with a fetch timestamp
+    """
+
+    def __init__(self, path: str, ttl_hours: float = 168.0):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite database file (created if missing)
+            ttl_hours: Age in hours after which a cached record must be refetched
+        """
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "unchanged": 0,
+            "updated": 0,
+        }
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                pmid TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                fields TEXT NOT NULL DEFAULT '*',
+                profile TEXT NOT NULL DEFAULT ''
+            )
+            """)
+        # Databases created before field projection or decoder profiles lack
+        # those columns
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(records)")}
+        if "fields" not in columns:
+            self.conn.execute(
+                "ALTER TABLE records ADD COLUMN fields TEXT NOT NULL DEFAULT '*'"
+            )
+        if "profile" not in columns:
+            self.conn.execute(
+                "ALTER TABLE records ADD COLUMN profile TEXT NOT NULL DEFAULT ''"
+            )
+        self.conn.commit()
+
+    def lookup(
+        self,
+        pmid_list: Iterable[str],
+        fields: Optional[List[str]] = None,
+        profile: str = "",
+    ) -> Tuple[Dict[str, Dict], Set[str]]:
+        """
+        Look up records in the cache
+
+        Args:
+            pmid_list: PubMed IDs to look up
+            fields: Fields the records must contain (None for all fields)
+            profile: Decoder profile the records must have been built with
+
+        Returns:
+            Tuple of (fresh records by PMID, PMIDs that are missing or stale)
+        """
+        pmid_list = list(pmid_list)
+        cutoff = time.time() - self.ttl_seconds
+        wanted = set(fields) if fields else None
+        fresh = {}
+        stale = set()
+
+        for i in range(0, len(pmid_list), _QUERY_CHUNK_SIZE):
+            chunk = pmid_list[i : i + _QUERY_CHUNK_SIZE]
+            rows = self.conn.execute(
+                f"SELECT pmid, record, fetched_at, fields, profile FROM records "
+                f"WHERE pmid IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for pmid, record, fetched_at, stored_fields, stored_profile in rows:
+                # A narrower cached projection cannot serve this request
+                if stored_fields != _ALL_FIELDS and (
+                    wanted is None or not wanted <= set(stored_fields.split(","))
+                ):
+                    stale.add(pmid)
+                # Nor can a record decoded with other limits or category rules
+                elif stored_profile != profile:
+                    stale.add(pmid)
+                elif fetched_at >= cutoff:
+                    fresh[pmid] = json.loads(record)
+                else:
+                    stale.add(pmid)
+
+        missing = set(pmid_list) - fresh.keys()
+        self.stats["hits"] += len(fresh)
+        self.stats["stale"] += len(stale)
+        self.stats["misses"] += len(missing - stale)
+        return fresh, missing
+
+    def store(
+        self,
+        records: List[Dict],
+        fields: Optional[List[str]] = None,
+        profile: str = "",
+    ):
+        """
+        Insert or refresh records, revalidating previously cached versions
+
+        A refetched record whose content did not change only has its fetch
+        timestamp renewed; the counts of unchanged and updated records are
+        kept in the stats.
+
+        Args:
+            records: Parsed article records (records without a PMID are skipped)
+            fields: Fields the records were extracted with (None for all fields)
+            profile: Profile of the decoder that built the records
+        """
+        now = time.time()
+        stored_fields = ",".join(fields) if fields else _ALL_FIELDS
+        rows = []
+        for record in records:
+            pmid = record.get("pmid")
+            if not pmid:
+                continue
+            payload = json.dumps(record, ensure_ascii=False)
+            checksum = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+            rows.append((pmid, payload, checksum, now, stored_fields, profile))
+
+        if not rows:
+            return
+
+        previous = self._checksums([row[0] for row in rows])
+        for pmid, _, checksum, _, _, _ in rows:
+            if pmid in previous:
+                key = "unchanged" if previous[pmid] == checksum else "updated"
+                self.stats[key] += 1
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO records
+                    (pmid, record, checksum, fetched_at, fields, profile)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(pmid) DO UPDATE SET
+                    record = excluded.record,
+                    checksum = excluded.checksum,
+                    fetched_at = excluded.fetched_at,
+                    fields = excluded.fields,
+                    profile = excluded.profile
+                """,
+                rows,
+            )
+
+    def _checksums(self, pmid_list: List[str]) -> Dict[str, str]:
+        """Current checksums of cached records"""
+        checksums = {}
+        for i in range(0, len(pmid_list), _QUERY_CHUNK_SIZE):
+            chunk = pmid_list[i : i + _QUERY_CHUNK_SIZE]
+            rows = self.conn.execute(
+                f"SELECT pmid, checksum FROM records "
+                f"WHERE pmid IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            checksums.update(rows)
+        return checksums
+
+    def prune(self) -> int:
+        """
+        Delete records older than the TTL
+
+        Returns:
+            Number of deleted records
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM records WHERE fetched_at < ?", (cutoff,)
+            )
+        self.conn.execute("VACUUM")
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of looked-up PMIDs served from the cache"""
+        total = self.stats["hits"] + self.stats["stale"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def summary(self) -> str:
+        """One-line description of the cache activity so far"""
+        return (
+            f"{self.stats['hits']} hits, {self.stats['stale']} stale, "
+            f"{self.stats['misses']} misses (hit rate {self.hit_rate:.1%}); "
+            f"revalidated {self.stats['unchanged']} unchanged, "
+            f"{self.stats['updated']} updated"
+        )
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MeSH Category Matching
+Keyword rules assigning a subject category to an article from its MeSH
+terms, compiled once into a matcher that scores all categories in one pass
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, FrozenSet, List
+
+# Try to import PyYAML for YAML rule files
+try:
+    import yaml
+
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# Default rules: category -> keywords; ties go to the earlier category
+DEFAULT_CATEGORY_RULES = {
+    "Cell Biology": [
+        "Cell",
+        "Cellular",
+        "Protein",
+        "Gene Expression",
+        "Signal Transduction",
+        "Cell Division",
+        "Cell Cycle",
+        "Apoptosis",
+        "Mitochondria",
+        "Cytoplasm",
+    ],
+    "Plant Biology": [
+        "Plant",
+        "Plants",
+        "Arabidopsis",
+        "Rice",
+        "Crop",
+        "Agriculture",
+        "Photosynthesis",
+        "Plant Development",
+        "Chloroplast",
+        "Stomata",
+    ],
+    "Genetics": [
+        "Gene",
+        "Genetic",
+        "DNA",
+        "RNA",
+        "Chromosome",
+        "Mutation",
+        "Genome",
+        "Genotype",
+        "Phenotype",
+        "Allele",
+        "Heredity",
+    ],
+    "Biochemistry": [
+        "Enzyme",
+        "Metabolism",
+        "Biochemical",
+        "Metabolic",
+        "Biosynthesis",
+        "Catalysis",
+        "Substrate",
+        "Kinetics",
+        "Pathway",
+    ],
+    "Microbiology": [
+        "Bacteria",
+        "Virus",
+        "Microorganism",
+        "Pathogen",
+        "Infection",
+        "Antibiotic",
+        "Microbe",
+        "Bacterial",
+        "Viral",
+    ],
+    "Neuroscience": [
+        "Brain",
+        "Neuron",
+        "Neural",
+        "Behavior",
+        "Memory",
+        "Synaptic",
+        "Cognitive",
+        "Nervous System",
+        "Neurotransmitter",
+    ],
+    "Immunology": [
+        "Immune",
+        "Immunity",
+        "Antibody",
+        "T Cell",
+        "B Cell",
+        "Vaccine",
+        "Inflammatory",
+        "Cytokine",
+        "Immunotherapy",
+    ],
+    "Environmental Science": [
+        "Environment",
+        "Climate",
+        "Ecology",
+        "Pollution",
+        "Soil",
+        "Ecosystem",
+        "Conservation",
+        "Biodiversity",
+    ],
+    "Medicine": [
+        "Patient",
+        "Treatment",
+        "Therapy",
+        "Disease",
+        "Clinical",
+        "Diagnosis",
+        "Drug",
+        "Pharmaceutical",
+        "Medical",
+    ],
+    "Cancer Research": [
+        "Cancer",
+        "Tumor",
+        "Oncology",
+        "Carcinoma",
+        "Metastasis",
+        "Chemotherapy",
+        "Radiation",
+        "Neoplasm",
+    ],
+}
+
+# Distinct MeSH terms remembered before the term cache is reset
+_TERM_CACHE_SIZE = 100000
+
+
+class MeshCategoryMatcher:
+    """
+    Scores categories by how many of their keywords occur in the MeSH terms
+
+    A keyword matches when it is a case-insensitive substring of the MeSH
+    terms joined by spaces, and counts once per article for each category
+    listing it. The category with
+    the highest score wins, ties going to the category listed first; with
+    first_match, the first category with any matching keyword wins instead.
+
+    Articles share a small vocabulary of MeSH descriptors, so the keywords
+    contained in each distinct term are computed once and cached. Only the
+    few keywords containing a space can match across two adjacent terms;
+    just those are checked against the joined text.
+    """
+
+    def __init__(
+        self,
+        rules: Dict[str, List[str]],
+        default: str = "Other",
+        first_match: bool = False,
+    ):
+        """
+        Compile the matcher
+
+        Args:
+            rules: Category -> keywords, in order of precedence
+            default: Category of articles matching no keyword
+            first_match: Pick the first category with a matching keyword
+                rather than the best scoring one
+        """
+        self.rules = {category: list(keywords) for category, keywords in rules.items()}
+        self.default = default
+        self.first_match = first_match
+
+        self._keywords = []
+        self._keyword_categories = []
+        keyword_index = {}
+        for rank, (category, keywords) in enumerate(self.rules.items()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword not in keyword_index:
+                    keyword_index[keyword] = len(self._keywords)
+                    self._keywords.append(keyword)
+                    self._keyword_categories.append([])
+                self._keyword_categories[keyword_index[keyword]].append(rank)
+
+        self._categories = list(self.rules)
+        self._spanning = [
+            (i, keyword) for i, keyword in enumerate(self._keywords) if " " in keyword
+        ]
+        self._term_hits = {}
+
+    @classmethod
+    def from_file(cls, path: str, default: str = "Other") -> "MeshCategoryMatcher":
+        """
+        Load category rules from a JSON or YAML file
+
+        The file holds a mapping of category names to keyword lists, in
+        order of precedence.
+
+        Args:
+            path: Rule file (.json, .yaml or .yml)
+            default: Category of articles matching no keyword
+
+        Raises:
+            ImportError: If a YAML file is given and PyYAML is not installed
+            ValueError: If the file does not hold a category -> keywords mapping
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+                if not YAML_AVAILABLE:
+                    raise ImportError(
+                        "PyYAML is required for YAML rule files: pip install pyyaml"
+                    )
+                rules = yaml.safe_load(f)
+            else:
+                rules = json.load(f)
+
+        if not isinstance(rules, dict) or not all(
+            isinstance(keywords, list) for keywords in rules.values()
+        ):
+            raise ValueError(f"{path} must map category names to lists of keywords")
+        return cls(rules, default)
+
+    def digest(self) -> str:
+        """
+        Short hash of the rules, default category and matching mode
+
+        Two matchers with the same digest assign the same categories.
+        """
+        spec = json.dumps(
+            [list(self.rules.items()), self.default, self.first_match],
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12]
+
+    def _hits(self, term: str) -> FrozenSet[int]:
+        """Indices of the keywords contained in one MeSH term"""
+        hits = self._term_hits.get(term)
+        if hits is None:
+            if len(self._term_hits) >= _TERM_CACHE_SIZE:
+                self._term_hits = {}
+            lowered = term.lower()
+            hits = frozenset(
+                i for i, keyword in enumerate(self._keywords) if keyword in lowered
+            )
+            self._term_hits[term] = hits
+        return hits
+
+    def __call__(self, mesh_terms: List[str]) -> str:
+        """
+        Infer the category of an article
+
+        Args:
+            mesh_terms: MeSH descriptor names of the article
+
+        Returns:
+            Best scoring category, or the default category
+        """
+        found = set()
+        for term in mesh_terms:
+            found |= self._hits(term)
+
+        if len(mesh_terms) > 1 and self._spanning:
+            mesh_text = " ".join(mesh_terms).lower()
+            for i, keyword in self._spanning:
+                if i not in found and keyword in mesh_text:
+                    found.add(i)
+
+        if not found:
+            return self.default
+
+        if self.first_match:
+            first = min(rank for i in found for rank in self._keyword_categories[i])
+            return self._categories[first]
+
+        scores = [0] * len(self._categories)
+        for i in found:
+            for rank in self._keyword_categories[i]:
+                scores[rank] += 1
+
+        # max() keeps the first of equal scores, i.e. the earlier category
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return self._categories[best]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Harvest Checkpoints
+JSON manifest recording the progress of a long-running fetch, so that an
+interrupted job can resume at the first incomplete batch and append to its
+existing outputs without duplicating records
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List
+
+from pubmed_writers import ArticleSink
+
+MANIFEST_VERSION = 1
+
+
+class HarvestCheckpoint:
+    """
+    Resumable record of a fetch job: what to fetch, which batches are done
+    and how far each output file had been written when they were
+    """
+
+    def __init__(self, path: str, manifest: Dict):
+        """
+        Initialize the checkpoint (see create and load)
+
+        Args:
+            path: Manifest file
+            manifest: Manifest contents
+        """
+        self.path = path
+        self.manifest = manifest
+
+    @classmethod
+    def create(
+        cls, path: str, job: Dict, sinks: List[ArticleSink]
+    ) -> "HarvestCheckpoint":
+        """
+        Start a new job manifest
+
+        Args:
+            path: Manifest file (overwritten)
+            job: Everything needed to rerun the fetch: the source (PMID list
+                or history server WebEnv), fetch mode, fields and search query
+            sinks: Outputs of the job, in order
+
+        Returns:
+            The new checkpoint
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        checkpoint = cls(
+            path,
+            {
+                "version": MANIFEST_VERSION,
+                "created": now,
+                "updated": now,
+                "job": job,
+                "total_batches": None,
+                "completed_batches": [],
+                "complete": False,
+                "outputs": [
+                    {
+                        "format": sink.format,
+                        "path": sink.path,
+                        "compress": sink.compress,
+                        "offset": 0,
+                        "records": 0,
+                    }
+                    for sink in sinks
+                ],
+            },
+        )
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: str) -> "HarvestCheckpoint":
+        """
+        Read an existing manifest
+
+        Raises:
+            ValueError: If the manifest has an unsupported version
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {path}")
+        return cls(path, manifest)
+
+    @property
+    def job(self) -> Dict:
+        return self.manifest["job"]
+
+    @property
+    def complete(self) -> bool:
+        return self.manifest["complete"]
+
+    @property
+    def outputs(self) -> List[Dict]:
+        return self.manifest["outputs"]
+
+    def begin(self, total_batches: int) -> List[int]:
+        """
+        Register the batch count of the job and list the batches still to do
+
+        Args:
+            total_batches: Number of batches the job is split into
+
+        Returns:
+            Indices of the incomplete batches, in order
+
+        Raises:
+            ValueError: If the job was checkpointed with a different batch count
+        """
+        recorded = self.manifest["total_batches"]
+        if recorded is not None and recorded != total_batches:
+            raise ValueError(
+                f"Checkpoint {self.path} covers {recorded} batches, "
+                f"but the job now has {total_batches}"
+            )
+        self.manifest["total_batches"] = total_batches
+        completed = set(self.manifest["completed_batches"])
+        return [i for i in range(total_batches) if i not in completed]
+
+    def restore_sinks(self, sinks: List[ArticleSink]):
+        """
+        Reopen the outputs for appending at their last checkpointed offsets
+
+        Anything written after the last completed batch is truncated, so a
+        batch that was in flight when the job stopped is written only once.
+        """
+        for sink, output in zip(sinks, self.outputs):
+            sink.resume(output["offset"], output["records"])
+
+    def batch_done(self, index: int, sinks: List[ArticleSink]):
+        """
+        Mark a batch as completed once it has been written to every output
+
+        Args:
+            index: Batch index
+            sinks: Outputs of the job, in the order given to create
+        """
+        self.manifest["completed_batches"].append(index)
+        for sink, output in zip(sinks, self.outputs):
+            output["offset"] = sink.offset
+            output["records"] = sink.records_written
+        self.save()
+
+    def finish(self):
+        """Mark the job as complete if every batch was completed"""
+        completed = len(set(self.manifest["completed_batches"]))
+        self.manifest["complete"] = completed == self.manifest["total_batches"]
+        self.save()
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.manifest["updated"] = datetime.now().isoformat(timespec="seconds")
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
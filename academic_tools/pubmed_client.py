@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed E-utilities Client
+Shared networking layer for the PubMed scrapers: a pooled keep-alive session
+with compressed transfer, timeouts, retry/backoff and request rates kept
+within the NCBI E-utilities usage policy
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pubmed_metrics import MetricsRegistry
+from pubmed_replay import ResponseRecorder
+
+# NCBI allows 3 requests/second per host, or 10 requests/second with an API key
+NCBI_RATE_LIMIT = 3.0
+NCBI_RATE_LIMIT_WITH_KEY = 10.0
+
+# Token bucket shared by all scraper processes on the host
+DEFAULT_SHARED_RATE_LIMIT_PATH = os.environ.get(
+    "PUBMED_RATE_LIMIT_DB", os.path.join(tempfile.gettempdir(), "pubmed_ratelimit.db")
+)
+
+# Transient HTTP status codes worth retrying
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting the number of requests per second
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the rate limiter
+
+        Args:
+            rate: Tokens added per second (maximum sustained request rate)
+            burst: Maximum number of tokens that can accumulate while idle
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until it becomes available
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Reserve the token up front so concurrent callers queue up fairly
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SharedRateLimiter:
+    """
+    Token bucket shared through a SQLite file by every process using it
+
+    Concurrent scraper processes on one host (e.g. overlapping cron jobs)
+    then stay together within the NCBI per-host limit, while a process
+    running alone gets the whole rate. Each acquire takes the bucket in a
+    short write transaction, so callers queue up fairly across processes.
+    Requests made with an API key are limited per key rather than per host,
+    so each key has its own bucket.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        path: str = DEFAULT_SHARED_RATE_LIMIT_PATH,
+        bucket: str = "host",
+        burst: int = 1,
+        timeout: float = 60.0,
+    ):
+        """
+        Open or create the shared bucket
+
+        Args:
+            rate: Tokens added per second (maximum sustained request rate of
+                all processes together)
+            path: SQLite file holding the buckets (created if missing)
+            bucket: Name of the bucket, e.g. per API key
+            burst: Maximum number of tokens that can accumulate while idle
+            timeout: Seconds to wait for another process holding the file lock
+
+        Raises:
+            sqlite3.Error: If the file cannot be opened or created
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.path = path
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        # Transactions are managed explicitly, see acquire
+        self.conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """)
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until it becomes available
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        with self._lock:
+            # Wall-clock time, as monotonic clocks are not comparable
+            # between processes
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?",
+                    (self.bucket,),
+                ).fetchone()
+                if row is None:
+                    tokens = float(self.capacity)
+                else:
+                    tokens, updated = row
+                    tokens = min(
+                        self.capacity, tokens + max(0.0, now - updated) * self.rate
+                    )
+                # Reserve the token up front, as RateLimiter does
+                tokens -= 1
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    (self.bucket, tokens, max(now, row[1] if row else now)),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+def rate_limit_bucket(api_key: Optional[str] = None) -> str:
+    """
+    Name of the shared bucket for requests made with an API key (or none)
+
+    The key itself is not stored, only a digest identifying it.
+    """
+    if not api_key:
+        return "host"
+    return "api_key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that reports every newly opened connection, so that
+    keep-alive reuse can be measured
+    """
+
+    def __init__(self, on_new_connection, **kwargs):
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_cls, self._on_new_connection)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+def _counting_pool_class(pool_cls, on_new_connection):
+    """Derive a connection pool class that calls back on each new connection"""
+
+    class CountingConnectionPool(pool_cls):
+        def _new_conn(self):
+            on_new_connection()
+            return super()._new_conn()
+
+    CountingConnectionPool.__name__ = f"Counting{pool_cls.__name__}"
+    return CountingConnectionPool
+
+
+class PubMedClient:
+    """
+    Pooled HTTP client for the NCBI E-utilities
+    """
+
+    def __init__(
+        self,
+        rate_limiter: Union[RateLimiter, SharedRateLimiter],
+        params: Dict = None,
+        timeout: Union[float, Tuple[float, float]] = (10, 60),
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 60.0,
+        pool_size: int = 10,
+        logger: logging.Logger = None,
+        recorder: ResponseRecorder = None,
+        metrics: MetricsRegistry = None,
+    ):
+        """
+        Initialize the client
+
+        Args:
+            rate_limiter: Limiter consulted before every request attempt
+            params: Parameters added to every request (tool, email, api_key)
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+            max_retries: Maximum number of retries for transient failures
+            backoff_factor: Base delay in seconds for exponential backoff
+            max_backoff: Upper bound for a single backoff delay in seconds
+            pool_size: Maximum number of keep-alive connections per host
+            logger: Logger for retry messages
+            recorder: Raw response store that requests are replayed from
+                and recorded into, bypassing the rate limiter on replays
+            metrics: Registry receiving the rate limiter waits ("rate_limit"
+                stage), retry delays ("retry_backoff"), the time to the
+                response headers ("request") and the request_duration_seconds
+                histogram by endpoint
+        """
+        self.rate_limiter = rate_limiter
+        self.params = {k: v for k, v in (params or {}).items() if v}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.logger = logger or logging.getLogger(__name__)
+        self.recorder = recorder
+        self.metrics = metrics
+
+        self.stats = {
+            "requests": 0,
+            "new_connections": 0,
+            "retries": 0,
+            "failures": 0,
+            "bytes_received": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        adapter = _CountingHTTPAdapter(
+            self._count_new_connection, pool_connections=4, pool_maxsize=pool_size
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _count_new_connection(self):
+        self._increment("new_connections")
+
+    def _increment(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    @property
+    def reused_connections(self) -> int:
+        """Number of requests served over an already open connection"""
+        return max(0, self.stats["requests"] - self.stats["new_connections"])
+
+    def get(
+        self, url: str, params: Dict = None, stream: bool = False
+    ) -> requests.Response:
+        """Send a GET request (see request)"""
+        return self.request("GET", url, params=params, stream=stream)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Dict = None,
+        data: Dict = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """
+        Send a request, retrying transient failures with exponential backoff
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            params: Query string parameters
+            data: Form body parameters
+            stream: Leave the response body unread for incremental consumption
+
+        Returns:
+            Successful response; its sent_at is the perf_counter() time the
+            successful attempt was sent, after any rate limit wait and retry
+            delay, so that callers can time the HTTP exchange alone
+
+        Raises:
+            requests.RequestException: If the request still fails after all retries
+        """
+        params = {**self.params, **(params or {})}
+        if self.recorder is not None:
+            replayed = self.recorder.lookup(method, url, params, data)
+            if replayed is not None:
+                return replayed
+        attempt = 0
+        endpoint = url.rsplit("/", 1)[-1].replace(".fcgi", "")
+
+        while True:
+            waited = self.rate_limiter.acquire()
+            self._increment("requests")
+            if self.metrics is not None:
+                self.metrics.add_stage_time("rate_limit", waited)
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    data=data,
+                    timeout=self.timeout,
+                    stream=stream,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._increment("failures")
+                    raise
+                delay = self._backoff_delay(attempt)
+                self.logger.warning(
+                    f"Request failed ({e}), retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+            else:
+                if self.metrics is not None:
+                    elapsed = time.perf_counter() - start
+                    self.metrics.add_stage_time("request", elapsed)
+                    self.metrics.observe(
+                        "request_duration_seconds", elapsed, endpoint=endpoint
+                    )
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if not stream:
+                        self.count_bytes(response)
+                    if not response.ok:
+                        self._increment("failures")
+                    response.raise_for_status()
+                    if self.recorder is not None:
+                        self.recorder.record(method, url, params, data, response)
+                    response.sent_at = start
+                    return response
+
+                if attempt >= self.max_retries:
+                    self._increment("failures")
+                    response.raise_for_status()
+
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                self.logger.warning(
+                    f"HTTP {response.status_code} from {url}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+                response.close()
+
+            self._increment("retries")
+            if self.metrics is not None:
+                self.metrics.add_stage_time("retry_backoff", delay)
+            attempt += 1
+            time.sleep(delay)
+
+    def count_bytes(self, response: requests.Response):
+        """Add the bytes a consumed response pulled over the wire to the stats"""
+        if getattr(response, "replayed", False):
+            return
+        if response.raw is not None:
+            raw_bytes = response.raw.tell()
+        else:
+            raw_bytes = len(response.content or b"")
+        self._increment("bytes_received", raw_bytes)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with a little jitter"""
+        delay = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        return delay + random.uniform(0, self.backoff_factor / 2)
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Parse the Retry-After header (seconds or HTTP date)"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+                # Dates in -0000 or without a zone parse as naive; HTTP
+                # dates are in GMT
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+
+        return min(self.max_backoff, max(0.0, delay))
+
+    def summary(self) -> str:
+        """One-line description of the traffic sent so far"""
+        summary = (
+            f"{self.stats['requests']} requests, "
+            f"{self.reused_connections} on reused connections, "
+            f"{self.stats['retries']} retries, {self.stats['failures']} failures, "
+            f"{self.stats['bytes_received'] / 1024:.1f} KiB received"
+        )
+        if self.recorder is not None:
+            summary += f"; replay cache: {self.recorder.summary()}"
+        return summary
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Full-Text Search Index
+On-disk SQLite FTS5 index over the titles, abstracts and MeSH terms of
+harvested articles, updated batch by batch while fetching and queried
+offline with BM25 ranking, phrases and per-field filters
+"""
+
+import sqlite3
+from typing import Dict, List
+
+from pubmed_parser import FULL_LISTS
+
+# Indexed text fields, in FTS column order
+INDEXED_FIELDS = ("title", "abstract", "mesh_terms")
+
+# BM25 weight of each indexed field: title matches count most
+FIELD_WEIGHTS = (5.0, 1.0, 3.0)
+
+# Article fields shown with search results
+_RESULT_FIELDS = ("pmid", "title", "first_author", "journal", "year", "url")
+
+
+class ArticleSearchIndex:
+    """
+    Sink-like full-text index of article records
+
+    Records are keyed by PMID: writing an article again replaces its
+    entry, so indexing overlapping or resumed runs is idempotent. Query
+    strings use the FTS5 syntax: terms (implicitly ANDed), "exact phrases",
+    OR, NOT, prefix* searches and field filters such as title:rice or
+    mesh_terms:"Oryza sativa".
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create the index
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        self.path = path
+        self.records_written = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                {", ".join(INDEXED_FIELDS)},
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            )
+            """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                pmid INTEGER PRIMARY KEY,
+                title TEXT,
+                first_author TEXT,
+                journal TEXT,
+                year INTEGER,
+                url TEXT
+            )
+            """)
+        self.conn.commit()
+
+    def write_batch(self, records: List[Dict]):
+        """
+        Add or replace a batch of records in one transaction
+
+        Args:
+            records: Parsed article records; records without a numeric PMID
+                are skipped
+        """
+        rows = []
+        for record in records:
+            pmid = str(record.get("pmid", ""))
+            if pmid.isdigit():
+                rows.append((int(pmid), record))
+        if not rows:
+            return
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO articles_fts (rowid, "
+                f"{', '.join(INDEXED_FIELDS)}) VALUES (?, ?, ?, ?)",
+                [
+                    (pmid, *(_indexed_text(record, field) for field in INDEXED_FIELDS))
+                    for pmid, record in rows
+                ],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (pmid, *(record.get(field) for field in _RESULT_FIELDS[1:]))
+                    for pmid, record in rows
+                ],
+            )
+        self.records_written += len(rows)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Find the articles best matching a query
+
+        Args:
+            query: FTS5 query string
+            limit: Maximum number of results
+
+        Returns:
+            Matching articles by decreasing relevance, each with its BM25
+            score and an abstract snippet with the matches in [brackets]
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax
+        """
+        weights = ", ".join(str(weight) for weight in FIELD_WEIGHTS)
+        try:
+            rows = self.conn.execute(
+                f"""
+                SELECT a.pmid, a.title, a.first_author, a.journal, a.year, a.url,
+                       bm25(articles_fts, {weights}) AS score,
+                       snippet(articles_fts, 1, '[', ']', '...', 16)
+                FROM articles_fts
+                JOIN articles a ON a.pmid = articles_fts.rowid
+                WHERE articles_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+                """,
+                (query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {e}") from e
+
+        results = []
+        for row in rows:
+            result = dict(zip(_RESULT_FIELDS, row))
+            result["pmid"] = str(result["pmid"])
+            # SQLite's bm25() is negative; report the usual positive score
+            result["score"] = -row[6]
+            result["snippet"] = row[7]
+            results.append(result)
+        return results
+
+    def count(self, query: str) -> int:
+        """Return the number of articles matching a query"""
+        try:
+            return self.conn.execute(
+                "SELECT count(*) FROM articles_fts WHERE articles_fts MATCH ?",
+                (query,),
+            ).fetchone()[0]
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {e}") from e
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _indexed_text(record: Dict, field: str) -> str:
+    """Text of a field to index; lists cut to a limit are indexed in full"""
+    full_list = record.get(FULL_LISTS, {}).get(field)
+    if full_list:
+        return "; ".join(full_list)
+    return record.get(field) or ""
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Scraper Metrics
+Stage timers, counters and histograms collected while a harvest runs, and
+their export as JSON or Prometheus text, at the end of the run and
+optionally at a fixed interval during it
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Tuple
+
+# Export formats of the metrics file
+METRIC_FORMATS = ("json", "prometheus")
+
+# Name prefix of the exported Prometheus metrics
+METRIC_PREFIX = "pubmed_scraper"
+
+# Histogram bucket upper bounds, by histogram name
+HISTOGRAM_BUCKETS = {
+    "request_duration_seconds": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    "batch_size": (1, 10, 50, 100, 200, 500, 1000, 2000, 5000, 10000),
+    "efetch_batch_size": (10, 25, 50, 100, 200, 300, 500, 750, 1000),
+}
+
+# Help text of the exported metrics
+METRIC_HELP = {
+    "stage_seconds_total": "Time spent in each pipeline stage (summed over threads)",
+    "stage_calls_total": "Number of timed calls of each pipeline stage",
+    "request_duration_seconds": "Duration of E-utilities HTTP requests",
+    "batch_size": "Records per fetched batch",
+    "efetch_batch_size": "Records requested per efetch request",
+}
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values
+    """
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        """
+        Initialize the histogram
+
+        Args:
+            buckets: Increasing bucket upper bounds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Add one value"""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """(upper bound, number of values <= bound) for every bucket"""
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of the metrics of one scraper
+
+    Stages (search, request, rate_limit, parse, categorise, write, ...)
+    accumulate time and call counts; stages may nest, e.g. parse includes
+    categorise and search includes its requests.
+    Counters kept elsewhere (HTTP client, caches) are read through
+    collectors when a snapshot is taken.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+    @contextmanager
+    def time(self, stage: str):
+        """Context manager adding the time spent in its block to a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(stage, time.perf_counter() - start)
+
+    def add_stage_time(self, stage: str, seconds: float, calls: int = 1):
+        """Add time measured elsewhere to a stage"""
+        with self._lock:
+            totals = self._stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """Add a value to a histogram (buckets from HISTOGRAM_BUCKETS)"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(
+                    HISTOGRAM_BUCKETS.get(name, HISTOGRAM_BUCKETS["batch_size"])
+                )
+            histogram.observe(value)
+
+    def add_collector(self, collect: Callable[[], Dict[str, float]]):
+        """
+        Register a function returning counters maintained elsewhere
+
+        Args:
+            collect: Returns counter name -> current value
+        """
+        self._collectors.append(collect)
+
+    def _collected(self) -> Dict[str, float]:
+        counters = {}
+        for collect in self._collectors:
+            counters.update(collect())
+        return counters
+
+    def snapshot(self) -> Dict:
+        """Current values of all metrics as a JSON-serializable dict"""
+        counters = self._collected()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                counters[_labelled(name, labels)] = value
+            histograms = {
+                _labelled(name, labels): {
+                    "count": histogram.count,
+                    "sum": round(histogram.sum, 6),
+                    "buckets": {
+                        str(bound): count for bound, count in histogram.cumulative()
+                    },
+                }
+                for (name, labels), histogram in sorted(self._histograms.items())
+            }
+            stages = {
+                stage: {"seconds": round(seconds, 6), "calls": calls}
+                for stage, (seconds, calls) in sorted(self._stages.items())
+            }
+
+        return {
+            "timestamp": time.time(),
+            "elapsed_seconds": round(time.time() - self.started, 3),
+            "stages": stages,
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_json(self) -> str:
+        """Snapshot in JSON"""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format"""
+        lines = []
+
+        def header(name: str, kind: str):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        header("elapsed_seconds", "gauge")
+        lines.append(
+            f"{METRIC_PREFIX}_elapsed_seconds {time.time() - self.started:.3f}"
+        )
+
+        for name, index in (("stage_seconds_total", 0), ("stage_calls_total", 1)):
+            header(name, "counter")
+            for stage, totals in stages:
+                lines.append(
+                    f'{METRIC_PREFIX}_{name}{{stage="{stage}"}} {totals[index]:g}'
+                )
+
+        for name, value in sorted(self._collected().items()):
+            header(name, "counter")
+            lines.append(f"{METRIC_PREFIX}_{name} {value:g}")
+
+        previous = None
+        for (name, labels), value in counters:
+            if name != previous:
+                header(name, "counter")
+                previous = name
+            lines.append(f"{METRIC_PREFIX}_{name}{_label_text(labels)} {value:g}")
+
+        previous = None
+        for (name, labels), histogram in histograms:
+            if name != previous:
+                header(name, "histogram")
+                previous = name
+            for bound, count in histogram.cumulative():
+                bucket_labels = labels + (("le", f"{bound:g}"),)
+                lines.append(
+                    f"{METRIC_PREFIX}_{name}_bucket{_label_text(bucket_labels)} {count}"
+                )
+            lines.append(
+                f"{METRIC_PREFIX}_{name}_bucket"
+                f"{_label_text(labels + (('le', '+Inf'),))} {histogram.count}"
+            )
+            lines.append(
+                f"{METRIC_PREFIX}_{name}_sum{_label_text(labels)} {histogram.sum:g}"
+            )
+            lines.append(
+                f"{METRIC_PREFIX}_{name}_count{_label_text(labels)} {histogram.count}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, format: str = "json"):
+        """
+        Write a snapshot to a file atomically
+
+        Args:
+            path: Output file
+            format: "json" or "prometheus"
+        """
+        text = self.to_prometheus() if format == "prometheus" else self.to_json()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+
+class MetricsReporter:
+    """
+    Background thread writing metrics snapshots at a fixed interval
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: str,
+        format: str = "json",
+        interval: float = 0.0,
+    ):
+        """
+        Initialize the reporter
+
+        Args:
+            registry: Metrics to report
+            path: Output file, rewritten with every snapshot
+            format: "json" or "prometheus"
+            interval: Seconds between snapshots (0 only writes on stop)
+        """
+        self.registry = registry
+        self.path = path
+        self.format = format
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> "MetricsReporter":
+        """Start the periodic snapshots, if an interval is set"""
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.registry.write(self.path, self.format)
+
+    def stop(self):
+        """Stop the periodic snapshots and write the final one"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.registry.write(self.path, self.format)
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _labelled(name: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+    """JSON key of a labelled metric, in Prometheus notation"""
+    return name + _label_text(labels)
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed XML Parsing Helpers
+Incremental parsing of efetch responses, so that memory use depends on the
+size of one article rather than the size of a whole batch
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# All fields of an article record, in output order
+ARTICLE_FIELDS = [
+    "pmid",
+    "title",
+    "first_author",
+    "last_author",
+    "author_count",
+    "authors",
+    "journal",
+    "journal_abbr",
+    "volume",
+    "issue",
+    "pages",
+    "year",
+    "publication_date",
+    "category",
+    "mesh_terms",
+    "abstract",
+    "abstract_length",
+    "doi",
+    "pmc",
+    "affiliations",
+    "affiliation_count",
+    "publication_types",
+    "url",
+]
+
+# Record fields derived from each source section of a PubmedArticle
+_AUTHOR_FIELDS = {"authors", "first_author", "last_author", "author_count"}
+_AFFILIATION_FIELDS = {"affiliations", "affiliation_count"}
+_JOURNAL_FIELDS = {
+    "journal",
+    "journal_abbr",
+    "volume",
+    "issue",
+    "year",
+    "publication_date",
+}
+_ABSTRACT_FIELDS = {"abstract", "abstract_length"}
+_MESH_FIELDS = {"mesh_terms", "category"}
+
+# Default number of MeSH terms and of (distinct) affiliations kept per record
+MESH_TERM_LIMIT = 10
+AFFILIATION_LIMIT = 5
+
+# Record key holding the complete author, affiliation and MeSH term lists
+# behind the joined (and possibly cut) fields, for outputs that store every
+# element; text outputs leave it out
+FULL_LISTS = "_full_lists"
+
+# Version of the decoded record layout, bumped when records of the same
+# fields change shape so that cached records are decoded again
+DECODER_VERSION = 2
+
+
+def normalize_fields(fields: Iterable[str] = None) -> List[str]:
+    """
+    Validate a field projection and put it in output order
+
+    The PMID is always included, as records are keyed by it.
+
+    Args:
+        fields: Requested record fields (None for all fields)
+
+    Returns:
+        Requested fields in ARTICLE_FIELDS order
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return list(ARTICLE_FIELDS)
+
+    unknown = set(fields) - set(ARTICLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown article fields: {', '.join(sorted(unknown))}")
+
+    wanted = set(fields) | {"pmid"}
+    return [field for field in ARTICLE_FIELDS if field in wanted]
+
+
+def project_record(record: Dict, fields: List[str]) -> Dict:
+    """Keep only the projected fields of a record (and of its full lists)"""
+    if len(fields) == len(ARTICLE_FIELDS):
+        return record
+    projected = {key: value for key, value in record.items() if key in fields}
+    full_lists = {
+        key: value for key, value in record.get(FULL_LISTS, {}).items() if key in fields
+    }
+    if full_lists:
+        projected[FULL_LISTS] = full_lists
+    return projected
+
+
+def public_record(record: Dict) -> Dict:
+    """A record without its FULL_LISTS, as written to text outputs"""
+    if FULL_LISTS not in record:
+        return record
+    return {key: value for key, value in record.items() if key != FULL_LISTS}
+
+
+def iter_pubmed_articles(
+    chunks: Iterable[bytes], tag: str = "PubmedArticle"
+) -> Iterator[ET.Element]:
+    """
+    Incrementally parse an efetch XML body and yield each article as it closes
+
+    Every yielded element is cleared (and detached from the document root)
+    as soon as the caller asks for the next one, so it must be fully processed
+    before iteration continues.
+
+    Args:
+        chunks: Iterable of raw XML byte chunks, e.g. response.iter_content()
+        tag: Tag name of the record elements to yield
+
+    Yields:
+        Complete record elements in document order
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the body is not well-formed XML
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+
+    def read_records():
+        nonlocal root
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+            elif elem.tag == tag:
+                yield elem
+                elem.clear()
+                # Drop the emptied shells collected under the document root
+                if root is not None and root is not elem:
+                    root.clear()
+
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from read_records()
+
+    parser.close()
+    yield from read_records()
+
+
+def _element_text(elem: ET.Element) -> str:
+    """All text inside an element (markup such as <i> removed), stripped"""
+    text = "".join(elem.itertext())
+    if elem.tail:
+        text += elem.tail
+    return text.strip()
+
+
+class PubmedArticleDecoder:
+    """
+    Single-pass decoder turning a PubmedArticle element into a record dict
+
+    The article tree is walked once from the top: every container dispatches
+    its children on tag name, and only the branches that hold wanted fields
+    are entered. Compared with a series of ``.//`` searches this avoids
+    rescanning the subtree per field, and fields are only taken from their
+    documented location (e.g. Volume and Issue from the JournalIssue).
+
+    With a field projection, sections that only feed unrequested fields are
+    skipped entirely, and unrequested fields are never joined or categorised.
+    """
+
+    def __init__(
+        self,
+        categorize: Callable[[List[str]], str] = None,
+        fields: Iterable[str] = None,
+        mesh_term_limit: int = MESH_TERM_LIMIT,
+        affiliation_limit: int = AFFILIATION_LIMIT,
+    ):
+        """
+        Initialize the decoder
+
+        Args:
+            categorize: Function inferring a subject category from MeSH terms
+                (always given every MeSH term)
+            fields: Record fields to extract (None for all, see ARTICLE_FIELDS)
+            mesh_term_limit: Number of leading MeSH terms kept in mesh_terms
+            affiliation_limit: Number of leading affiliations whose distinct
+                values are kept in affiliations
+        """
+        self.categorize = categorize
+        self.fields = normalize_fields(fields)
+        self.mesh_term_limit = mesh_term_limit
+        self.affiliation_limit = affiliation_limit
+        want = self._want = set(self.fields)
+
+        self._want_authors = bool(want & _AUTHOR_FIELDS)
+        self._want_affiliations = bool(want & _AFFILIATION_FIELDS)
+
+        # Only dispatch to the sections that feed a requested field
+        citation_handlers = {
+            "PMID": self._decode_pmid,
+            "Article": self._decode_article,
+        }
+        if want & _MESH_FIELDS:
+            citation_handlers["MeshHeadingList"] = self._decode_mesh_heading_list
+        if want & _ABSTRACT_FIELDS:
+            citation_handlers["OtherAbstract"] = self._decode_other_abstract
+        if self._want_affiliations:
+            citation_handlers["InvestigatorList"] = self._decode_investigator_list
+
+        article_handlers = {}
+        if want & _JOURNAL_FIELDS:
+            article_handlers["Journal"] = self._decode_journal
+        if "title" in want:
+            article_handlers["ArticleTitle"] = self._decode_article_title
+        if "pages" in want:
+            article_handlers["Pagination"] = self._decode_pagination
+        if want & {"doi", "pmc"}:
+            article_handlers["ELocationID"] = self._decode_elocation_id
+        if want & _ABSTRACT_FIELDS:
+            article_handlers["Abstract"] = self._decode_abstract
+        if self._want_authors or self._want_affiliations:
+            article_handlers["AuthorList"] = self._decode_author_list
+        if "publication_types" in want:
+            article_handlers["PublicationTypeList"] = self._decode_publication_type_list
+
+        self._citation_handlers = citation_handlers
+        self._article_handlers = article_handlers
+
+    def decode(self, article_elem: ET.Element) -> Dict:
+        """
+        Decode one PubmedArticle element
+
+        Args:
+            article_elem: PubmedArticle element
+
+        Returns:
+            Article record with its fields in a fixed order, plus the
+            complete authors, distinct affiliations and MeSH terms of the
+            requested list fields under FULL_LISTS
+        """
+        state = {
+            "authors": [],
+            "affiliations": [],
+            "mesh_terms": [],
+            "publication_types": [],
+        }
+
+        for section in article_elem:
+            if section.tag == "MedlineCitation":
+                handlers = self._citation_handlers
+                for child in section:
+                    handler = handlers.get(child.tag)
+                    if handler is not None:
+                        handler(child, state)
+
+        return self._build_record(state)
+
+    # MedlineCitation children
+
+    def _decode_pmid(self, elem: ET.Element, state: Dict):
+        state.setdefault("pmid", elem.text)
+
+    def _decode_article(self, elem: ET.Element, state: Dict):
+        handlers = self._article_handlers
+        for child in elem:
+            handler = handlers.get(child.tag)
+            if handler is not None:
+                handler(child, state)
+
+    def _decode_mesh_heading_list(self, elem: ET.Element, state: Dict):
+        mesh_terms = state["mesh_terms"]
+        for heading in elem:
+            for child in heading:
+                if child.tag == "DescriptorName" and child.text:
+                    mesh_terms.append(child.text)
+
+    def _decode_other_abstract(self, elem: ET.Element, state: Dict):
+        # Only used when the article itself carries no abstract
+        self._decode_abstract(elem, state)
+
+    def _decode_investigator_list(self, elem: ET.Element, state: Dict):
+        for investigator in elem:
+            for child in investigator:
+                if child.tag == "AffiliationInfo":
+                    self._decode_affiliation_info(child, state)
+
+    # Article children
+
+    def _decode_journal(self, elem: ET.Element, state: Dict):
+        for child in elem:
+            tag = child.tag
+            if tag == "JournalIssue":
+                for issue_child in child:
+                    issue_tag = issue_child.tag
+                    if issue_tag == "Volume":
+                        state.setdefault("volume", issue_child.text)
+                    elif issue_tag == "Issue":
+                        state.setdefault("issue", issue_child.text)
+                    elif issue_tag == "PubDate" and "pub_date" not in state:
+                        state["pub_date"] = {
+                            date_child.tag: date_child.text
+                            for date_child in issue_child
+                        }
+            elif tag == "Title":
+                state.setdefault("journal", child.text)
+            elif tag == "ISOAbbreviation":
+                state.setdefault("journal_abbr", child.text)
+
+    def _decode_article_title(self, elem: ET.Element, state: Dict):
+        if "title" not in state:
+            state["title"] = _element_text(elem)
+
+    def _decode_pagination(self, elem: ET.Element, state: Dict):
+        for child in elem:
+            if child.tag == "MedlinePgn":
+                state.setdefault("pages", child.text)
+                break
+
+    def _decode_elocation_id(self, elem: ET.Element, state: Dict):
+        id_type = elem.get("EIdType")
+        if id_type in ("doi", "pmc"):
+            state.setdefault(id_type, elem.text)
+
+    def _decode_abstract(self, elem: ET.Element, state: Dict):
+        if "abstract" in state:
+            return
+        for child in elem:
+            if child.tag == "AbstractText":
+                state["abstract"] = _element_text(child)
+                break
+
+    def _decode_author_list(self, elem: ET.Element, state: Dict):
+        authors = state["authors"]
+        want_authors = self._want_authors
+        want_affiliations = self._want_affiliations
+        for author in elem:
+            lastname = forename = None
+            for child in author:
+                tag = child.tag
+                if tag == "LastName":
+                    lastname = child.text
+                elif tag == "ForeName":
+                    forename = child.text
+                elif tag == "AffiliationInfo" and want_affiliations:
+                    self._decode_affiliation_info(child, state)
+            if want_authors and lastname is not None:
+                authors.append(f"{forename} {lastname}" if forename else lastname)
+
+    def _decode_affiliation_info(self, elem: ET.Element, state: Dict):
+        for child in elem:
+            if child.tag == "Affiliation" and child.text:
+                state["affiliations"].append(child.text)
+
+    def _decode_publication_type_list(self, elem: ET.Element, state: Dict):
+        publication_types = state["publication_types"]
+        for child in elem:
+            if child.text:
+                publication_types.append(child.text)
+
+    def _build_record(self, state: Dict) -> Dict:
+        """Assemble the collected values of the requested fields into a record"""
+        want = self._want
+        record = {}
+        full_lists = {}
+
+        pmid = state.get("pmid")
+        if pmid is not None:
+            record["pmid"] = pmid
+            if "url" in want:
+                record["url"] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+
+        if "title" in state:
+            record["title"] = state["title"]
+
+        authors = state["authors"]
+        if authors:
+            if "authors" in want:
+                record["authors"] = "; ".join(authors)
+                full_lists["authors"] = authors
+            if "first_author" in want:
+                record["first_author"] = authors[0]
+            if "last_author" in want:
+                record["last_author"] = authors[-1]
+            if "author_count" in want:
+                record["author_count"] = len(authors)
+
+        for key in ("journal", "journal_abbr", "volume", "issue", "pages"):
+            if key in state and key in want:
+                record[key] = state[key]
+
+        pub_date = state.get("pub_date")
+        if pub_date is not None:
+            date_parts = []
+            year = pub_date.get("Year")
+            if "Year" in pub_date:
+                date_parts.append(year)
+                if "year" in want:
+                    record["year"] = int(year)
+            for key in ("Month", "Day"):
+                if key in pub_date:
+                    date_parts.append(pub_date[key])
+            if date_parts and "publication_date" in want:
+                record["publication_date"] = " ".join(date_parts)
+
+        if "abstract" in state:
+            if "abstract" in want:
+                record["abstract"] = state["abstract"]
+            if "abstract_length" in want:
+                record["abstract_length"] = len(state["abstract"])
+
+        mesh_terms = state["mesh_terms"]
+        if mesh_terms:
+            if "mesh_terms" in want:
+                record["mesh_terms"] = "; ".join(mesh_terms[: self.mesh_term_limit])
+                full_lists["mesh_terms"] = mesh_terms
+            if "category" in want and self.categorize is not None:
+                record["category"] = self.categorize(mesh_terms)
+
+        for key in ("doi", "pmc"):
+            if key in state and key in want:
+                record[key] = state[key]
+
+        affiliations = state["affiliations"]
+        if affiliations:
+            if "affiliations" in want:
+                # Distinct affiliations in document order, so output is reproducible
+                # Affiliations may contain "; " themselves, so only the list
+                # tells them apart
+                record["affiliations"] = "; ".join(
+                    dict.fromkeys(affiliations[: self.affiliation_limit])
+                )
+                full_lists["affiliations"] = list(dict.fromkeys(affiliations))
+            if "affiliation_count" in want:
+                record["affiliation_count"] = len(set(affiliations))
+
+        if state["publication_types"]:
+            record["publication_types"] = "; ".join(state["publication_types"])
+
+        if full_lists:
+            record[FULL_LISTS] = full_lists
+        return record
+
+
+def decode_esummary_document(doc: Dict) -> Dict:
+    """
+    Map an esummary (version 2.0 JSON) document onto the article record schema
+
+    esummary carries no abstract, MeSH terms or affiliations, so those fields
+    (and the MeSH-based category) are left out. Author names come in the
+    "Lastname Initials" form used by esummary.
+
+    Args:
+        doc: One document from the esummary "result" object
+
+    Returns:
+        Article record with its fields in the same order as decoded efetch records
+    """
+    record = {}
+
+    pmid = doc.get("uid")
+    if pmid:
+        record["pmid"] = pmid
+        record["url"] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+
+    if doc.get("title"):
+        record["title"] = doc["title"]
+
+    authors = [
+        author["name"]
+        for author in doc.get("authors", [])
+        if author.get("name") and author.get("authtype", "Author") == "Author"
+    ]
+    if authors:
+        record["authors"] = "; ".join(authors)
+        record["first_author"] = authors[0]
+        record["last_author"] = authors[-1]
+        record["author_count"] = len(authors)
+
+    for key, field in (
+        ("journal", "fulljournalname"),
+        ("journal_abbr", "source"),
+        ("volume", "volume"),
+        ("issue", "issue"),
+        ("pages", "pages"),
+    ):
+        if doc.get(field):
+            record[key] = doc[field]
+
+    pubdate = doc.get("pubdate", "")
+    if pubdate[:4].isdigit():
+        record["year"] = int(pubdate[:4])
+    if pubdate:
+        record["publication_date"] = pubdate
+
+    article_ids = {
+        article_id.get("idtype"): article_id.get("value")
+        for article_id in doc.get("articleids", [])
+    }
+    if article_ids.get("doi"):
+        record["doi"] = article_ids["doi"]
+    if article_ids.get("pmc"):
+        record["pmc"] = article_ids["pmc"]
+
+    if doc.get("pubtype"):
+        record["publication_types"] = "; ".join(doc["pubtype"])
+
+    return record
+
+
+# Decoder of a parser worker process (see init_parse_worker)
+_worker_decoder = None
+
+
+def init_parse_worker(
+    categorize: Callable[[List[str]], str],
+    fields: List[str],
+    mesh_term_limit: int = MESH_TERM_LIMIT,
+    affiliation_limit: int = AFFILIATION_LIMIT,
+):
+    """
+    Set up the decoder of a parser worker process
+
+    Used as the ProcessPoolExecutor initializer, so the category matcher and
+    field projection are sent to each worker once rather than with every
+    payload. The arguments must be picklable.
+
+    Args:
+        categorize: Function inferring a subject category from MeSH terms
+        fields: Record fields to extract
+        mesh_term_limit: Number of leading MeSH terms kept
+        affiliation_limit: Number of leading affiliations kept
+    """
+    global _worker_decoder
+    _worker_decoder = PubmedArticleDecoder(
+        categorize, fields, mesh_term_limit, affiliation_limit
+    )
+
+
+def parse_efetch_payload(payload: bytes) -> Tuple[List[Dict], List[str]]:
+    """
+    Parse a raw efetch XML response in a parser worker process
+
+    Args:
+        payload: efetch response body
+
+    Returns:
+        Tuple of (parsed articles, error messages for articles that failed)
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the body is not well-formed XML
+    """
+    root = ET.fromstring(payload)
+
+    articles = []
+    errors = []
+    for article_elem in root.findall(".//PubmedArticle"):
+        try:
+            article_info = _worker_decoder.decode(article_elem)
+        except Exception as e:
+            errors.append(f"Error parsing article XML: {e}")
+            continue
+        if article_info:
+            articles.append(article_info)
+
+    return articles, errors
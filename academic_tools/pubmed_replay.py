@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed HTTP Record/Replay Cache
+Transport-level store of raw E-utilities responses keyed by normalized
+request parameters, so that development runs and benchmarks can replay
+recorded traffic offline, deterministically and at disk speed
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Cache modes: serve recordings and record misses / recordings only / off
+REPLAY_MODES = ("record", "replay", "passthrough")
+
+# Parameters identifying the caller rather than the request
+_IGNORED_PARAMS = {"tool", "email", "api_key"}
+
+
+class ReplayMissError(requests.RequestException):
+    """Raised in replay mode for a request that was never recorded"""
+
+
+class ResponseRecorder:
+    """
+    SQLite store of compressed raw HTTP responses
+
+    Only successful responses are recorded. Requests are identified by
+    method, URL and their query and form parameters, excluding the tool,
+    email and api_key identification, so recordings made with one API key
+    replay with another or with none.
+    """
+
+    def __init__(self, path: str, mode: str = "record"):
+        """
+        Open or create the store
+
+        Args:
+            path: SQLite database file (created if missing)
+            mode: "record" replays recorded responses and records the others,
+                "replay" serves recorded responses only and fails on any
+                other request, "passthrough" neither replays nor records
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.stats = {"replayed": 0, "recorded": 0, "misses": 0}
+        self._lock = threading.Lock()
+        # Shared by the fetching threads, serialized by the lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                recorded_at REAL NOT NULL
+            )
+            """)
+        self.conn.commit()
+
+    @staticmethod
+    def request_key(
+        method: str, url: str, params: Dict = None, data: Dict = None
+    ) -> str:
+        """
+        Normalized identity of a request
+
+        Returns:
+            Canonical JSON of the method, URL and parameters
+        """
+        normalized = {}
+        for section, values in (("params", params), ("data", data)):
+            normalized[section] = sorted(
+                (str(key), str(value))
+                for key, value in (values or {}).items()
+                if key not in _IGNORED_PARAMS and value is not None
+            )
+        return json.dumps([method.upper(), url, normalized], ensure_ascii=False)
+
+    def lookup(
+        self, method: str, url: str, params: Dict = None, data: Dict = None
+    ) -> Optional[requests.Response]:
+        """
+        Find the recorded response of a request
+
+        Returns:
+            Synthetic response built from the recording, or None when the
+            mode is passthrough or nothing was recorded (in record mode)
+
+        Raises:
+            ReplayMissError: In replay mode, if nothing was recorded
+        """
+        if self.mode == "passthrough":
+            return None
+
+        key = self.request_key(method, url, params, data)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body FROM responses WHERE key = ?",
+                (_digest(key),),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+            else:
+                self.stats["replayed"] += 1
+
+        if row is None:
+            if self.mode == "replay":
+                raise ReplayMissError(f"No recorded response for {method} {url}")
+            return None
+
+        status, headers, body = row
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response._content = zlib.decompress(body)
+        response._content_consumed = True
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.replayed = True
+        return response
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        params: Dict,
+        data: Dict,
+        response: requests.Response,
+    ):
+        """
+        Store a successful response (only in record mode)
+
+        The response body is read in full, so a streamed response is
+        buffered before it reaches the caller.
+        """
+        if self.mode != "record":
+            return
+
+        key = self.request_key(method, url, params, data)
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() in ("content-type", "retry-after")
+        }
+        body = zlib.compress(response.content, 6)
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        _digest(key),
+                        method.upper(),
+                        url,
+                        key,
+                        response.status_code,
+                        json.dumps(headers),
+                        body,
+                        time.time(),
+                    ),
+                )
+            self.stats["recorded"] += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT count(*) FROM responses").fetchone()[0]
+
+    def summary(self) -> str:
+        """One-line description of the replay activity"""
+        return (
+            f"{self.mode} mode, {self.stats['replayed']} replayed, "
+            f"{self.stats['recorded']} recorded, {self.stats['misses']} not recorded"
+        )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+def _digest(key: str) -> str:
+    """Short primary key of a normalized request"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed SQLite Export
+Indexed SQLite database of harvested articles, with authors, affiliations
+and MeSH terms in their own tables, filled batch by batch while fetching so
+that downstream filters query it instead of rereading CSV or JSON files
+"""
+
+import sqlite3
+import time
+from typing import Dict, List
+
+from pubmed_parser import FULL_LISTS
+
+# Scalar record fields stored in the articles table, besides the PMID
+ARTICLE_COLUMNS = (
+    "title",
+    "first_author",
+    "last_author",
+    "author_count",
+    "journal",
+    "journal_abbr",
+    "volume",
+    "issue",
+    "pages",
+    "year",
+    "publication_date",
+    "category",
+    "abstract",
+    "abstract_length",
+    "doi",
+    "pmc",
+    "affiliation_count",
+    "publication_types",
+    "url",
+)
+
+# List fields stored one row per element: field -> (table, column); the
+# elements come from the record's FULL_LISTS, as the joined fields may be cut
+# to a limit and affiliations may contain the "; " separator themselves
+LIST_TABLES = {
+    "authors": ("authors", "name"),
+    "affiliations": ("affiliations", "affiliation"),
+    "mesh_terms": ("mesh_terms", "term"),
+}
+
+# Fields whose elements never contain "; ", so that a record without
+# FULL_LISTS (e.g. an esummary record) can be split on it instead
+_SPLITTABLE_FIELDS = {"authors", "mesh_terms"}
+
+_INTEGER_COLUMNS = {"author_count", "year", "abstract_length", "affiliation_count"}
+
+
+class ArticleDatabase:
+    """
+    Sink-like SQLite export of article records
+
+    Each batch is upserted in one transaction, in WAL mode. Writing an
+    article again updates it in place: fields missing from the new record
+    (e.g. with a field projection) keep their stored values, and the author,
+    affiliation and MeSH rows of the fields it has are replaced, so repeated
+    exports of the same articles leave the database unchanged.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create the database
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        self.path = path
+        self.records_written = 0
+        self.seconds = 0.0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns = ",\n".join(
+            f"{column} {'INTEGER' if column in _INTEGER_COLUMNS else 'TEXT'}"
+            for column in ARTICLE_COLUMNS
+        )
+        with self.conn:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS articles (
+                    pmid INTEGER PRIMARY KEY,
+                    {columns}
+                )
+                """)
+            for table, column in LIST_TABLES.values():
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        pmid INTEGER NOT NULL REFERENCES articles (pmid),
+                        position INTEGER NOT NULL,
+                        {column} TEXT NOT NULL,
+                        PRIMARY KEY (pmid, position)
+                    )
+                    """)
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})"
+                )
+            for column in ("year", "journal", "doi"):
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS articles_{column} "
+                    f"ON articles ({column})"
+                )
+
+        assignments = ", ".join(
+            f"{column} = coalesce(excluded.{column}, articles.{column})"
+            for column in ARTICLE_COLUMNS
+        )
+        self._upsert_sql = (
+            f"INSERT INTO articles (pmid, {', '.join(ARTICLE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(ARTICLE_COLUMNS) + 1))}) "
+            f"ON CONFLICT (pmid) DO UPDATE SET {assignments}"
+        )
+
+    def write_batch(self, records: List[Dict]):
+        """
+        Upsert a batch of records in one transaction
+
+        Args:
+            records: Parsed article records; records without a numeric PMID
+                are skipped
+        """
+        start = time.perf_counter()
+        rows = []
+        for record in records:
+            pmid = str(record.get("pmid", ""))
+            if pmid.isdigit():
+                rows.append((int(pmid), record))
+        if not rows:
+            return
+
+        with self.conn:
+            self.conn.executemany(
+                self._upsert_sql,
+                [
+                    (pmid, *(record.get(column) for column in ARTICLE_COLUMNS))
+                    for pmid, record in rows
+                ],
+            )
+            for field, (table, column) in LIST_TABLES.items():
+                replaced = [
+                    (pmid, _list_items(record, field))
+                    for pmid, record in rows
+                    if field in record
+                ]
+                if not replaced:
+                    continue
+                self.conn.executemany(
+                    f"DELETE FROM {table} WHERE pmid = ?",
+                    [(pmid,) for pmid, _ in replaced],
+                )
+                self.conn.executemany(
+                    f"INSERT INTO {table} (pmid, position, {column}) VALUES (?, ?, ?)",
+                    [
+                        (pmid, position, item)
+                        for pmid, items in replaced
+                        for position, item in enumerate(items)
+                        if item
+                    ],
+                )
+
+        self.records_written += len(rows)
+        self.seconds += time.perf_counter() - start
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM articles").fetchone()[0]
+
+    def summary(self) -> str:
+        """One-line description of the export and its ingest rate"""
+        rate = self.records_written / self.seconds if self.seconds else 0.0
+        return (
+            f"{self.records_written} records upserted in {self.seconds:.2f}s "
+            f"({rate:,.0f} records/second), {len(self)} articles in {self.path}"
+        )
+
+    def close(self):
+        """Close the database connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _list_items(record: Dict, field: str) -> List[str]:
+    """Elements of a list field of a record"""
+    items = record.get(FULL_LISTS, {}).get(field)
+    if items is not None:
+        return items
+    if field in _SPLITTABLE_FIELDS:
+        return record[field].split("; ")
+    # Never split an affiliation apart: keep the field as one element
+    return [record[field]]
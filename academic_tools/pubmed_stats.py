@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Harvest Statistics
+Running statistics updated once per record as batches arrive, so that the
+reports never need another pass over (or a copy of) the whole result set
+"""
+
+import heapq
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# Record fields kept for each of the most recent articles
+_RECENT_FIELDS = (
+    "title",
+    "journal",
+    "year",
+    "publication_date",
+    "category",
+    "author_count",
+    "url",
+)
+
+
+class ArticleStatistics:
+    """
+    Single-pass aggregator of journal, category, year and author statistics
+    """
+
+    def __init__(self, recent_size: int = 10):
+        """
+        Initialize the aggregator
+
+        Args:
+            recent_size: Number of most recent articles to keep
+        """
+        self.recent_size = recent_size
+        self.total = 0
+        self.journals = {}
+        self.categories = {}
+        self.years = {}
+        self.author_articles = 0
+        self.author_total = 0
+        self.author_min = None
+        self.author_max = None
+        # Min-heap of (year, -sequence, summary): the root is the least recent
+        self._recent = []
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], **kwargs) -> "ArticleStatistics":
+        """Build statistics from an iterable of records"""
+        statistics = cls(**kwargs)
+        statistics.update(records)
+        return statistics
+
+    def update(self, records: Iterable[Dict]):
+        """Add a batch of records"""
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Dict):
+        """Add one record"""
+        self.total += 1
+
+        journal = record.get("journal", "Unknown")
+        self.journals[journal] = self.journals.get(journal, 0) + 1
+
+        category = record.get("category", "Uncategorized")
+        self.categories[category] = self.categories.get(category, 0) + 1
+
+        # Records projected without the year still carry it in their date
+        year = record.get("year") or _year_of(record.get("publication_date", ""))
+        if year:
+            self.years[year] = self.years.get(year, 0) + 1
+
+        author_count = record.get("author_count")
+        if author_count:
+            self.author_articles += 1
+            self.author_total += author_count
+            if self.author_min is None or author_count < self.author_min:
+                self.author_min = author_count
+            if self.author_max is None or author_count > self.author_max:
+                self.author_max = author_count
+
+        # Among articles of the same year, the earlier one ranks as more recent
+        key = (year or 0, -self.total)
+        if len(self._recent) < self.recent_size:
+            heapq.heappush(self._recent, (*key, self._summary(record)))
+        elif key > self._recent[0][:2]:
+            heapq.heapreplace(self._recent, (*key, self._summary(record)))
+
+    @staticmethod
+    def _summary(record: Dict) -> Dict:
+        return {key: record[key] for key in _RECENT_FIELDS if key in record}
+
+    @property
+    def author_mean(self) -> float:
+        """Average number of authors of the articles listing authors"""
+        return self.author_total / self.author_articles if self.author_articles else 0.0
+
+    def top_journals(self, n: int = None) -> List[Tuple[str, int]]:
+        """Journals by decreasing article count"""
+        return _most_common(self.journals, n)
+
+    def top_categories(self, n: int = None) -> List[Tuple[str, int]]:
+        """Categories by decreasing article count"""
+        return _most_common(self.categories, n)
+
+    def top_years(self, n: int = None) -> List[Tuple[int, int]]:
+        """Years by decreasing article count"""
+        return _most_common(self.years, n)
+
+    def latest_years(self, n: int = None) -> List[Tuple[int, int]]:
+        """Years with articles, most recent first"""
+        return sorted(self.years.items(), reverse=True)[:n]
+
+    def recent_articles(self) -> List[Dict]:
+        """The most recent articles, most recent first"""
+        return [entry[2] for entry in sorted(self._recent, reverse=True)]
+
+    def to_dict(self) -> Dict:
+        """Machine-readable form of the statistics"""
+        return {
+            "total": self.total,
+            "journals": dict(self.top_journals()),
+            "categories": dict(self.top_categories()),
+            "years": {str(year): count for year, count in self.latest_years()},
+            "authors": {
+                "articles": self.author_articles,
+                "mean": round(self.author_mean, 3),
+                "min": self.author_min,
+                "max": self.author_max,
+            },
+            "recent_articles": self.recent_articles(),
+        }
+
+
+def _year_of(date: str) -> int:
+    """First four-digit year in a publication date (0 if there is none)"""
+    match = re.search(r"\d{4}", date or "")
+    return int(match.group()) if match else 0
+
+
+def _most_common(counts: Dict, n: int = None) -> List[Tuple]:
+    """Items by decreasing count, ties kept in first-seen order"""
+    return sorted(counts.items(), key=lambda x: x[1], reverse=True)[:n]
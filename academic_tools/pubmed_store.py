@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Article Store
+Column-oriented in-memory storage of parsed article records: numbers in
+typed arrays, repeated strings (journals, categories, author names, MeSH
+terms) dictionary-encoded, and "; "-joined lists kept as lists of codes,
+while still handing the records out as the dicts the writers expect
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List
+
+from pubmed_parser import public_record
+
+# Storage of each record field; fields not listed are kept as plain values
+FIELD_KINDS = {
+    "author_count": "int",
+    "year": "int",
+    "abstract_length": "int",
+    "affiliation_count": "int",
+    "journal": "category",
+    "journal_abbr": "category",
+    "volume": "category",
+    "issue": "category",
+    "category": "category",
+    "authors": "list",
+    "mesh_terms": "list",
+    "affiliations": "list",
+    "publication_types": "list",
+}
+
+# Separator of the list-valued fields in a record
+LIST_SEPARATOR = "; "
+
+
+class _ObjectColumn:
+    """Column of arbitrary values"""
+
+    def __init__(self, values: List = None):
+        self.values = values if values is not None else []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values) + sum(
+            sys.getsizeof(value) for value in self.values
+        )
+
+
+class _IntColumn:
+    """Column of integers in a typed array"""
+
+    def __init__(self):
+        self.values = array("q")
+
+    def append(self, value):
+        if value is None:
+            value = 0
+        elif type(value) is not int:
+            raise TypeError("not an integer")
+        self.values.append(value)
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values)
+
+
+class _Dictionary:
+    """Distinct values of one or more columns, each stored once"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.values)
+            + sys.getsizeof(self._codes)
+            + sum(sys.getsizeof(value) for value in self.values)
+        )
+
+
+class _CategoryColumn:
+    """Column of repeated values stored as codes into a dictionary"""
+
+    def __init__(self, dictionary: _Dictionary):
+        self.dictionary = dictionary
+        self.codes = array("I")
+
+    def append(self, value):
+        self.codes.append(self.dictionary.encode(value))
+
+    def __getitem__(self, index: int):
+        return self.dictionary.values[self.codes[index]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.codes)
+
+
+class _ListColumn:
+    """Column of separator-joined strings stored as lists of dictionary codes"""
+
+    def __init__(self, dictionary: _Dictionary):
+        self.dictionary = dictionary
+        self.codes = array("I")
+        self.offsets = array("Q", [0])
+
+    def append(self, value):
+        if value is not None:
+            if not isinstance(value, str):
+                raise TypeError("not a string")
+            encode = self.dictionary.encode
+            self.codes.extend(encode(item) for item in value.split(LIST_SEPARATOR))
+        self.offsets.append(len(self.codes))
+
+    def items(self, index: int) -> List[str]:
+        """Elements of the list in one row"""
+        values = self.dictionary.values
+        return [
+            values[code]
+            for code in self.codes[self.offsets[index] : self.offsets[index + 1]]
+        ]
+
+    def __getitem__(self, index: int):
+        return LIST_SEPARATOR.join(self.items(index))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.codes) + sys.getsizeof(self.offsets)
+
+
+class ArticleStore:
+    """
+    Compact list-like container of article records
+
+    Records are appended as dicts and read back as equal dicts, with the
+    same keys in the same order. Each distinct set of keys (a record
+    layout) is stored once, and each row keeps only the code of its layout.
+    Strings shared between records are stored once in a dictionary shared
+    by all categorical and list-valued columns.
+    """
+
+    def __init__(self, records: Iterable[Dict] = None):
+        """
+        Initialize the store
+
+        Args:
+            records: Records to add
+        """
+        self._length = 0
+        self._columns = {}
+        self._strings = _Dictionary()
+        self._layouts = _Dictionary()
+        self._layout_codes = array("I")
+        if records is not None:
+            self.extend(records)
+
+    def _new_column(self, key: str):
+        kind = FIELD_KINDS.get(key)
+        if kind == "int":
+            column = _IntColumn()
+        elif kind == "category":
+            column = _CategoryColumn(self._strings)
+        elif kind == "list":
+            column = _ListColumn(self._strings)
+        else:
+            column = _ObjectColumn()
+        # Rows added before the field first appeared hold a placeholder
+        for _ in range(self._length):
+            column.append(None)
+        return column
+
+    def append(self, record: Dict):
+        """Add one record (without its FULL_LISTS)"""
+        record = public_record(record)
+        layout = tuple(record)
+        for key in layout:
+            if key not in self._columns:
+                self._columns[key] = self._new_column(key)
+
+        for key, column in self._columns.items():
+            value = record.get(key)
+            try:
+                column.append(value)
+            except TypeError:
+                # A value the typed column cannot hold: keep the field as is
+                column = _ObjectColumn([column[i] for i in range(self._length)])
+                column.append(value)
+                self._columns[key] = column
+
+        self._layout_codes.append(self._layouts.encode(layout))
+        self._length += 1
+
+    def extend(self, records: Iterable[Dict]):
+        """Add a batch of records"""
+        for record in records:
+            self.append(record)
+
+    def _row(self, index: int) -> Dict:
+        columns = self._columns
+        layout = self._layouts.values[self._layout_codes[index]]
+        return {key: columns[key][index] for key in layout}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("article index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(self._length):
+            yield self._row(index)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def column(self, key: str) -> List:
+        """
+        Values of one field for every record
+
+        Args:
+            key: Record field
+
+        Returns:
+            One value per record, None where the record lacks the field
+        """
+        column = self._columns.get(key)
+        if column is None:
+            return [None] * self._length
+        values = self._layouts.values
+        return [
+            column[i] if key in values[self._layout_codes[i]] else None
+            for i in range(self._length)
+        ]
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the stored records, in bytes"""
+        return (
+            sum(column.nbytes() for column in self._columns.values())
+            + self._strings.nbytes()
+            + self._layouts.nbytes()
+            + sys.getsizeof(self._layout_codes)
+        )
+
+    def summary(self) -> str:
+        """One-line description of the store size"""
+        nbytes = self.nbytes()
+        per_record = nbytes / self._length if self._length else 0
+        return (
+            f"{self._length} records in {nbytes / 1048576:.1f} MiB "
+            f"({per_record:.0f} bytes/record, {len(self._strings.values)} "
+            f"distinct shared strings)"
+        )
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Incremental Sync
+State of recurring searches: for each saved query, the Entrez date (EDAT)
+covered by its last successful run and the dataset files it maintains, so
+that the next run only searches, fetches and appends articles added since
+"""
+
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from pubmed_writers import ArticleSink, make_sink, read_json_lines
+
+SYNC_STATE_VERSION = 1
+
+
+def query_key(query: Dict) -> str:
+    """
+    Stable key of a saved query
+
+    Empty parameters are dropped and single values treated like one-element
+    lists, so that the same search given in a different form maps to the
+    same state.
+
+    Args:
+        query: Search parameters as accepted by search_articles
+
+    Returns:
+        Canonical JSON form of the query
+    """
+    normalized = {}
+    for key, value in query.items():
+        if not value:
+            continue
+        if key in ("affiliations", "journals", "authors", "keywords"):
+            value = sorted([value] if isinstance(value, str) else value)
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+class SyncState:
+    """
+    JSON file holding the sync state of every saved query
+    """
+
+    def __init__(self, path: str, state: Dict):
+        """
+        Initialize the state (see load)
+
+        Args:
+            path: State file
+            state: State contents
+        """
+        self.path = path
+        self.state = state
+
+    @classmethod
+    def load(cls, path: str) -> "SyncState":
+        """
+        Read a state file, or start an empty state if it does not exist yet
+
+        Raises:
+            ValueError: If the file has an unsupported version
+        """
+        if not os.path.exists(path):
+            return cls(path, {"version": SYNC_STATE_VERSION, "queries": {}})
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != SYNC_STATE_VERSION:
+            raise ValueError(f"Unsupported sync state version in {path}")
+        return cls(path, state)
+
+    def get(self, query: Dict) -> Optional[Dict]:
+        """State of a saved query, or None before its first successful run"""
+        return self.state["queries"].get(query_key(query))
+
+    def record_run(
+        self,
+        query: Dict,
+        entry_date: str,
+        fields: List[str],
+        sinks: List[ArticleSink],
+        added: int,
+    ):
+        """
+        Record a successful run of a query and save the state
+
+        Args:
+            query: Search parameters of the run
+            entry_date: Latest Entrez date covered by the run (YYYY/MM/DD)
+            fields: Record fields of the dataset
+            sinks: Dataset outputs
+            added: Number of articles appended by the run
+        """
+        key = query_key(query)
+        previous = self.state["queries"].get(key, {})
+        self.state["queries"][key] = {
+            "query": json.loads(key),
+            "fields": fields,
+            "datasets": [
+                {"format": sink.format, "path": sink.path, "compress": sink.compress}
+                for sink in sinks
+            ],
+            "last_entry_date": entry_date,
+            "last_run": datetime.now().isoformat(timespec="seconds"),
+            "last_added": added,
+            "records": previous.get("records", 0) + added,
+        }
+        self.save()
+
+    def save(self):
+        """Write the state atomically"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def read_dataset_pmids(dataset: Dict) -> Set[str]:
+    """
+    PMIDs already stored in a dataset file
+
+    Args:
+        dataset: Dataset entry of a sync state ("format", "path", "compress")
+
+    Returns:
+        PMIDs of the records in the file (empty if it does not exist)
+    """
+    if not os.path.exists(dataset["path"]):
+        return set()
+
+    if dataset["format"] == "jsonl":
+        records = read_json_lines(dataset["path"], dataset["compress"])
+        return {str(record.get("pmid")) for record in records}
+
+    opener = gzip.open if dataset["compress"] else open
+    with opener(dataset["path"], "rt", encoding="utf-8", newline="") as f:
+        return {row.get("pmid") for row in csv.DictReader(f)}
+
+
+def open_datasets(datasets: List[Dict], fieldnames: List[str]) -> List[ArticleSink]:
+    """
+    Open dataset files for appending
+
+    Existing files keep their contents and header; missing files are
+    created on the first batch.
+
+    Args:
+        datasets: Dataset entries ("format", "path", "compress")
+        fieldnames: Record fields (CSV columns)
+
+    Returns:
+        One sink per dataset, in order
+    """
+    sinks = []
+    for dataset in datasets:
+        sink = make_sink(
+            dataset["format"], dataset["path"], fieldnames, dataset["compress"]
+        )
+        if os.path.exists(dataset["path"]):
+            sink.resume(os.path.getsize(dataset["path"]), 0)
+        sinks.append(sink)
+    return sinks
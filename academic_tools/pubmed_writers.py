@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PubMed Output Sinks
+Incremental writers that append each parsed batch of articles to disk as soon
+as it arrives, so that a crash loses at most the batch in flight and memory
+use does not grow with the number of results
+"""
+
+import csv
+import gzip
+import io
+import json
+from typing import Dict, Iterator, List
+
+from pubmed_parser import public_record
+
+
+class ArticleSink:
+    """
+    Base class of outputs that receive parsed articles one batch at a time
+
+    The file is opened on the first non-empty batch, so runs that retrieve
+    nothing leave no empty files behind. Every batch is flushed once written.
+    With compression, each batch is written as a separate gzip member; the
+    members concatenate into one valid gzip stream and a file cut at a batch
+    boundary stays readable.
+    """
+
+    # Short format name, used in checkpoint manifests
+    format = None
+
+    def __init__(self, path: str, compress: bool = False):
+        """
+        Initialize the sink
+
+        Args:
+            path: Output file
+            compress: Gzip the output
+        """
+        self.path = path
+        self.compress = compress
+        self.records_written = 0
+        self._file = None
+
+    def write_batch(self, records: List[Dict]):
+        """
+        Append a batch of records and flush it to disk
+
+        Args:
+            records: Parsed article records
+        """
+        if not records:
+            return
+
+        if self._file is None:
+            self._file = open(self.path, "wb")
+            header = self._header()
+            if header:
+                self._write(header)
+
+        buffer = io.StringIO()
+        self._format(records, buffer)
+        self._write(buffer.getvalue())
+        self.records_written += len(records)
+
+    def resume(self, offset: int, records_written: int):
+        """
+        Reopen an existing output for appending
+
+        Anything after offset (a batch that was only partly written) is
+        truncated, and the header is not written again.
+
+        Args:
+            offset: File size after the last batch that should be kept
+            records_written: Number of records up to that offset
+        """
+        self.close()
+        self.records_written = records_written
+        if offset:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+
+    def _write(self, text: str):
+        data = text.encode("utf-8")
+        if self.compress:
+            data = gzip.compress(data, mtime=0)
+        self._file.write(data)
+        self._file.flush()
+
+    @property
+    def offset(self) -> int:
+        """Number of bytes written to the output file so far"""
+        return self._file.tell() if self._file is not None else 0
+
+    def _header(self) -> str:
+        """Text written once at the start of the file"""
+        return ""
+
+    def _format(self, records: List[Dict], buffer: io.StringIO):
+        """Serialize a batch of records into the buffer"""
+        raise NotImplementedError
+
+    def close(self):
+        """Close the output file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CSVSink(ArticleSink):
+    """
+    CSV output with one column per record field
+    """
+
+    format = "csv"
+
+    def __init__(self, path: str, fieldnames: List[str], compress: bool = False):
+        """
+        Initialize the sink
+
+        Args:
+            path: Output file
+            fieldnames: CSV columns, in order
+            compress: Gzip the output
+        """
+        super().__init__(path, compress)
+        self.fieldnames = fieldnames
+
+    def _header(self) -> str:
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=self.fieldnames).writeheader()
+        return buffer.getvalue()
+
+    def _format(self, records: List[Dict], buffer: io.StringIO):
+        writer = csv.DictWriter(
+            buffer, fieldnames=self.fieldnames, extrasaction="ignore"
+        )
+        writer.writerows(records)
+
+
+class JSONLinesSink(ArticleSink):
+    """
+    JSON Lines output with one record per line
+    """
+
+    format = "jsonl"
+
+    def _format(self, records: List[Dict], buffer: io.StringIO):
+        for record in records:
+            buffer.write(json.dumps(public_record(record), ensure_ascii=False))
+            buffer.write("\n")
+
+
+def make_sink(
+    format: str, path: str, fieldnames: List[str], compress: bool = False
+) -> ArticleSink:
+    """
+    Create a sink from its format name
+
+    Args:
+        format: "csv" or "jsonl"
+        path: Output file
+        fieldnames: Record fields (CSV columns)
+        compress: Gzip the output
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if format == "csv":
+        return CSVSink(path, fieldnames, compress)
+    if format == "jsonl":
+        return JSONLinesSink(path, compress)
+    raise ValueError(f"Unknown output format: {format}")
+
+
+def read_json_lines(path: str, compress: bool = False) -> Iterator[Dict]:
+    """Read back the records of a JSON Lines output"""
+    opener = gzip.open if compress else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive Batch Size Test
+Time spent queueing for the rate limit must not count as response time:
+with more workers than the rate allows, fast responses still grow the batch
+"""
+
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "benchmarks"))
+
+from academic_article_scraper import AcademicArticleScraper
+from fake_eutils import FakeEUtilsServer, SyntheticCorpus
+from pubmed_batch_size import AdaptiveBatchSizer
+
+
+def test_rate_limit_wait_does_not_shrink_batches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    corpus = SyntheticCorpus(1500, abstract_words=20, authors=3)
+
+    with FakeEUtilsServer(corpus) as server:
+        # 10 workers at 3 requests/second queue for well over the target
+        scraper = AcademicArticleScraper(
+            log_level="WARNING",
+            max_concurrency=10,
+            base_url=server.base_url,
+            shared_rate_limit_path=None,
+            keep_articles=False,
+        )
+        scraper.batch_sizer = AdaptiveBatchSizer(target_seconds=0.5)
+        try:
+            pmid_list = scraper.search_articles(journals="pnas", max_results=1500)
+            scraper.fetch_article_details(pmid_list)
+        finally:
+            scraper.close()
+
+    assert scraper.record_count == 1500
+    assert scraper.batch_sizer.stats["grown"] > 0
+    assert scraper.batch_sizer.stats["shrunk"] == 0
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checkpoint Resume Test
+Interrupt a checkpointed harvest with failing efetch requests while part of
+each batch is served from the record cache, resume it, and check that every
+article is written exactly once
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TOOLS_DIR, "benchmarks"))
+
+from fake_eutils import FakeEUtilsServer, SyntheticCorpus
+
+SCRAPER = os.path.join(TOOLS_DIR, "academic_article_scraper.py")
+
+
+def run_scraper(base_url: str, workdir: str, *args: str):
+    """Run the scraper CLI against the fake server in workdir"""
+    subprocess.run(
+        [
+            sys.executable,
+            SCRAPER,
+            "--base-url",
+            base_url,
+            "--journals",
+            "pnas",
+            "--cache-db",
+            "cache.db",
+            "--rate-limit-db",
+            "ratelimit.db",
+            "--max-retries",
+            "0",
+            "--log-level",
+            "WARNING",
+            "--no-json",
+            "--no-stats",
+            *args,
+        ],
+        cwd=workdir,
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_resume_writes_each_article_once(tmp_path):
+    workdir = str(tmp_path)
+    corpus = SyntheticCorpus(1000, abstract_words=20, authors=3)
+    with FakeEUtilsServer(corpus, error_endpoints=["efetch"]) as server:
+        # Cache the 360 oldest records, the last ones of the job: its batch 7
+        # is then partly cached and batches 8-10 entirely
+        run_scraper(
+            server.base_url,
+            workdir,
+            "--date-from",
+            "2000/01/01",
+            "--date-to",
+            "2008/12/31",
+            "--output-prefix",
+            "warm",
+        )
+
+        # Every efetch request fails: only the cached batches 8-10 complete
+        server.error_rate = 1.0
+        job = [
+            "--max-results",
+            "1000",
+            "--checkpoint",
+            "job.json",
+            "--batch-size",
+            "100",
+        ]
+        run_scraper(server.base_url, workdir, *job, "--output-prefix", "job")
+        with open(os.path.join(workdir, "job.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert not manifest["complete"]
+        assert sorted(manifest["completed_batches"]) == [7, 8, 9]
+
+        server.error_rate = 0.0
+        run_scraper(server.base_url, workdir, *job, "--resume")
+
+    with open(os.path.join(workdir, "job.json"), encoding="utf-8") as f:
+        assert json.load(f)["complete"]
+
+    (jsonl_path,) = glob.glob(os.path.join(workdir, "job_*.jsonl"))
+    with open(jsonl_path, encoding="utf-8") as f:
+        pmids = [json.loads(line)["pmid"] for line in f]
+    assert len(pmids) == 1000
+    assert len(set(pmids)) == 1000
+
+
+@pytest.mark.parametrize("resume_args", [[], ["--batch-size", "50"]])
+def test_resume_keeps_the_checkpointed_batch_size(tmp_path, resume_args):
+    workdir = str(tmp_path)
+    corpus = SyntheticCorpus(200, abstract_words=20, authors=3)
+    with FakeEUtilsServer(corpus, error_endpoints=["efetch"]) as server:
+        # Cache the 152 newest records: the first batch of 150 is then
+        # served from the cache and the second one needs efetch
+        run_scraper(
+            server.base_url,
+            workdir,
+            "--date-from",
+            "2006/01/01",
+            "--output-prefix",
+            "warm",
+        )
+
+        server.error_rate = 1.0
+        job = ["--max-results", "200", "--checkpoint", "job.json"]
+        run_scraper(
+            server.base_url,
+            workdir,
+            *job,
+            "--batch-size",
+            "150",
+            "--output-prefix",
+            "job",
+        )
+        with open(os.path.join(workdir, "job.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert manifest["completed_batches"] == [0]
+
+        # Resumed without the original --batch-size, or with another one
+        server.error_rate = 0.0
+        run_scraper(server.base_url, workdir, *job, "--resume", *resume_args)
+
+    with open(os.path.join(workdir, "job.json"), encoding="utf-8") as f:
+        assert json.load(f)["complete"]
+
+    (jsonl_path,) = glob.glob(os.path.join(workdir, "job_*.jsonl"))
+    with open(jsonl_path, encoding="utf-8") as f:
+        pmids = [json.loads(line)["pmid"] for line in f]
+    assert sorted(pmids) == sorted(corpus.pmids)
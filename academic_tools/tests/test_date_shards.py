@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Date Shard Test
+Shards of an open-ended publication date range must cover articles dated
+ahead of print as well
+"""
+
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "benchmarks"))
+
+from academic_article_scraper import AcademicArticleScraper
+from fake_eutils import FakeEUtilsServer, SyntheticCorpus
+
+
+def test_open_range_covers_future_dates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Publication years run well past the current one
+    corpus = SyntheticCorpus(1000, first_year=2010, last_year=2040)
+
+    with FakeEUtilsServer(corpus) as server:
+        scraper = AcademicArticleScraper(
+            log_level="WARNING",
+            base_url=server.base_url,
+            shared_rate_limit_path=None,
+        )
+        try:
+            shards = scraper.plan_date_shards(journals="Proc Natl Acad Sci U S A")
+        finally:
+            scraper.close()
+
+    assert shards == [("1900/01/01", "3000/12/31", 1000)]
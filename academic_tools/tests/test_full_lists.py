@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Full List Test
+The SQLite export and the search index must hold every MeSH term of an
+article, also those cut from the mesh_terms field of the text outputs, and
+whether the record was fetched or served from the record cache
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "benchmarks"))
+
+from fake_eutils import FakeEUtilsServer, SyntheticCorpus
+from pubmed_index import ArticleSearchIndex
+from pubmed_parser import FULL_LISTS, MESH_TERM_LIMIT, PubmedArticleDecoder
+from pubmed_sqlite import ArticleDatabase
+
+SCRAPER = os.path.join(TOOLS_DIR, "academic_article_scraper.py")
+
+
+def mesh_terms_of(corpus: SyntheticCorpus, pmid: str):
+    """Every MeSH term of a synthetic article"""
+    article = ET.fromstring(corpus.article_xml(pmid))
+    return [elem.text for elem in article.iter("DescriptorName")]
+
+
+def test_database_outputs_keep_every_mesh_term(tmp_path):
+    workdir = str(tmp_path)
+    corpus = SyntheticCorpus(200, abstract_words=20, authors=3)
+    with FakeEUtilsServer(corpus) as server:
+        # The second run is served from the record cache
+        for run in ("fetched", "cached"):
+            subprocess.run(
+                [
+                    sys.executable,
+                    SCRAPER,
+                    "--base-url",
+                    server.base_url,
+                    "--journals",
+                    "pnas",
+                    "--max-results",
+                    "200",
+                    "--cache-db",
+                    "cache.db",
+                    "--rate-limit-db",
+                    "ratelimit.db",
+                    "--log-level",
+                    "WARNING",
+                    "--no-json",
+                    "--no-csv",
+                    "--no-stats",
+                    "--sqlite",
+                    f"{run}.db",
+                    "--index",
+                    f"{run}.idx",
+                    "--output-prefix",
+                    run,
+                ],
+                cwd=workdir,
+                check=True,
+                capture_output=True,
+            )
+
+    expected = {pmid: mesh_terms_of(corpus, pmid) for pmid in corpus.pmids}
+    truncated = [pmid for pmid, terms in expected.items() if len(terms) > 10]
+    assert truncated and MESH_TERM_LIMIT == 10
+
+    for run in ("fetched", "cached"):
+        (jsonl_path,) = glob.glob(os.path.join(workdir, f"{run}_*.jsonl"))
+        with open(jsonl_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 200
+        for record in records:
+            assert FULL_LISTS not in record
+            terms = expected[record["pmid"]]
+            assert record["mesh_terms"] == "; ".join(terms[:MESH_TERM_LIMIT])
+
+        conn = sqlite3.connect(os.path.join(workdir, f"{run}.db"))
+        stored = {}
+        for pmid, term in conn.execute(
+            "SELECT pmid, term FROM mesh_terms ORDER BY pmid, position"
+        ):
+            stored.setdefault(str(pmid), []).append(term)
+        conn.close()
+        assert stored == expected
+
+        pmid = truncated[0]
+        last_term = expected[pmid][-1]
+        with ArticleSearchIndex(os.path.join(workdir, f"{run}.idx")) as index:
+            results = index.search(f'mesh_terms:"{last_term}"', limit=200)
+        assert pmid in {result["pmid"] for result in results}
+
+
+ARTICLE_XML = """
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID>123</PMID>
+    <Article>
+      <ArticleTitle>Title</ArticleTitle>
+      <AuthorList>
+        <Author>
+          <LastName>Li</LastName><ForeName>Wei</ForeName>
+          <AffiliationInfo>
+            <Affiliation>Dept A; Univ B, Wuhan, China.</Affiliation>
+          </AffiliationInfo>
+        </Author>
+        <Author>
+          <LastName>Smith</LastName><ForeName>Ann</ForeName>
+          <AffiliationInfo><Affiliation>Inst C, Boston, USA.</Affiliation></AffiliationInfo>
+        </Author>
+      </AuthorList>
+    </Article>
+  </MedlineCitation>
+</PubmedArticle>
+"""
+
+
+def test_affiliations_with_separator_stay_whole(tmp_path):
+    record = PubmedArticleDecoder().decode(ET.fromstring(ARTICLE_XML))
+    with ArticleDatabase(str(tmp_path / "articles.db")) as database:
+        database.write_batch([record])
+        rows = database.conn.execute(
+            "SELECT affiliation FROM affiliations ORDER BY position"
+        ).fetchall()
+        authors = database.conn.execute(
+            "SELECT name FROM authors ORDER BY position"
+        ).fetchall()
+
+    assert [row[0] for row in rows] == [
+        "Dept A; Univ B, Wuhan, China.",
+        "Inst C, Boston, USA.",
+    ]
+    assert len(authors) == 2
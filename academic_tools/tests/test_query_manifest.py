@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query Manifest Test
+Query names that map to the same output files must be rejected
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pubmed_batch import load_query_manifest
+
+
+def write_manifest(tmp_path, names):
+    path = tmp_path / "queries.json"
+    queries = [{"name": name, "keywords": ["rice"]} for name in names]
+    path.write_text(json.dumps({"queries": queries}), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "names", [["a b", "a_b"], ["rice!", "rice?"], ["Rice", "rice"]]
+)
+def test_colliding_names_are_rejected(tmp_path, names):
+    with pytest.raises(ValueError) as excinfo:
+        load_query_manifest(write_manifest(tmp_path, names))
+    assert all(repr(name) in str(excinfo.value) for name in names)
+
+
+def test_distinct_names_are_accepted(tmp_path):
+    queries = load_query_manifest(write_manifest(tmp_path, ["rice", "wheat"]))
+    assert [query["name"] for query in queries] == ["rice", "wheat"]
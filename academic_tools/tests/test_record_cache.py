@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Record Cache Test
+Records decoded under another decoder profile, or cached before profiles
+existed, must be fetched again
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pubmed_cache import RecordCache
+from pubmed_categories import DEFAULT_CATEGORY_RULES, MeshCategoryMatcher
+
+RECORDS = [{"pmid": "1", "title": "One"}, {"pmid": "2", "title": "Two"}]
+
+
+def test_profile_mismatch_is_stale(tmp_path):
+    cache = RecordCache(str(tmp_path / "cache.db"))
+    cache.store(RECORDS, profile="mesh_terms=10")
+
+    fresh, missing = cache.lookup(["1", "2"], profile="mesh_terms=10")
+    assert set(fresh) == {"1", "2"} and not missing
+
+    fresh, missing = cache.lookup(["1", "2"], profile="mesh_terms=5")
+    assert not fresh and missing == {"1", "2"}
+    assert cache.stats["stale"] == 2
+
+    cache.store(RECORDS[:1], profile="mesh_terms=5")
+    fresh, missing = cache.lookup(["1", "2"], profile="mesh_terms=5")
+    assert set(fresh) == {"1"} and missing == {"2"}
+    cache.close()
+
+
+def test_database_without_profiles_is_migrated(tmp_path):
+    path = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE records (pmid TEXT PRIMARY KEY, record TEXT NOT NULL, "
+        "checksum TEXT NOT NULL, fetched_at REAL NOT NULL, "
+        "fields TEXT NOT NULL DEFAULT '*')"
+    )
+    conn.execute("INSERT INTO records VALUES ('1', '{}', '', 9e99, '*')")
+    conn.commit()
+    conn.close()
+
+    cache = RecordCache(path)
+    fresh, missing = cache.lookup(["1"], profile="mesh_terms=10")
+    assert not fresh and missing == {"1"}
+    cache.close()
+
+
+def test_category_rules_change_the_digest():
+    matcher = MeshCategoryMatcher(DEFAULT_CATEGORY_RULES)
+    assert matcher.digest() == MeshCategoryMatcher(DEFAULT_CATEGORY_RULES).digest()
+    assert (
+        matcher.digest()
+        != MeshCategoryMatcher(DEFAULT_CATEGORY_RULES, first_match=True).digest()
+    )
+    reordered = dict(reversed(list(DEFAULT_CATEGORY_RULES.items())))
+    assert matcher.digest() != MeshCategoryMatcher(reordered).digest()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retry-After Test
+HTTP-date Retry-After headers, with or without a zone, give a bounded delay
+rather than an error
+"""
+
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pubmed_client import PubMedClient, RateLimiter
+
+
+def retry_after(value: str):
+    client = PubMedClient(RateLimiter(100), max_backoff=60.0)
+    response = requests.Response()
+    response.headers["Retry-After"] = value
+    try:
+        return client._retry_after(response)
+    finally:
+        client.close()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "Wed, 21 Oct 2099 07:28:00 GMT",
+        "Wed, 21 Oct 2099 07:28:00 -0000",
+        "Wed, 21 Oct 2099 07:28:00",
+    ],
+)
+def test_future_http_date_is_capped(value):
+    assert retry_after(value) == 60.0
+
+
+@pytest.mark.parametrize(
+    "value", ["Wed, 21 Oct 2015 07:28:00 -0000", "Wed, 21 Oct 2015 07:28:00"]
+)
+def test_past_http_date_retries_at_once(value):
+    assert retry_after(value) == 0.0
+
+
+def test_seconds_and_garbage():
+    assert retry_after("7") == 7.0
+    assert retry_after("soon") is None